@@ -0,0 +1,608 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import quote, urlencode
+
+from docker.models.containers import Container
+from config import DOCKER_POOL_SIZE, DOCKER_TIMEOUT, BATCH_WORKERS, BATCH_PORT_RANGE, BULK_WORKERS, STOP_TIMEOUT
+from metrics import endpoint_name
+from docker_socket import socket_path_from_env
+from pull_progress import PullProgress
+from docker_manager import (
+    DockerManager, WATCHED_EVENTS, SHM_SIZE, MEM_LIMIT, NANO_CPUS,
+    BULK_ACTIONS, allocate_ports, batch_configs, build_context, custom_image_tag, custom_user_dockerfile,
+    format_batch_progress, format_bulk_progress,
+    is_vaultos, merge_listings, userinit_dockerfile, userinit_image_tag,
+    USERINIT_SCRIPT,
+)
+
+class EngineAPIError(Exception):
+    """Non-2xx response from the Engine API."""
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+def _encode_request(method, path, params=None, body=None):
+    if params:
+        path += '?' + urlencode(params)
+    lines = [f"{method} {path} HTTP/1.1", "Host: docker", "User-Agent: vaultos"]
+    payload = b''
+    if body is not None:
+        if isinstance(body, (bytes, bytearray)):
+            payload = bytes(body)
+            lines.append("Content-Type: application/x-tar")
+        else:
+            payload = json.dumps(body).encode('utf-8')
+            lines.append("Content-Type: application/json")
+    lines.append(f"Content-Length: {len(payload)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+async def _read_head(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by Docker daemon")
+    status = int(line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    return status, headers
+
+def _keeps_alive(status, headers):
+    if headers.get('connection', '').lower() == 'close':
+        return False
+    # Without a length or chunking the body runs until the daemon closes
+    return (status in (204, 304) or 'content-length' in headers
+            or headers.get('transfer-encoding', '').lower() == 'chunked')
+
+async def _iter_body(reader, status, headers):
+    if status in (204, 304):
+        return
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                raise ConnectionError("Connection closed mid-response")
+            size = int(size_line.split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                await reader.readline() # Final CRLF
+                return
+            data = await reader.readexactly(size)
+            await reader.readexactly(2)
+            yield data
+    elif 'content-length' in headers:
+        length = int(headers['content-length'])
+        if length:
+            yield await reader.readexactly(length)
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+def _decode(headers, data):
+    if data and headers.get('content-type', '').startswith('application/json'):
+        return json.loads(data)
+    return data
+
+def _error_message(data):
+    if isinstance(data, dict):
+        return data.get('message', data)
+    if isinstance(data, bytes):
+        return data.decode('utf-8', 'replace').strip()
+    return data
+
+class UnixHTTPPool:
+    """
+    Keep-alive HTTP/1.1 connections to the Engine API over a Unix socket.
+    At most `size` requests are in flight; idle connections are reused.
+    Streaming endpoints (events, pull, build) get a dedicated connection.
+    """
+    def __init__(self, path, size=DOCKER_POOL_SIZE, timeout=DOCKER_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = [] # (reader, writer)
+        self._streams = set() # writers of open streaming responses
+        self._slots = None
+        self.metrics = None # Optional metrics.Metrics recording every request
+
+    async def _connect(self, timeout):
+        try:
+            return await asyncio.wait_for(asyncio.open_unix_connection(self.path), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timed out connecting to {self.path}")
+
+    async def _exchange(self, conn, method, path, params, body):
+        reader, writer = conn
+        writer.write(_encode_request(method, path, params, body))
+        await writer.drain()
+        status, headers = await _read_head(reader)
+        data = b''.join([chunk async for chunk in _iter_body(reader, status, headers)])
+        return status, headers, data
+
+    async def request(self, method, path, params=None, body=None, timeout=None):
+        """Performs one request. Returns (status, decoded JSON or raw bytes)."""
+        started = time.perf_counter()
+        try:
+            status, data = await self._request(method, path, params, body, timeout)
+        except Exception:
+            self._observe(method, path, started)
+            raise
+        self._observe(method, path, started, status)
+        return status, data
+
+    async def _request(self, method, path, params, body, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await self._connect(timeout)
+                try:
+                    status, headers, data = await asyncio.wait_for(
+                        self._exchange(conn, method, path, params, body), timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reused and attempt == 0:
+                        continue # The daemon dropped an idle keep-alive connection; retry fresh
+                    raise
+                except asyncio.TimeoutError:
+                    conn[1].close()
+                    raise TimeoutError(f"{method} {path} timed out after {timeout}s")
+                except BaseException:
+                    conn[1].close()
+                    raise
+
+                if _keeps_alive(status, headers) and len(self._idle) < self.size:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, _decode(headers, data)
+
+    async def stream_json(self, method, path, params=None, body=None):
+        """Async iterator over the newline-delimited JSON objects of a streaming endpoint."""
+        started = time.perf_counter()
+        try:
+            reader, writer = await self._connect(self.timeout)
+        except Exception:
+            self._observe(method, path, started)
+            raise
+        self._streams.add(writer)
+        try:
+            writer.write(_encode_request(method, path, params, body))
+            await writer.drain()
+            try:
+                status, headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+            except Exception:
+                self._observe(method, path, started)
+                raise
+            # Streams are timed to their headers, like docker-py's
+            self._observe(method, path, started, status)
+            if status >= 400:
+                data = b''.join([chunk async for chunk in _iter_body(reader, status, headers)])
+                raise EngineAPIError(status, _error_message(_decode(headers, data)))
+
+            buffer = b''
+            async for data in _iter_body(reader, status, headers):
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if line.strip():
+                        yield json.loads(line)
+            if buffer.strip():
+                yield json.loads(buffer)
+        finally:
+            self._streams.discard(writer)
+            writer.close()
+
+    def _observe(self, method, path, started, status=None):
+        if self.metrics is not None:
+            self.metrics.observe(endpoint_name(method, path), time.perf_counter() - started, status)
+
+    def close_streams(self):
+        for writer in list(self._streams):
+            writer.close()
+
+    def close(self):
+        self.close_streams()
+        while self._idle:
+            self._idle.pop()[1].close()
+
+class AsyncDockerManager(DockerManager):
+    """
+    The DockerManager interface on a native asyncio Engine API client.
+    Every I/O method is a coroutine. Pure helpers (plan_container, resolve_image,
+    container_details, invalidate) are inherited unchanged.
+    """
+    is_async = True
+
+    def __init__(self, socket_path=None, cache_ttl=None, pool_size=DOCKER_POOL_SIZE, timeout=DOCKER_TIMEOUT):
+        path = socket_path or socket_path_from_env()
+        if not os.path.exists(path):
+            raise RuntimeError(f"Could not connect to Docker Daemon: {path} not found")
+        self.client = None # No docker-py client; everything goes through self.http
+        self.http = UnixHTTPPool(path, size=pool_size, timeout=timeout)
+        self.timeout = timeout
+        self._init_state(cache_ttl)
+        self.http.metrics = self.metrics
+
+    async def _call(self, method, path, params=None, body=None, timeout=None):
+        status, data = await self.http.request(method, path, params, body, timeout)
+        if status >= 400:
+            raise EngineAPIError(status, _error_message(data))
+        return data
+
+    def _model(self, attrs):
+        return Container(attrs=attrs)
+
+    def _image_tag(self, container):
+        # Never block the render path on an image lookup; the listing carries the reference
+        return container.attrs.get('Config', {}).get('Image') or "unknown"
+
+    async def _fetch_containers(self):
+        by_label, by_name = await asyncio.gather(
+            self._call('GET', '/containers/json', {'all': 1, 'filters': json.dumps({'label': ['app=vaultOS']})}),
+            self._call('GET', '/containers/json', {'all': 1, 'filters': json.dumps({'name': ['vaultos-']})}),
+        )
+        return merge_listings(by_label, by_name, self._model)
+
+    async def list_containers(self, force=False, strict=False):
+        """
+        Returns a list of vaultOS containers, served from the snapshot while it is fresh.
+        strict: raise if the daemon cannot be listed, instead of returning [].
+        """
+        with self._cache_lock:
+            if not force and self._snapshot is not None and time.monotonic() - self._snapshot_time < self.cache_ttl:
+                return list(self._snapshot.values())
+        try:
+            containers = await self._fetch_containers()
+        except Exception as e:
+            self._listing_failed = True
+            if strict:
+                raise
+            print(f"Error listing containers: {e}")
+            return []
+        with self._cache_lock:
+            self._listing_failed = False
+            self._snapshot = containers
+            self._snapshot_time = time.monotonic()
+        return list(containers.values())
+
+    async def get_and_prune_containers(self, strict=False):
+        """
+        Checks for expired containers, removes them, and returns the list of active vaultOS containers.
+        strict: raise if the daemon cannot be listed, instead of returning [].
+        """
+        try:
+            active_containers = []
+            now = time.time()
+            all_containers = await self.list_containers(strict=strict)
+            for c in all_containers:
+                expiry = self.container_expiry(c)
+                if expiry and now > expiry:
+                    if self.reaper:
+                        self.reaper.schedule(c.id, expiry)
+                        continue
+                    print(f"Container {c.name} expired. Removing.")
+                    try:
+                        await self._call('DELETE', f"/containers/{c.id}", {'force': 1})
+                    except Exception:
+                        pass # Already gone?
+                    self.invalidate(c.id)
+                    continue
+                if self.is_idle_pool_member(c):
+                    continue
+                active_containers.append(c)
+            if self.registry and self._can_prune_registry(all_containers):
+                self.registry.prune(c.id for c in all_containers)
+            return active_containers
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error checking expired: {e}")
+            return []
+
+    async def get_container(self, container_id: str):
+        """Returns a fresh copy of one container (written through to the snapshot), or None if gone."""
+        try:
+            container = self._model(await self._call('GET', f"/containers/{container_id}/json"))
+        except EngineAPIError as e:
+            if e.status != 404:
+                raise
+            self.invalidate(container_id)
+            return None
+        with self._cache_lock:
+            if self._snapshot is not None:
+                self._snapshot[container_id] = container
+        return container
+
+    async def stream_events(self):
+        """Async generator over container events for vaultOS containers. Yields (action, container_id)."""
+        params = {'filters': json.dumps({'type': ['container'], 'event': WATCHED_EVENTS})}
+        async for event in self.http.stream_json('GET', '/events', params):
+            actor = event.get('Actor', {})
+            attrs = actor.get('Attributes', {})
+            # Labels are flattened into the actor attributes
+            if not is_vaultos(attrs.get('name'), attrs):
+                continue
+            if event.get('Action') == 'destroy':
+                self.invalidate(actor.get('ID'))
+            yield event.get('Action', event.get('status')), actor.get('ID', event.get('id'))
+
+    def close_events(self):
+        """Ends any running stream_events() generator."""
+        self.http.close_streams()
+
+    async def start_container(self, container_id: str):
+        try:
+            await self._call('POST', f"/containers/{container_id}/start")
+            self.invalidate()
+        except Exception as e:
+            raise RuntimeError(f"Failed to start container: {e}")
+
+    async def stop_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        try:
+            # The request has to outlive the daemon's graceful-stop wait
+            await self._call('POST', f"/containers/{container_id}/stop", {'t': timeout},
+                             timeout=self.timeout + timeout)
+            self.invalidate()
+        except Exception as e:
+            raise RuntimeError(f"Failed to stop container: {e}")
+
+    async def restart_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        try:
+            await self._call('POST', f"/containers/{container_id}/restart", {'t': timeout},
+                             timeout=self.timeout + timeout)
+            self.invalidate()
+        except Exception as e:
+            raise RuntimeError(f"Failed to restart container: {e}")
+
+    async def delete_container(self, container_id: str):
+        try:
+            await self._call('DELETE', f"/containers/{container_id}", {'force': 1})
+            self.invalidate()
+        except Exception as e:
+            raise RuntimeError(f"Failed to delete container: {e}")
+
+    async def get_system_info(self, containers=None):
+        """Returns a dict with engine version and vaultOS container counts."""
+        try:
+            if containers is None:
+                containers = await self.list_containers()
+            if self._listing_failed:
+                # An empty list may be a failed listing, not an empty host
+                raise RuntimeError("Container listing failed")
+            if self._version is None:
+                self._version = await self._call('GET', '/version')
+            running = sum(1 for c in containers if c.status == 'running')
+            return {
+                'engine_version': self._version.get('Version', 'Unknown'),
+                'api_version': self._version.get('ApiVersion', 'Unknown'),
+                'total': len(containers),
+                'running': running,
+                'stopped': len(containers) - running,
+                'connected': True
+            }
+        except Exception:
+            return {
+                'engine_version': 'N/A',
+                'api_version': 'N/A',
+                'total': 0,
+                'running': 0,
+                'stopped': 0,
+                'connected': False
+            }
+
+    async def _image_id(self, image_name):
+        """Content digest (image ID) of a local image, or None if it is not present."""
+        try:
+            image = await self._call('GET', f"/images/{quote(image_name, safe='/:')}/json")
+            return image['Id']
+        except EngineAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    async def _image_exists(self, image_name):
+        return await self._image_id(image_name) is not None
+
+    async def _pull_with_progress(self, image_name, callback=None):
+        repo, _, tag = image_name.rpartition(':')
+        if not repo or '/' in tag:
+            repo, tag = image_name, "latest"
+        progress = PullProgress(image_name)
+        started = time.monotonic()
+        try:
+            async for chunk in self.http.stream_json('POST', '/images/create', {'fromImage': repo, 'tag': tag}):
+                if 'error' in chunk:
+                    raise RuntimeError(chunk['error'])
+                # Coalesced: the UI gets a snapshot at most PULL_PROGRESS_HZ times a second
+                snapshot = progress.update(chunk)
+                if callback and snapshot:
+                    callback(snapshot)
+            self._record_pull(image_name, started, progress)
+            if callback:
+                callback(progress.snapshot())
+        except Exception as e:
+            self._record_pull(image_name, started, progress, str(e))
+            if callback:
+                callback(f"Download failed: {e}")
+            raise
+
+    async def build_custom_image(self, base_image, username) -> str:
+        """Builds the custom-user layer on top of base_image, unless it is cached. Returns the image tag."""
+        tag_name = custom_image_tag(await self._image_id(base_image), username)
+        return await self._build_cached(tag_name, {'Dockerfile': custom_user_dockerfile(base_image, username)})
+
+    async def build_userinit_image(self, base_image) -> str:
+        """Builds the shared runtime-user image for base_image, unless it is cached. Returns the image tag."""
+        tag_name = userinit_image_tag(await self._image_id(base_image))
+        return await self._build_cached(tag_name, {
+            'Dockerfile': userinit_dockerfile(base_image),
+            'vaultos-userinit.sh': USERINIT_SCRIPT,
+        })
+
+    async def _build_cached(self, tag_name, files) -> str:
+        if await self._image_exists(tag_name):
+            self._count_build(hit=True)
+            return tag_name
+        self._count_build(hit=False)
+
+        logs = []
+        try:
+            async for chunk in self.http.stream_json('POST', '/build', {'t': tag_name, 'rm': 1}, build_context(files)):
+                if 'error' in chunk:
+                    raise RuntimeError(chunk['error'])
+                logs.append(chunk.get('stream', ''))
+            return tag_name
+        except Exception as e:
+            # Print logs for debugging if build fails
+            if logs:
+                print("Build Logs:", logs)
+            raise RuntimeError(f"Build failed: {e}")
+
+    async def prepare_image(self, plan: dict, progress_callback=None) -> str:
+        """Builds and/or pulls the image a plan needs. Returns the image to run."""
+        final_image = plan['base_image']
+        if not await self._image_exists(final_image):
+            if progress_callback:
+                progress_callback(f"Image {final_image} not found. Starting download...")
+            await self._pull_with_progress(final_image, progress_callback)
+
+        # The base digest keys the custom image, so the base is pulled first
+        if plan['custom_user']:
+            if plan['user_mode'] == 'runtime':
+                final_image = await self.build_userinit_image(plan['base_image'])
+            else:
+                final_image = await self.build_custom_image(plan['base_image'], plan['custom_user'])
+        return final_image
+
+    async def _run_plan(self, plan: dict, image: str) -> str:
+        binds = [f"{host}:{v['bind']}:{v['mode']}" for host, v in plan['volumes'].items()]
+        body = {
+            'Image': image,
+            'Labels': plan['labels'],
+            'Env': [f"{k}={v}" for k, v in plan['environment'].items()],
+            'ExposedPorts': {'3000/tcp': {}},
+            'HostConfig': {
+                'PortBindings': {'3000/tcp': [{'HostPort': str(plan['port'])}]},
+                'ShmSize': SHM_SIZE,
+                'Memory': MEM_LIMIT,
+                'NanoCpus': NANO_CPUS,
+                'RestartPolicy': plan['restart_policy'] or {},
+                'Binds': binds,
+            },
+        }
+        created = await self._call('POST', '/containers/create', {'name': plan['name']}, body)
+        await self._call('POST', f"/containers/{created['Id']}/start")
+        return created['Id']
+
+    async def create_container(self, config: dict, progress_callback=None) -> str:
+        """
+        Creates a container based on the config dictionary.
+        progress_callback: function(str) -> None, called on the event loop with pull status.
+        """
+        started = time.monotonic()
+        try:
+            if self.pool and config.get('type') == 'ephemeral':
+                # The pool runs on its own docker-py manager; claim off the event loop
+                cid = await asyncio.to_thread(self.pool.claim, config)
+                if cid:
+                    self._record_create(config, cid, started)
+                    return cid
+
+            plan = self.plan_container(config)
+            final_image = await self.prepare_image(plan, progress_callback)
+            cid = await self._run_plan(plan, final_image)
+            self.invalidate()
+            self._record_create(config, cid, started)
+            return cid
+        except Exception as e:
+            self._record_create(config, None, started, str(e))
+            raise RuntimeError(f"Failed to create container: {e}")
+
+    async def bound_host_ports(self) -> set:
+        """Host ports published by running containers or reserved by stopped vaultOS desktops."""
+        ports = set()
+        for summary in await self._call('GET', '/containers/json'):
+            for p in summary.get('Ports') or []:
+                if p.get('PublicPort'):
+                    ports.add(int(p['PublicPort']))
+        for c in await self.list_containers():
+            if c.labels.get('vaultos.port'):
+                ports.add(int(c.labels['vaultos.port']))
+        return ports
+
+    async def create_batch(self, config: dict, count: int, port_range=None, workers=BATCH_WORKERS, progress_callback=None) -> dict:
+        """Concurrent counterpart of DockerManager.create_batch, bounded by a semaphore."""
+        started = time.monotonic()
+        ports = allocate_ports(await self.bound_host_ports(), count, port_range or BATCH_PORT_RANGE)
+        configs = batch_configs(config, ports)
+        try:
+            final_image = await self.prepare_image(self.plan_container(configs[0]), progress_callback)
+        except Exception as e:
+            raise RuntimeError(f"Failed to prepare image: {e}")
+
+        slots = asyncio.Semaphore(workers)
+        done = []
+
+        async def create_one(item_config):
+            async with slots:
+                item_started = time.monotonic()
+                plan = self.plan_container(item_config)
+                result = {'name': plan['name'], 'port': plan['port']}
+                try:
+                    result['id'] = await self._run_plan(plan, final_image)
+                except Exception as e:
+                    result['error'] = str(e)
+                result['seconds'] = time.monotonic() - item_started
+                self._record_create(item_config, result.get('id'), item_started, result.get('error'))
+                done.append(result)
+                if progress_callback:
+                    progress_callback(format_batch_progress(result, len(done), count))
+                return result
+
+        results = await asyncio.gather(*(create_one(c) for c in configs))
+        self.invalidate()
+        return {'results': list(results), 'elapsed': time.monotonic() - started}
+
+    async def bulk_action(self, action, container_ids, names=None, workers=BULK_WORKERS, stop_timeout=STOP_TIMEOUT,
+                          progress_callback=None) -> dict:
+        """Concurrent counterpart of DockerManager.bulk_action, bounded by a semaphore."""
+        if action not in BULK_ACTIONS:
+            raise RuntimeError(f"Unknown bulk action: {action}")
+        method = getattr(self, f"{action}_container")
+        kwargs = {'timeout': stop_timeout} if action in ('stop', 'restart') else {}
+        names = names or {}
+        started = time.monotonic()
+        slots = asyncio.Semaphore(workers)
+        done = []
+
+        async def run_one(cid):
+            async with slots:
+                item_started = time.monotonic()
+                result = {'id': cid, 'name': names.get(cid, cid[:12])}
+                try:
+                    await method(cid, **kwargs)
+                except Exception as e:
+                    result['error'] = str(e)
+                result['seconds'] = time.monotonic() - item_started
+                done.append(result)
+                if progress_callback:
+                    progress_callback(format_bulk_progress(action, result, len(done), len(container_ids)))
+                return result
+
+        results = await asyncio.gather(*(run_one(cid) for cid in container_ids))
+        self.invalidate()
+        return {'results': list(results), 'elapsed': time.monotonic() - started}
+
+    async def aclose(self):
+        self.http.close()
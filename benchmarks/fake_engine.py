@@ -0,0 +1,487 @@
+"""
+A local stand-in for the Docker Engine API, served over a Unix socket.
+
+Synthesizes a population of VaultOS containers (plus some unrelated ones)
+and implements just the endpoints DockerManager and AsyncDockerManager use:
+listing with label/name filters, inspect, create/start/stop/delete, image
+inspect, streamed pulls, builds, stats and logs, version and events. Every
+request can be delayed by a fixed latency, and calls are counted per endpoint.
+
+    with FakeEngine(containers=1000, latency=0.002) as engine:
+        os.environ['DOCKER_HOST'] = engine.url
+        ...
+        print(engine.calls)
+"""
+import hashlib
+import json
+import os
+import re
+import socketserver
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+WEBTOP = "lscr.io/linuxserver/webtop"
+DESKTOPS = [("alpine", "xfce"), ("ubuntu", "kde"), ("fedora", "mate"), ("arch", "i3")]
+
+
+def _container_id(seed):
+    return hashlib.sha256(seed.encode()).hexdigest()
+
+
+def _image_id(name):
+    return "sha256:" + hashlib.sha256(name.encode()).hexdigest()
+
+
+def synthesize(count, now=None, seed=''):
+    """
+    count VaultOS containers in a realistic mix, plus one unrelated container per ten.
+    seed: mixed into the IDs, so several engines (a fleet) do not share them.
+    """
+    now = now or time.time()
+    containers = {}
+    for i in range(count):
+        os_name, desktop = DESKTOPS[i % len(DESKTOPS)]
+        mode = ("default", "ephemeral", "persistent")[i % 3]
+        labels = {
+            'app': 'vaultOS', 'vaultos.os': os_name, 'vaultos.desktop': desktop,
+            'vaultos.port': str(10000 + i), 'vaultos.mode': mode,
+        }
+        if mode == 'ephemeral':
+            labels['vaultos.expires'] = str(now + 86400 + i) # Far enough out that pruning is a no-op
+        cid = _container_id(f"{seed}vaultos-{i}")
+        containers[cid] = {
+            'id': cid, 'name': f"vaultos-{cid[:5]}-desk{i}", 'labels': labels,
+            'image': f"{WEBTOP}:{os_name}-{desktop}", 'port': 10000 + i,
+            'state': 'exited' if i % 4 == 3 else 'running', 'created': int(now) - i,
+        }
+    for i in range(count // 10):
+        cid = _container_id(f"{seed}other-{i}")
+        containers[cid] = {
+            'id': cid, 'name': f"postgres-{i}", 'labels': {}, 'image': "postgres:16",
+            'port': None, 'state': 'running', 'created': int(now) - i,
+        }
+    return containers
+
+
+def _matches(container, filters):
+    for expr in filters.get('label', []):
+        key, _, value = expr.partition('=')
+        if key not in container['labels'] or (value and container['labels'][key] != value):
+            return False
+    for pattern in filters.get('name', []):
+        if not re.search(pattern, container['name']):
+            return False
+    return True
+
+
+def _summary(c):
+    ports = [{'PrivatePort': 3000, 'PublicPort': c['port'], 'Type': 'tcp', 'IP': '0.0.0.0'}] \
+        if c['port'] and c['state'] == 'running' else []
+    return {
+        'Id': c['id'], 'Names': [f"/{c['name']}"], 'Image': c['image'], 'ImageID': _image_id(c['image']),
+        'Labels': c['labels'], 'State': c['state'], 'Status': c['state'], 'Created': c['created'],
+        'Ports': ports,
+    }
+
+
+def _inspect(c):
+    bindings = {'3000/tcp': [{'HostIp': '0.0.0.0', 'HostPort': str(c['port'])}]} \
+        if c['port'] and c['state'] == 'running' else {}
+    return {
+        'Id': c['id'], 'Name': f"/{c['name']}", 'Image': _image_id(c['image']), 'Created': str(c['created']),
+        'State': {'Status': c['state'], 'Running': c['state'] == 'running'},
+        'Config': {'Image': c['image'], 'Labels': c['labels'], 'Tty': False},
+        'NetworkSettings': {'Ports': bindings},
+        'HostConfig': {'PortBindings': {'3000/tcp': [{'HostPort': str(c['port'])}]} if c['port'] else {}},
+    }
+
+
+class EngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real daemon
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def engine(self):
+        return self.server.engine
+
+    # -- responses ---------------------------------------------------------
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_empty(self, status=204):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def send_chunk(self, payload):
+        data = json.dumps(payload).encode() + b"\r\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    # -- routing -----------------------------------------------------------
+
+    def route(self, method):
+        url = urlparse(self.path)
+        path = re.sub(r'^/v[\d.]+', '', url.path) # docker-py prefixes the API version
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        for pattern, endpoint, handler in ROUTES:
+            if pattern[0] != method:
+                continue
+            m = re.fullmatch(pattern[1], path)
+            if m:
+                self.engine.record(f"{method} {endpoint}")
+                if self.engine.latency:
+                    time.sleep(self.engine.latency)
+                return handler(self, query, body, *[unquote(g) for g in m.groups()])
+        self.engine.record(f"{method} (unknown)")
+        self.send_json(404, {'message': f"page not found: {method} {path}"})
+
+    def do_GET(self):
+        self.route('GET')
+
+    def do_POST(self):
+        self.route('POST')
+
+    def do_DELETE(self):
+        self.route('DELETE')
+
+    def do_HEAD(self):
+        self.route('HEAD')
+
+    # -- endpoints ---------------------------------------------------------
+
+    def ping(self, query, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def version(self, query, body):
+        self.send_json(200, {'Version': "24.0.0-fake", 'ApiVersion': "1.43", 'MinAPIVersion': "1.12"})
+
+    def list_containers(self, query, body):
+        filters = json.loads(query.get('filters') or '{}')
+        show_all = query.get('all') in ('1', 'true', 'True')
+        with self.engine.lock:
+            rows = [_summary(c) for c in self.engine.containers.values()
+                    if (show_all or c['state'] == 'running') and _matches(c, filters)]
+        self.send_json(200, rows)
+
+    def inspect_container(self, query, body, ref):
+        c = self.engine.find(ref)
+        if c is None:
+            return self.send_json(404, {'message': f"No such container: {ref}"})
+        self.send_json(200, _inspect(c))
+
+    def create_container(self, query, body):
+        spec = json.loads(body or b'{}')
+        image = spec.get('Image', '')
+        if image not in self.engine.images:
+            return self.send_json(404, {'message': f"No such image: {image}"})
+        name = query.get('name') or f"fake-{len(self.engine.containers)}"
+        bindings = (spec.get('HostConfig') or {}).get('PortBindings') or {}
+        port = bindings.get('3000/tcp', [{}])[0].get('HostPort')
+        cid = _container_id(f"created-{name}-{time.monotonic_ns()}")
+        with self.engine.lock:
+            self.engine.containers[cid] = {
+                'id': cid, 'name': name, 'labels': spec.get('Labels') or {}, 'image': image,
+                'port': int(port) if port else None, 'state': 'created', 'created': int(time.time()),
+            }
+        self.send_json(201, {'Id': cid, 'Warnings': []})
+
+    def set_state(self, ref, state):
+        c = self.engine.find(ref)
+        if c is None:
+            return self.send_json(404, {'message': f"No such container: {ref}"})
+        c['state'] = state
+        self.send_empty()
+
+    def start_container(self, query, body, ref):
+        self.set_state(ref, 'running')
+
+    def graceful_stop(self, query, ref):
+        # Takes stop_seconds, or the t timeout if the desktop would take longer
+        seconds = min(float(query.get('t', 10)), self.engine.stop_seconds)
+        if seconds > 0 and self.engine.find(ref):
+            time.sleep(seconds)
+
+    def stop_container(self, query, body, ref):
+        self.graceful_stop(query, ref)
+        self.set_state(ref, 'exited')
+
+    def restart_container(self, query, body, ref):
+        self.graceful_stop(query, ref)
+        self.set_state(ref, 'running')
+
+    def delete_container(self, query, body, ref):
+        c = self.engine.find(ref)
+        if c is None:
+            return self.send_json(404, {'message': f"No such container: {ref}"})
+        with self.engine.lock:
+            self.engine.containers.pop(c['id'], None)
+        self.send_empty()
+
+    def inspect_image(self, query, body, name):
+        for tag, seed in list(self.engine.images.items()):
+            image_id = _image_id(seed)
+            if name == tag or image_id[7:].startswith(name.replace('sha256:', '')):
+                return self.send_json(200, {'Id': image_id, 'RepoTags': [tag]})
+        self.send_json(404, {'message': f"No such image: {name}"})
+
+    def pull_image(self, query, body):
+        name = f"{query['fromImage']}:{query.get('tag') or 'latest'}"
+        layers = [hashlib.sha256(f"{name}-{i}".encode()).hexdigest()[:12] for i in range(self.engine.layers)]
+        steps = 5
+        pause = self.engine.pull_seconds / (len(layers) * steps) if self.engine.pull_seconds else 0
+        self.start_stream()
+        self.send_chunk({'status': f"Pulling from {query['fromImage']}", 'id': query.get('tag') or 'latest'})
+        for layer in layers:
+            self.send_chunk({'status': 'Pulling fs layer', 'id': layer})
+        for layer in layers:
+            total = 50_000_000
+            for step in range(1, steps + 1):
+                if pause:
+                    time.sleep(pause)
+                self.send_chunk({'status': 'Downloading', 'id': layer,
+                                 'progressDetail': {'current': total * step // steps, 'total': total}})
+            self.send_chunk({'status': 'Download complete', 'id': layer})
+            self.send_chunk({'status': 'Pull complete', 'id': layer})
+        self.send_chunk({'status': f"Status: Downloaded newer image for {name}"})
+        self.end_stream()
+        self.engine.images[name] = name
+
+    def build_image(self, query, body):
+        tag = query.get('t', '')
+        self.start_stream()
+        self.send_chunk({'stream': "Step 1/1 : FROM fake\n"})
+        self.engine.images[tag] = f"{tag}-{time.monotonic_ns()}"
+        image_id = _image_id(self.engine.images[tag])
+        self.send_chunk({'aux': {'ID': image_id}})
+        self.send_chunk({'stream': f"Successfully built {image_id[7:19]}\n"})
+        self.send_chunk({'stream': f"Successfully tagged {tag}\n"})
+        self.end_stream()
+
+    def container_stats(self, query, body, ref):
+        c = self.engine.find(ref)
+        if c is None:
+            return self.send_json(404, {'message': f"No such container: {ref}"})
+        # Busy desktops (every third) hover near their 2-core, 1 GB caps
+        busy = int(c['id'][:2], 16) % 3 == 0
+        reading = {'cpu': 0, 'system': 0}
+
+        def document():
+            previous = dict(reading)
+            reading['system'] += 4_000_000_000 # 4 host cores, 1 s apart
+            reading['cpu'] += 1_900_000_000 if busy else 300_000_000
+            return {
+                'read': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                'cpu_stats': {'cpu_usage': {'total_usage': reading['cpu']},
+                              'system_cpu_usage': reading['system'], 'online_cpus': 4},
+                'precpu_stats': {'cpu_usage': {'total_usage': previous['cpu']},
+                                 'system_cpu_usage': previous['system']},
+                'memory_stats': {'usage': (980 if busy else 400) * 2**20,
+                                 'limit': 2**30, 'stats': {'inactive_file': 10 * 2**20}},
+            }
+
+        if query.get('stream') in ('0', 'false', 'False'):
+            return self.send_json(200, document())
+        self.start_stream()
+        try:
+            while not self.engine.stopped.is_set():
+                self.send_chunk(document())
+                self.engine.stopped.wait(self.engine.stats_interval)
+            self.end_stream()
+        except OSError:
+            pass # Client closed the stream
+
+    def container_logs(self, query, body, ref):
+        c = self.engine.find(ref)
+        if c is None:
+            return self.send_json(404, {'message': f"No such container: {ref}"})
+        # Multiplexed stdout frames (8-byte header), as for a container without a TTY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tail = query.get('tail', 'all')
+        count = 100 if tail == 'all' else int(tail)
+
+        def send_lines(start, n):
+            data = b"".join(f"[s6-init] {c['name']}: service line {i}\n".encode() for i in range(start, start + n))
+            frame = b"\x01\x00\x00\x00" + len(data).to_bytes(4, 'big') + data
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+            self.wfile.flush()
+
+        try:
+            if count:
+                send_lines(0, count)
+            sent = count
+            rate = self.engine.log_lines_per_second
+            while query.get('follow') in ('1', 'true', 'True') and rate and not self.engine.stopped.is_set():
+                # Lines arrive in ten batches a second
+                batch = max(1, int(rate / 10))
+                send_lines(sent, batch)
+                sent += batch
+                self.engine.stopped.wait(batch / rate)
+            self.end_stream()
+        except OSError:
+            pass # Client closed the stream
+
+    def events(self, query, body):
+        # Held open (no events) until the engine stops, like an idle daemon
+        self.start_stream()
+        self.engine.stopped.wait()
+        try:
+            self.end_stream()
+        except OSError:
+            pass # Client closed the stream first
+
+
+ROUTES = [
+    (('GET', r'/_ping'), '/_ping', EngineHandler.ping),
+    (('HEAD', r'/_ping'), '/_ping', EngineHandler.ping),
+    (('GET', r'/version'), '/version', EngineHandler.version),
+    (('GET', r'/containers/json'), '/containers/json', EngineHandler.list_containers),
+    (('GET', r'/containers/([^/]+)/json'), '/containers/{id}/json', EngineHandler.inspect_container),
+    (('POST', r'/containers/create'), '/containers/create', EngineHandler.create_container),
+    (('POST', r'/containers/([^/]+)/start'), '/containers/{id}/start', EngineHandler.start_container),
+    (('POST', r'/containers/([^/]+)/stop'), '/containers/{id}/stop', EngineHandler.stop_container),
+    (('POST', r'/containers/([^/]+)/restart'), '/containers/{id}/restart', EngineHandler.restart_container),
+    (('DELETE', r'/containers/([^/]+)'), '/containers/{id}', EngineHandler.delete_container),
+    (('GET', r'/images/(.+)/json'), '/images/{name}/json', EngineHandler.inspect_image),
+    (('POST', r'/images/create'), '/images/create', EngineHandler.pull_image),
+    (('POST', r'/build'), '/build', EngineHandler.build_image),
+    (('GET', r'/containers/([^/]+)/stats'), '/containers/{id}/stats', EngineHandler.container_stats),
+    (('GET', r'/containers/([^/]+)/logs'), '/containers/{id}/logs', EngineHandler.container_logs),
+    (('GET', r'/events'), '/events', EngineHandler.events),
+]
+
+
+class FakeEngine:
+    """
+    containers: VaultOS containers to synthesize.
+    latency: seconds added to every API call.
+    pull_seconds: how long a simulated image pull streams for.
+    stats_interval: seconds between documents on a stats stream.
+    log_lines_per_second: output rate of a followed log stream.
+    seed: makes container IDs differ from other engines'.
+    stop_seconds: how long a graceful stop takes (capped by the request's t).
+    """
+    def __init__(self, containers=100, latency=0.0, pull_seconds=0.0, layers=3, path=None, stats_interval=1.0,
+                 log_lines_per_second=10, seed='', stop_seconds=0.0):
+        self.latency = latency
+        self.pull_seconds = pull_seconds
+        self.stats_interval = stats_interval
+        self.log_lines_per_second = log_lines_per_second
+        self.stop_seconds = stop_seconds
+        self.layers = layers
+        self.lock = threading.Lock()
+        self.containers = synthesize(containers, seed=seed)
+        self.images = {} # tag -> content id seed
+        self.preload_images()
+        self.calls = Counter()
+        self.stopped = threading.Event()
+        self._tmp = None
+        if path is None:
+            self._tmp = tempfile.TemporaryDirectory()
+            path = os.path.join(self._tmp.name, "docker.sock")
+        self.path = path
+        self.url = f"unix://{path}"
+        self._server = None
+
+    def preload_images(self):
+        """Marks every image the synthesized containers run as local."""
+        for c in self.containers.values():
+            self.images[c['image']] = c['image']
+
+    def forget_images(self):
+        """Drops all local images, so the next create has to pull."""
+        self.images.clear()
+
+    def record(self, endpoint):
+        with self.lock:
+            self.calls[endpoint] += 1
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+    def find(self, ref):
+        """Container by full ID, unique ID prefix or name, like the daemon."""
+        with self.lock:
+            if ref in self.containers:
+                return self.containers[ref]
+            for c in self.containers.values():
+                if c['name'] == ref.lstrip('/') or c['id'].startswith(ref):
+                    return c
+        return None
+
+    def start(self):
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, EngineHandler)
+        self._server.daemon_threads = True
+        self._server.engine = self
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-engine").start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._tmp:
+            self._tmp.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake Docker Engine API on a Unix socket")
+    parser.add_argument("--containers", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--pull-seconds", type=float, default=2.0)
+    parser.add_argument("--socket", default=None, help="Socket path (default: a temporary file)")
+    args = parser.parse_args()
+
+    engine = FakeEngine(args.containers, args.latency_ms / 1000, args.pull_seconds, path=args.socket).start()
+    print(f"Serving {args.containers} containers. export DOCKER_HOST={engine.url}")
+    try:
+        engine.stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        print(dict(engine.calls))
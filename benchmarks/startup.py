@@ -0,0 +1,67 @@
+"""
+Startup-time budget for the headless CLI.
+
+    python benchmarks/startup.py [--runs 10] [--budget-ms 150] [--fake 100]
+
+Times `python -m vaultos ls --json` against the local daemon, or with --fake
+against the fake Engine API holding that many containers (median of
+several runs), and exits non-zero if it is over budget. The bare interpreter
+and `vaultos --help` (no Docker import) are timed too, to show where the
+time goes.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 150
+
+
+def time_command(argv, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable] + argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        samples.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} failed: {result.stderr.decode().strip()}")
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--fake", type=int, metavar="N", help="Serve N containers from the fake Engine API")
+    args = parser.parse_args(argv)
+
+    if args.fake is not None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from fake_engine import FakeEngine
+        engine = FakeEngine(containers=args.fake).start()
+        os.environ['DOCKER_HOST'] = engine.url # Inherited by the timed subprocesses
+
+    rows = [
+        ("python -c pass", ["-c", "pass"]),
+        ("vaultos --help", ["-m", "vaultos", "--help"]),
+        ("vaultos ls --json", ["-m", "vaultos", "ls", "--json"]),
+    ]
+    try:
+        timings = [(label, time_command(cmd, args.runs)) for label, cmd in rows]
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for label, ms in timings:
+        print(f"{label:20} {ms:7.1f} ms (median of {args.runs})")
+
+    ls_ms = timings[-1][1]
+    verdict = "OK" if ls_ms <= args.budget_ms else "OVER BUDGET"
+    print(f"vaultos ls: {ls_ms:.1f} ms, budget {args.budget_ms:.0f} ms: {verdict}")
+    return 0 if ls_ms <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Refresh-latency benchmarks against the fake Engine API (no Docker needed).
+
+    python benchmarks/suite.py [--sizes 10,100,1000,10000] [--latency-ms 1] [--iterations 20]
+                               [--backend sync|async] [--pull-ms 200]
+
+For each container count, times list_containers, get_and_prune_containers,
+get_system_info, a full dashboard refresh (action_refresh_list plus render),
+a cursor move and a search keystroke in the table (each with a repaint of
+the rows on screen) and create_container with an image pull, and reports
+p50/p99 latency and the number of Engine API calls per operation.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_engine import FakeEngine
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of samples (0 < q <= 100)."""
+    ordered = sorted(samples)
+    index = max(0, -(-len(ordered) * q // 100) - 1)
+    return ordered[int(index)]
+
+
+class Result:
+    def __init__(self, op, size, samples, calls):
+        self.op = op
+        self.size = size
+        self.p50 = percentile(samples, 50) * 1000
+        self.p99 = percentile(samples, 99) * 1000
+        self.calls = calls / len(samples)
+
+    def __str__(self):
+        return f"{self.op:26} {self.size:>6} {self.p50:10.2f} {self.p99:10.2f} {self.calls:9.1f}"
+
+
+def make_manager(backend, engine):
+    # cache_ttl=0: every call goes to the (fake) daemon, which is what we are timing
+    if backend == 'async':
+        from async_docker_manager import AsyncDockerManager
+        return AsyncDockerManager(socket_path=engine.path, cache_ttl=0)
+    from docker_manager import DockerManager
+    return DockerManager(cache_ttl=0)
+
+
+async def call(manager, method, *args, **kwargs):
+    fn = getattr(manager, method)
+    if manager.is_async:
+        return await fn(*args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def measure(engine, op, size, iterations, fn, before=None):
+    samples = []
+    engine.reset_calls()
+    for i in range(iterations):
+        if before:
+            before(i) # Untimed setup; must not call the API
+        started = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - started)
+    return Result(op, size, samples, engine.total_calls())
+
+
+async def bench_manager(engine, backend, size, iterations):
+    manager = make_manager(backend, engine)
+    await call(manager, 'get_system_info', []) # Version handshake, cached afterwards
+    results = [
+        await measure(engine, 'list_containers', size, iterations,
+                      lambda i: call(manager, 'list_containers')),
+        await measure(engine, 'get_and_prune_containers', size, iterations,
+                      lambda i: call(manager, 'get_and_prune_containers')),
+        await measure(engine, 'get_system_info', size, iterations,
+                      lambda i: call(manager, 'get_system_info')),
+    ]
+
+    def create(i):
+        config = {'name': f"bench{i}", 'port': 30000 + i, 'type': 'default'}
+        return call(manager, 'create_container', config, progress_callback=lambda msg: None)
+
+    # Every create pulls: the fake image store is emptied first
+    results.append(await measure(engine, 'create_container (pull)', size, max(1, iterations // 4), create,
+                                 before=lambda i: engine.forget_images()))
+    if manager.is_async:
+        await manager.aclose()
+    return results
+
+
+async def bench_refresh(engine, backend, size, iterations):
+    """Full dashboard refresh in a headless Textual app: listing plus table render; then table keystrokes."""
+    import main
+    from registry import Registry
+    from store import Store
+
+    tmp = tempfile.TemporaryDirectory()
+    # Keep the user's real registry and metadata store out of it
+    patches = [
+        mock.patch('docker_manager.create_manager', lambda **kwargs: make_manager(backend, engine)),
+        mock.patch.object(main, 'Registry', lambda: Registry(os.path.join(tmp.name, "registry.json"))),
+        mock.patch.object(main, 'Store', lambda: Store(os.path.join(tmp.name, "vaultos.db"))),
+        mock.patch.object(main, 'PREFETCH_ENABLED', False),
+        mock.patch.object(main, 'WARM_POOL', {}),
+    ]
+    for p in patches:
+        p.start()
+    try:
+        app = main.VaultOSApp()
+        async with app.run_test(size=(160, 50)) as pilot:
+            while not app.system_info:
+                await pilot.pause(0.05)
+
+            async def refresh(i):
+                await app.action_refresh_list().wait()
+
+            results = [await measure(engine, 'action_refresh_list', size, iterations, refresh)]
+
+            table = app.query_one(main.ContainerTable)
+
+            def repaint():
+                for y in range(table.size.height):
+                    table.render_line(y)
+
+            async def cursor_down(i):
+                table.action_cursor_down()
+                repaint()
+
+            query = "ubuntu running"
+
+            async def keystroke(i):
+                table.search(query[:i % len(query) + 1])
+                table.row_count # Re-index now rather than on the next frame
+                repaint()
+
+            results.append(await measure(engine, 'table cursor move', size, iterations, cursor_down))
+            results.append(await measure(engine, 'table search keystroke', size, iterations, keystroke))
+            return results
+    finally:
+        for p in patches:
+            p.stop()
+        tmp.cleanup()
+
+
+async def run(args):
+    print(f"backend={args.backend} latency={args.latency_ms} ms/call iterations={args.iterations}")
+    print(f"{'operation':26} {'N':>6} {'p50 ms':>10} {'p99 ms':>10} {'calls/op':>9}")
+    for size in args.sizes:
+        with FakeEngine(containers=size, latency=args.latency_ms / 1000, pull_seconds=args.pull_ms / 1000) as engine:
+            os.environ['DOCKER_HOST'] = engine.url
+            iterations = args.iterations if size < 10000 else max(3, args.iterations // 4)
+            results = await bench_manager(engine, args.backend, size, iterations)
+            if not args.skip_tui:
+                results[3:3] = await bench_refresh(engine, args.backend, size, iterations)
+            for result in results:
+                print(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VaultOS refresh benchmarks against a fake Engine API")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[10, 100, 1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Added to every API call")
+    parser.add_argument("--pull-ms", type=float, default=200.0, help="Duration of a simulated image pull")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--backend", choices=["sync", "async"], default="sync")
+    parser.add_argument("--skip-tui", action="store_true", help="Skip the Textual refresh and table benchmarks")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
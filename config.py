@@ -1,3 +1,5 @@
+import os
+
 OS_DESKTOP_MAP = {
     "alpine": ["i3", "kde", "mate", "xfce"], 
     "arch": ["i3", "kde", "mate", "xfce"],
@@ -20,3 +22,112 @@ def get_desktop_label(key):
     if not key:
         return "Unknown"
     return key.upper() if len(key) <= 3 else key.capitalize()
+
+# Full reconciles against the daemon (seconds). Container events drive the
+# dashboard in between; reconciles are a safety net for missed events. They
+# run REFRESH_MIN_INTERVAL after a change or user action, back off (doubling)
+# to REFRESH_MAX_INTERVAL while nothing changes, are spaced at least
+# REFRESH_DURATION_FACTOR times the last reconcile's duration apart, and
+# pause while the terminal is in the background or a dialog is open.
+REFRESH_MIN_INTERVAL = 2
+REFRESH_MAX_INTERVAL = 60
+REFRESH_DURATION_FACTOR = 4
+
+# How long (seconds) DockerManager serves container listings from its snapshot
+# before asking the daemon again. Writes through the manager invalidate it.
+CACHE_TTL = 2
+
+# Expiry reaper: removal worker pool size, and how often (seconds) it re-reads
+# deadlines from the daemon to pick up containers it was not told about.
+REAPER_WORKERS = 4
+REAPER_RESYNC_INTERVAL = 60
+
+# Docker backend: "sync" (docker-py in worker threads) or "async" (native
+# asyncio Engine API client over the Unix socket). $VAULTOS_BACKEND overrides.
+DOCKER_BACKEND = "sync"
+# Async backend: keep-alive connections kept open, and per-request timeout (seconds)
+DOCKER_POOL_SIZE = 4
+DOCKER_TIMEOUT = 10
+
+# Batch provisioning: parallel creates, and the default host port range
+# (inclusive) new desktops are allocated from.
+BATCH_WORKERS = 8
+BATCH_PORT_RANGE = (4000, 4999)
+
+# Background image prefetch (opt-in): pulls every OS x desktop image so
+# creates never wait on the network. Bandwidth cap is bytes/second or None.
+PREFETCH_ENABLED = False
+PREFETCH_PARALLEL = 2
+PREFETCH_MAX_BYTES_PER_SEC = None
+
+# Local VaultOS state (registry of pool claims, etc.)
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".vaultos")
+REGISTRY_PATH = os.path.join(STATE_DIR, "registry.json")
+# SQLite store of container metadata (create config, last shown row, create and
+# pull history). The dashboard paints from it, marked stale, while Docker connects.
+STORE_PATH = os.path.join(STATE_DIR, "vaultos.db")
+# Days to keep removed containers and create/pull history
+STORE_RETENTION_DAYS = 30
+
+# Warm pool: already-running, unclaimed ephemeral desktops kept per
+# (os, desktop), e.g. {("alpine", "xfce"): 2}. Members publish ports from
+# WARM_POOL_PORT_RANGE; a claimed desktop keeps its member's port.
+WARM_POOL = {}
+WARM_POOL_PORT_RANGE = (5000, 5099)
+
+# Persistent-advanced custom usernames: "build" bakes each user into its own
+# vaultos-custom-<user> image; "runtime" builds one shared vaultos-userinit
+# image per base and renames the user at container start (from VAULTOS_USER).
+CUSTOM_USER_MODE = "build"
+
+# Image pull progress: raw per-layer chunks are aggregated and handed to the
+# UI at most this many times per second.
+PULL_PROGRESS_HZ = 10
+
+# Startup: the dashboard connects to Docker in the background. Timeout (seconds)
+# for the initial handshake, then reconnect attempts back off exponentially
+# from CONNECT_RETRY_MIN to CONNECT_RETRY_MAX seconds.
+DOCKER_CONNECT_TIMEOUT = 3
+CONNECT_RETRY_MIN = 1
+CONNECT_RETRY_MAX = 30
+
+# Docker API metrics (per-endpoint calls, latency, errors; "m" toggles the
+# dashboard panel). Optionally exported in Prometheus text format: served on
+# http://127.0.0.1:METRICS_PORT/metrics and/or written to METRICS_FILE every
+# METRICS_DUMP_INTERVAL seconds. None disables each.
+METRICS_PORT = None
+METRICS_FILE = None
+METRICS_DUMP_INTERVAL = 15
+
+# Live CPU/memory columns: streaming stats connections are opened only for
+# running containers visible in the table, at most STATS_MAX_STREAMS at once,
+# each keeping its last STATS_HISTORY samples. Cells are flagged at
+# STATS_ALERT_PERCENT of the container's CPU or memory cap.
+STATS_MAX_STREAMS = 20
+STATS_HISTORY = 60
+STATS_ALERT_PERCENT = 90
+
+# Log viewer ("l"): the last LOG_TAIL lines are loaded, then followed. The pane
+# keeps at most LOG_BUFFER_LINES lines and repaints LOG_FPS times a second.
+LOG_TAIL = 500
+LOG_BUFFER_LINES = 5000
+LOG_FPS = 15
+
+# Fleet: named Docker endpoints managed from one dashboard, e.g.
+#   DOCKER_HOSTS = {
+#       "local": "unix:///var/run/docker.sock",
+#       "build1": "ssh://ops@build1",
+#       "build2": {"url": "tcp://build2:2376",
+#                  "tls": {"ca_cert": "ca.pem", "client_cert": "cert.pem", "client_key": "key.pem"}},
+#   }
+# Empty: the single daemon from the environment (DOCKER_HOST). Listings fan out
+# to all hosts at once; a host that does not answer within FLEET_HOST_TIMEOUT
+# seconds shows its last listing until it does.
+DOCKER_HOSTS = {}
+FLEET_HOST_TIMEOUT = 5
+
+# Bulk lifecycle operations on marked rows: parallel Docker calls, and how long
+# (seconds) a stop waits for a graceful shutdown before the daemon kills the
+# desktop. Stops run in parallel, so a batch takes about one STOP_TIMEOUT.
+BULK_WORKERS = 16
+STOP_TIMEOUT = 10
@@ -1,139 +1,618 @@
-import docker
-from docker.errors import DockerException, NotFound
+import threading
+import time
+from config import (CACHE_TTL, BATCH_WORKERS, BATCH_PORT_RANGE, CUSTOM_USER_MODE, LOG_TAIL,
+                    BULK_WORKERS, STOP_TIMEOUT)
+from metrics import Metrics, instrument_session
+from pull_progress import PullProgress
 
 IMAGE_NAME = "lscr.io/linuxserver/webtop:latest"
 
+# Resource limits applied to every desktop
+SHM_SIZE = 1024 ** 3      # 1GB /dev/shm
+MEM_LIMIT = 1024 ** 3     # Limit RAM to 1GB
+NANO_CPUS = 2000000000    # Limit CPU to 2 Cores
+
+# Container lifecycle events the dashboard reacts to
+WATCHED_EVENTS = ['create', 'start', 'stop', 'die', 'destroy']
+
+def is_vaultos(name, labels):
+    """True if a container belongs to VaultOS (label or legacy name prefix)."""
+    if labels and labels.get('app') == 'vaultOS':
+        return True
+    return bool(name) and name.lstrip('/').startswith("vaultos-")
+
+def summary_to_attrs(summary):
+    """
+    Reshapes a /containers/json entry into the inspect layout, so sparse list
+    results expose .name, .labels and NetworkSettings.Ports like a full get().
+    """
+    attrs = dict(summary)
+    names = summary.get('Names') or []
+    attrs['Name'] = names[0] if names else ''
+    attrs['Config'] = {'Labels': summary.get('Labels') or {}, 'Image': summary.get('Image')}
+
+    ports = {}
+    for p in summary.get('Ports') or []:
+        key = f"{p.get('PrivatePort')}/{p.get('Type', 'tcp')}"
+        bindings = ports.setdefault(key, None)
+        if p.get('PublicPort'):
+            if bindings is None:
+                bindings = ports[key] = []
+            bindings.append({'HostIp': p.get('IP', ''), 'HostPort': str(p['PublicPort'])})
+    network = dict(summary.get('NetworkSettings') or {})
+    network['Ports'] = ports
+    attrs['NetworkSettings'] = network
+    return attrs
+
+def merge_listings(by_label, by_name, make_model):
+    """
+    Merges the label- and name-filtered container listings into {id: model}.
+    make_model: callable(attrs) building the backend's container object.
+    """
+    vault_containers = {}
+    for summary in by_label:
+        vault_containers[summary['Id']] = make_model(summary_to_attrs(summary))
+    # The name filter is a substring match, so keep the prefix check
+    for summary in by_name:
+        attrs = summary_to_attrs(summary)
+        if summary['Id'] not in vault_containers and is_vaultos(attrs['Name'], None):
+            vault_containers[summary['Id']] = make_model(attrs)
+    return vault_containers
+
+def parse_image_tag(image_tag):
+    """Recovers (os, desktop) keys from a webtop tag like amd64-ubuntu-kde."""
+    tag_suffix = image_tag.split(":")[-1]
+    if tag_suffix == "latest":
+        return 'alpine', 'xfce'
+    parts = tag_suffix.split("-")
+    if len(parts) >= 3:
+        return parts[1], parts[2]
+    elif len(parts) == 2:
+        return parts[0], parts[1]
+    return None, None
+
+def allocate_ports(bound, count, port_range):
+    """Picks `count` host ports from the inclusive port_range that are not in bound."""
+    low, high = port_range
+    ports = []
+    for port in range(low, high + 1):
+        if port not in bound:
+            ports.append(port)
+            if len(ports) == count:
+                return ports
+    raise RuntimeError(f"Only {len(ports)} free ports in {low}-{high}, need {count}")
+
+def batch_configs(config, ports):
+    """One wizard config per port, named <name>-01, <name>-02, ..."""
+    width = len(str(len(ports)))
+    return [dict(config, name=f"{config.get('name')}-{i:0{width}d}", port=port)
+            for i, port in enumerate(ports, start=1)]
+
+# Lifecycle actions available on several containers at once
+BULK_ACTIONS = ('start', 'stop', 'restart', 'delete')
+
+def format_bulk_progress(action, result, done, count):
+    if 'error' in result:
+        return f"[{done}/{count}] {action} {result['name']} failed: {result['error']}"
+    return f"[{done}/{count}] {action} {result['name']} done in {result['seconds']:.1f}s"
+
+def format_batch_progress(result, done, count):
+    if 'error' in result:
+        return f"[{done}/{count}] Failed {result['name']}: {result['error']}"
+    return f"[{done}/{count}] Created {result['name']} on port {result['port']}"
+
+# Part of every custom image's cache key; bump it whenever custom_user_dockerfile changes
+CUSTOM_DOCKERFILE_VERSION = 1
+
+def custom_image_tag(base_digest, username):
+    """
+    Content-addressed tag for a custom-user image. The same base image digest,
+    username and Dockerfile template always map to the same tag, so an existing
+    image can be reused without building.
+    """
+    import hashlib
+    key = f"{base_digest}|{username}|{CUSTOM_DOCKERFILE_VERSION}"
+    return f"vaultos-custom-{username}:{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+
+def custom_user_dockerfile(base_image, username):
+    """Dockerfile that renames the LSIO 'abc' user to username on top of base_image."""
+    # Check if Alpine (latest or explicit alpine tag)
+    is_alpine = "dis-alpine" in base_image # Tag logic we used is os-desktop, so 'alpine' in string?
+    # base_image is "lscr.io/linuxserver/webtop:tag"
+    # our tag logic: "alpine-xfce", "arch-kde", etc. "latest" is alpine.
+    if ":latest" in base_image or "alpine" in base_image:
+         # Alpine Logic:
+         # - Install sudo, shadow (for chpasswd), bash
+         # - adduser -D
+         dockerfile = f"""
+         FROM {base_image}
+         ENV USER={username}
+         ENV HOME=/home/{username}
+         RUN apk add --no-cache sudo shadow bash && \\
+             usermod -l {username} abc && \\
+             (groupmod -n {username} abc || true) && \\
+             if [ -d "/home/abc" ]; then mv /home/abc /home/{username}; else mkdir -p /home/{username}; fi && \\
+             usermod -d /home/{username} {username} && \\
+             ln -s /home/{username} /home/abc && \\
+             chown -R {username}:{username} /home/{username} && \\
+             chown -R {username}:{username} /config || true && \\
+             (find /etc/cont-init.d /etc/services.d /etc/s6-overlay -type f -exec sed -i 's/abc/{username}/g' {{}} + || true) && \\
+             echo '{username}:{username}' | chpasswd && \\
+             echo '{username} ALL=(ALL) NOPASSWD: ALL' > /etc/sudoers.d/{username} && \\
+             chmod 0440 /etc/sudoers.d/{username}
+         """
+    else:
+         # Standard Linux (Debian/Ubuntu/Fedora/Arch/EL)
+         dockerfile = f"""
+         FROM {base_image}
+         ENV USER={username}
+         ENV HOME=/home/{username}
+         RUN usermod -l {username} abc && \\
+             (groupmod -n {username} abc || true) && \\
+             if [ -d "/home/abc" ]; then mv /home/abc /home/{username}; else mkdir -p /home/{username}; fi && \\
+             usermod -d /home/{username} {username} && \\
+             ln -s /home/{username} /home/abc && \\
+             chown -R {username}:{username} /home/{username} && \\
+             chown -R {username}:{username} /config || true && \\
+             (find /etc/cont-init.d /etc/services.d /etc/s6-overlay -type f -exec sed -i 's/abc/{username}/g' {{}} + || true) && \\
+             echo '{username}:{username}' | chpasswd && \\
+             echo '{username} ALL=(ALL) NOPASSWD: ALL' > /etc/sudoers.d/{username} && \\
+             chmod 0440 /etc/sudoers.d/{username}
+         """
+    return dockerfile
+
+# Part of the vaultos-userinit image's cache key; bump it whenever the hook or its Dockerfile changes
+USERINIT_VERSION = 1
+
+# Runs as root from LSIO's /custom-cont-init.d before the desktop services
+# start, and does at container start what custom_user_dockerfile bakes in.
+USERINIT_SCRIPT = """#!/bin/sh
+U="$VAULTOS_USER"
+if [ -z "$U" ] || [ "$U" = "abc" ] || id "$U" >/dev/null 2>&1; then
+    exit 0 # No custom user, or already renamed on a previous start
+fi
+usermod -l "$U" abc
+groupmod -n "$U" abc || true
+# /home/$U may already be a mapped home directory
+if [ ! -e "/home/$U" ]; then
+    if [ -d /home/abc ]; then mv /home/abc "/home/$U"; else mkdir -p "/home/$U"; fi
+fi
+usermod -d "/home/$U" "$U"
+[ -e /home/abc ] || ln -s "/home/$U" /home/abc
+chown -R "$U:$U" "/home/$U"
+chown -R "$U:$U" /config || true
+find /etc/cont-init.d /etc/services.d /etc/s6-overlay -type f -exec sed -i "s/abc/$U/g" {} + || true
+echo "$U:$U" | chpasswd
+echo "$U ALL=(ALL) NOPASSWD: ALL" > "/etc/sudoers.d/$U"
+chmod 0440 "/etc/sudoers.d/$U"
+"""
+
+def userinit_image_tag(base_digest):
+    """Content-addressed tag of the shared runtime-user image for one base image."""
+    import hashlib
+    key = f"{base_digest}|{USERINIT_VERSION}"
+    return f"vaultos-userinit:{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+
+def userinit_dockerfile(base_image):
+    """Dockerfile for the shared image: base_image plus the USERINIT_SCRIPT hook, no user baked in."""
+    packages = ""
+    if ":latest" in base_image or "alpine" in base_image:
+        # Alpine lacks usermod/chpasswd/sudo; install them once here instead of at every start
+        packages = "RUN apk add --no-cache sudo shadow bash\n"
+    return (f"FROM {base_image}\n"
+            f"{packages}"
+            "COPY vaultos-userinit.sh /custom-cont-init.d/10-vaultos-userinit\n"
+            "RUN chmod 0755 /custom-cont-init.d/10-vaultos-userinit\n")
+
+def build_context(files):
+    """Tar build context from {path: text}. Returns bytes."""
+    import io
+    import tarfile
+    context = io.BytesIO()
+    with tarfile.open(fileobj=context, mode='w') as tar:
+        for path, text in files.items():
+            data = text.encode('utf-8')
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+    return context.getvalue()
+
+def tls_config(tls):
+    """docker-py TLS settings from a host entry's tls value (None, True or a dict of file paths)."""
+    if not isinstance(tls, dict):
+        return tls or False
+    from docker.tls import TLSConfig
+    cert = (tls['client_cert'], tls['client_key']) if tls.get('client_cert') else None
+    return TLSConfig(client_cert=cert, ca_cert=tls.get('ca_cert'), verify=bool(tls.get('ca_cert')))
+
 class DockerManager:
-    def __init__(self):
+    is_async = False # Methods are blocking; callers run them off the UI thread
+
+    def __init__(self, cache_ttl=None, connect_timeout=None, metrics=None, base_url=None, tls=None):
+        """
+        connect_timeout: seconds to wait for the daemon's version handshake (docker-py default if None).
+        metrics: Metrics to record into, e.g. shared with another manager; a new one if None.
+        base_url: Docker endpoint (unix://, tcp://, ssh://); the environment (DOCKER_HOST) if None.
+        tls: for tcp:// endpoints, True or {'ca_cert', 'client_cert', 'client_key'} file paths.
+        """
+        # docker-py is imported here, not at module level: `vaultos ls` uses this module without it
+        import docker
+        from docker.constants import DEFAULT_TIMEOUT_SECONDS, DEFAULT_MAX_POOL_SIZE
+        from docker.errors import DockerException
+
+        # Enough keep-alive connections for a full bulk operation
+        kwargs = {'max_pool_size': max(DEFAULT_MAX_POOL_SIZE, BULK_WORKERS)}
+        if connect_timeout:
+            kwargs['timeout'] = connect_timeout
         try:
-            self.client = docker.from_env()
+            if base_url:
+                # ssh:// goes through the ssh binary, so no paramiko is needed
+                self.client = docker.DockerClient(base_url=base_url, tls=tls_config(tls),
+                                                  use_ssh_client=base_url.startswith('ssh://'), **kwargs)
+            else:
+                self.client = docker.from_env(**kwargs)
+            if connect_timeout:
+                # Only the handshake is short; pulls and builds keep the normal timeout
+                self.client.api.timeout = DEFAULT_TIMEOUT_SECONDS
         except DockerException as e:
             raise RuntimeError(f"Could not connect to Docker Daemon: {e}")
+        self._init_state(cache_ttl)
+        self.metrics = metrics or self.metrics
+        # Every docker-py call goes through client.api; count and time them per endpoint
+        instrument_session(self.client.api, self.metrics)
+
+    def _init_state(self, cache_ttl):
+        self._events_stream = None
+
+        # Snapshot cache shared by listing, status bar and lifecycle lookups
+        self.cache_ttl = CACHE_TTL if cache_ttl is None else cache_ttl
+        self._cache_lock = threading.Lock()
+        self._snapshot = None # container id -> container
+        self._snapshot_time = 0.0
+        self._version = None # Engine version, cached for the session
+        self._listing_failed = False # The last listing could not reach the daemon
+        self._image_tags = {} # image id -> first tag, for containers without vaultos.* labels
+        self.reaper = None # Optional ExpiryReaper that takes over removals
+        self.registry = None # Optional Registry holding warm-pool claims
+        self.pool = None # Optional WarmPool that serves ephemeral creates
+        self.store = None # Optional Store recording create and pull history
+        self.build_stats = {'hits': 0, 'misses': 0} # Custom-user image cache, this session
+        self.metrics = Metrics() # Docker API calls made through this manager
+
+    def _count_build(self, hit):
+        with self._cache_lock:
+            self.build_stats['hits' if hit else 'misses'] += 1
+
+    def build_cache_stats(self) -> dict:
+        """Hit/miss counts of the custom-user image cache for this session."""
+        with self._cache_lock:
+            return dict(self.build_stats)
 
-    def list_containers(self):
-        """Returns a list of vaultOS containers."""
+    def invalidate(self, container_id=None):
+        """Drops one container from the snapshot, or the whole snapshot."""
+        with self._cache_lock:
+            if container_id is None:
+                self._snapshot = None
+            elif self._snapshot is not None:
+                self._snapshot.pop(container_id, None)
+
+    def container_expiry(self, container):
+        """Expiry timestamp from the vaultos.expires label or a pool claim, else None."""
+        expiry = container.labels.get('vaultos.expires')
+        if not expiry and self.registry:
+            entry = self.registry.get(container.id)
+            expiry = entry and entry.get('expires')
+        return float(expiry) if expiry else None
+
+    def display_name(self, container):
+        """Container name, or the name a claimed pool desktop was requested under."""
+        entry = self.registry.get(container.id) if self.registry else None
+        if entry:
+            return f"{entry['name']} (pool)"
+        return container.name
+
+    def is_idle_pool_member(self, container):
+        """True for warm-pool containers nobody has claimed yet (hidden from the dashboard)."""
+        if container.labels.get('vaultos.pool') != '1':
+            return False
+        return not (self.registry and self.registry.is_claimed(container.id))
+
+    def _fetch_containers(self):
+        # User rule: "using vaultos label or vaultos from container name filter"
+        # Both filters are evaluated by the daemon so unrelated containers on
+        # shared hosts are never transferred. Results are merged by ID.
+        # sparse=True skips docker-py's per-container inspect round trip.
+        return merge_listings(self.client.api.containers(all=True, filters={'label': 'app=vaultOS'}),
+                              self.client.api.containers(all=True, filters={'name': 'vaultos-'}),
+                              self.client.containers.prepare_model)
+
+    def list_containers(self, force=False, strict=False):
+        """
+        Returns a list of vaultOS containers, served from the snapshot while it is fresh.
+        strict: raise if the daemon cannot be listed, instead of returning [].
+        """
+        with self._cache_lock:
+            if not force and self._snapshot is not None and time.monotonic() - self._snapshot_time < self.cache_ttl:
+                return list(self._snapshot.values())
         try:
-            # Filter strictly for containers managed by this app
-            all_containers = self.client.containers.list(all=True)
-            vault_containers = []
-            for container in all_containers:
-                # User rule: "using vaultos label or vaultos from container name filter"
-                is_vault = False
-                
-                # Check Label
-                if container.labels.get('app') == 'vaultOS':
-                    is_vault = True
-                
-                # Check Name Prefix
-                elif container.name.startswith("vaultos-"):
-                    is_vault = True
-                    
-                if is_vault:
-                    vault_containers.append(container)
-            return vault_containers
+            containers = self._fetch_containers()
         except Exception as e:
+            self._listing_failed = True
+            if strict:
+                raise
             print(f"Error listing containers: {e}")
             return []
+        with self._cache_lock:
+            self._listing_failed = False
+            self._snapshot = containers
+            self._snapshot_time = time.monotonic()
+        return list(containers.values())
+
+    def _lookup(self, container_id):
+        # Reuse the snapshot entry: lifecycle calls only need the ID and API client
+        with self._cache_lock:
+            if self._snapshot is not None and container_id in self._snapshot:
+                return self._snapshot[container_id]
+        return self.client.containers.get(container_id)
+
+    def plan_container(self, config: dict) -> dict:
+        """
+        Turns a wizard config into everything needed to run the container:
+        name, port, mode, os/desktop keys, base image, labels, environment, volumes.
+        Shared by every backend so they create identical desktops.
+        """
+        user_name = config.get('name')
+        
+        # Generate 5-digit hex
+        import uuid
+        hex_id = uuid.uuid4().hex[:5]
+        
+        # New Name: vaultos-<5digithex>-<name>
+        name = f"vaultos-{hex_id}-{user_name}"
+        
+        port = int(config.get('port'))
+        mode = config.get('type', 'default')
+        
+        # 1. Determine Image Tag
+        os_name = config.get('os', 'alpine') if mode != 'default' else 'alpine'
+        desktop = config.get('desktop', 'xfce') if mode != 'default' else 'xfce'
+        base_image = self.resolve_image(os_name, desktop)
+
+        # 2. Custom Build (Persistent Advanced) needs a username
+        custom_user = None
+        if mode == 'persistent' and config.get('advanced'):
+            custom_user = config.get('username') or None
+        user_mode = config.get('user_mode') or CUSTOM_USER_MODE
+
+        # 3. Prepare Run Args
+        environment = {
+            'PUID': '1000',
+            'PGID': '1000', 
+            'TZ': 'Etc/UTC'
+        }
+        if custom_user and user_mode == 'runtime':
+            environment['VAULTOS_USER'] = custom_user # Applied by the vaultos-userinit hook
+        
+        # Stamp what the dashboard needs so rows render without image lookups
+        labels = {
+            'app': 'vaultOS',
+            'vaultos.os': os_name,
+            'vaultos.desktop': desktop,
+            'vaultos.port': str(port),
+            'vaultos.mode': mode,
+        }
+        if mode == 'ephemeral':
+            if config.get('timer'):
+                expiry = self._parse_timer(config.get('timer'))
+                labels['vaultos.expires'] = str(expiry)
+        if config.get('pool'):
+            labels['vaultos.pool'] = '1' # Warm-pool member; claims live in the Registry
+
+        volumes = {}
+        if mode == 'persistent':
+            vconf = config.get('volume')
+            if vconf:
+                volumes[vconf] = {'bind': '/config', 'mode': 'rw'}
+            
+            # Advanced home mapping
+            if config.get('advanced') and config.get('homedir'):
+                 username = config.get('username', 'abc') 
+                 volumes[config.get('homedir')] = {'bind': f'/home/{username}', 'mode': 'rw'}
+
+        return {
+            'name': name,
+            'port': port,
+            'mode': mode,
+            'os': os_name,
+            'desktop': desktop,
+            'base_image': base_image,
+            'custom_user': custom_user,
+            'user_mode': user_mode,
+            'labels': labels,
+            'environment': environment,
+            'volumes': volumes,
+            'restart_policy': {"Name": "unless-stopped"} if mode != 'ephemeral' else None,
+        }
+
+    def prepare_image(self, plan: dict, progress_callback=None) -> str:
+        """Builds and/or pulls the image a plan needs. Returns the image to run."""
+        # Handle Custom Build (Persistent Advanced)
+        final_image = plan['base_image']
+
+        # Pull image if needed. The base must be local before a custom build,
+        # since its digest is part of the custom image's cache key.
+        if not self.image_exists(final_image):
+            if progress_callback:
+                progress_callback(f"Image {final_image} not found. Starting download...")
+            else:
+                print(f"Pulling {final_image}...")
+            self._pull_with_progress(final_image, progress_callback)
+
+        if plan['custom_user']:
+            if plan['user_mode'] == 'runtime':
+                # One shared image per base; the user is created at container start
+                final_image = self.build_userinit_image(plan['base_image'])
+            else:
+                # Build (or reuse) custom image with new user
+                final_image = self.build_custom_image(plan['base_image'], plan['custom_user'])
+        return final_image
+
+    def _run_plan(self, plan: dict, image: str) -> str:
+        container = self.client.containers.run(
+            image,
+            name=plan['name'],
+            ports={'3000/tcp': plan['port']}, # Only map 3000, ignore 3001 (ssl) for now
+            labels=plan['labels'],
+            environment=plan['environment'],
+            detach=True,
+            shm_size=SHM_SIZE,
+            mem_limit=MEM_LIMIT,
+            nano_cpus=NANO_CPUS,
+            restart_policy=plan['restart_policy'],
+            volumes=plan['volumes']
+        )
+        return container.id
 
     def create_container(self, config: dict, progress_callback=None) -> str:
         """
         Creates a container based on the config dictionary.
         progress_callback: function(str) -> None, called with status updates during pull.
         """
+        started = time.monotonic()
         try:
-            user_name = config.get('name')
-            
-            # Generate 5-digit hex
-            import uuid
-            hex_id = uuid.uuid4().hex[:5]
-            
-            # New Name: vaultos-<5digithex>-<name>
-            name = f"vaultos-{hex_id}-{user_name}"
-            
-            port = int(config.get('port'))
-            mode = config.get('type', 'default')
-            
-            # 1. Determine Image Tag
-            image_tag = "latest"
-            if mode == 'default':
-                image_tag = "latest"
-            else:
-                os_name = config.get('os', 'alpine')
-                desktop = config.get('desktop', 'xfce')
-                
-                # Architecture Detection
-                arch = self._get_architecture()
-                
-                # Construct tag: e.g. amd64-alpine-i3, arm64v8-arch-kde
-                if os_name == 'alpine' and desktop == 'xfce':
-                     image_tag = "latest"
-                else:
-                     image_tag = f"{arch}-{os_name}-{desktop}"
-            
-            base_image = f"lscr.io/linuxserver/webtop:{image_tag}"
+            if self.pool and config.get('type') == 'ephemeral':
+                # An already-running pool member is claimed in the registry instead
+                cid = self.pool.claim(config)
+                if cid:
+                    self._record_create(config, cid, started)
+                    return cid
 
-            # 2. Handle Custom Build (Persistent Advanced)
-            final_image = base_image
-            if mode == 'persistent' and config.get('advanced'):
-                username = config.get('username')
-                if username:
-                    # Build custom image with new user
-                    final_image = self.build_custom_image(base_image, username)
+            plan = self.plan_container(config)
+            final_image = self.prepare_image(plan, progress_callback)
+            cid = self._run_plan(plan, final_image)
+            self.invalidate()
+            self._record_create(config, cid, started)
+            return cid
 
-            # 3. Pull image if needed
-            try:
-                self.client.images.get(final_image)
-            except NotFound:
-                if progress_callback:
-                    progress_callback(f"Image {final_image} not found. Starting download...")
-                    self._pull_with_progress(final_image, progress_callback)
-                else:
-                    print(f"Pulling {final_image}...")
-                    self.client.images.pull(final_image)
-
-            # 4. Prepare Run Args
-            environment = {
-                'PUID': '1000',
-                'PGID': '1000', 
-                'TZ': 'Etc/UTC'
-            }
-            
-            labels = {'app': 'vaultOS'}
-            if mode == 'ephemeral':
-                if config.get('timer'):
-                    import time
-                    expiry = self._parse_timer(config.get('timer'))
-                    labels['vaultos.expires'] = str(expiry)
-
-            volumes = {}
-            if mode == 'persistent':
-                vconf = config.get('volume')
-                if vconf:
-                    volumes[vconf] = {'bind': '/config', 'mode': 'rw'}
-                
-                # Advanced home mapping
-                if config.get('advanced') and config.get('homedir'):
-                     username = config.get('username', 'abc') 
-                     volumes[config.get('homedir')] = {'bind': f'/home/{username}', 'mode': 'rw'}
+        except Exception as e:
+            self._record_create(config, None, started, str(e))
+            raise RuntimeError(f"Failed to create container: {e}")
 
-            
-            container = self.client.containers.run(
-                final_image,
-                name=name,
-                ports={'3000/tcp': port}, # Only map 3000, ignore 3001 (ssl) for now
-                labels=labels,
-                environment=environment,
-                detach=True,
-                shm_size="1gb",
-                mem_limit="1g",       # Limit RAM to 1GB
-                nano_cpus=2000000000, # Limit CPU to 2 Cores
-                restart_policy={"Name": "unless-stopped"} if mode != 'ephemeral' else None,
-                volumes=volumes
-            )
-            return container.id
+    def _record_create(self, config, cid, started, error=None):
+        if self.store:
+            self.store.record_create(config, cid, time.monotonic() - started, error)
+
+    def _record_pull(self, image_name, started, progress, error=None):
+        if self.store:
+            self.store.record_pull(image_name, time.monotonic() - started, progress.snapshot().current, error)
+
+    def bound_host_ports(self) -> set:
+        """
+        Host ports already taken: published by any running container, or
+        reserved (vaultos.port) by a stopped vaultOS desktop that will rebind on start.
+        """
+        ports = set()
+        for summary in self.client.api.containers(): # Running containers only
+            for p in summary.get('Ports') or []:
+                if p.get('PublicPort'):
+                    ports.add(int(p['PublicPort']))
+        for c in self.list_containers():
+            if c.labels.get('vaultos.port'):
+                ports.add(int(c.labels['vaultos.port']))
+        return ports
+
+    def create_batch(self, config: dict, count: int, port_range=None, workers=BATCH_WORKERS, progress_callback=None) -> dict:
+        """
+        Creates `count` identical desktops from one wizard config on a bounded thread pool.
+        Host ports are allocated from port_range (inclusive), skipping ports already bound.
+        Returns {'results': [{'name', 'port', 'seconds', 'id' or 'error'}], 'elapsed': seconds}.
+        A failed desktop does not stop the others.
+        """
+        from concurrent.futures import ThreadPoolExecutor
 
+        started = time.monotonic()
+        ports = allocate_ports(self.bound_host_ports(), count, port_range or BATCH_PORT_RANGE)
+        configs = batch_configs(config, ports)
+        try:
+            # Build/pull once up front instead of every worker fetching the same image
+            final_image = self.prepare_image(self.plan_container(configs[0]), progress_callback)
         except Exception as e:
-            raise RuntimeError(f"Failed to create container: {e}")
+            raise RuntimeError(f"Failed to prepare image: {e}")
+
+        done = []
+        lock = threading.Lock()
+
+        def create_one(item_config):
+            item_started = time.monotonic()
+            plan = self.plan_container(item_config)
+            result = {'name': plan['name'], 'port': plan['port']}
+            try:
+                result['id'] = self._run_plan(plan, final_image)
+            except Exception as e:
+                result['error'] = str(e)
+            result['seconds'] = time.monotonic() - item_started
+            self._record_create(item_config, result.get('id'), item_started, result.get('error'))
+            if progress_callback:
+                with lock:
+                    done.append(result)
+                    progress_callback(format_batch_progress(result, len(done), count))
+            return result
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(create_one, configs))
+        self.invalidate()
+        return {'results': results, 'elapsed': time.monotonic() - started}
+
+    def resolve_image(self, os_name, desktop):
+        """Returns the webtop image reference for an OS/desktop pair."""
+        # Construct tag: e.g. amd64-alpine-i3, arm64v8-arch-kde
+        if os_name == 'alpine' and desktop == 'xfce':
+            image_tag = "latest"
+        else:
+            # Architecture Detection
+            arch = self._get_architecture()
+            image_tag = f"{arch}-{os_name}-{desktop}"
+        return f"lscr.io/linuxserver/webtop:{image_tag}"
+
+    def container_details(self, container):
+        """
+        Returns (os_name, desktop, host_port) for the dashboard.
+        Uses the vaultos.* labels; containers created before those labels existed
+        fall back to the image reference, and only then to a memoized image lookup.
+        """
+        labels = container.labels
+        os_name = labels.get('vaultos.os')
+        desktop = labels.get('vaultos.desktop')
+        if not (os_name and desktop):
+            os_name, desktop = parse_image_tag(self._image_tag(container))
+
+        host_port = "N/A"
+        ports = container.attrs.get('NetworkSettings', {}).get('Ports')
+        if ports and '3000/tcp' in ports and ports['3000/tcp']:
+            host_port = ports['3000/tcp'][0]['HostPort']
+        elif labels.get('vaultos.port'):
+            host_port = labels['vaultos.port'] # Stopped containers report no bindings
+
+        return os_name, desktop, host_port
+
+    def _image_tag(self, container):
+        # The image reference the container was started from is in the listing itself
+        image_ref = container.attrs.get('Config', {}).get('Image') or ''
+        if image_ref and not image_ref.startswith('sha256:'):
+            return image_ref
+
+        image_id = container.attrs.get('ImageID') or container.attrs.get('Image') or image_ref
+        if image_id not in self._image_tags:
+            try:
+                tags = self._image_repo_tags(image_id)
+                self._image_tags[image_id] = tags[0] if tags else "unknown"
+            except Exception:
+                self._image_tags[image_id] = "unknown"
+        return self._image_tags[image_id]
+
+    def _image_repo_tags(self, image_id):
+        return self.client.images.get(image_id).tags
 
     def _get_architecture(self):
         import platform
@@ -149,62 +628,39 @@ class DockerManager:
 
     def build_custom_image(self, base_image, username) -> str:
         """
-        Builds a custom layer on top of base_image to add a user.
-        Returns the new image tag.
+        Builds a custom layer on top of base_image to add a user, unless an
+        image for the same base digest and username already exists.
+        Returns the image tag.
+        """
+        # Keyed by the base image's content digest: a re-pulled base rebuilds, nothing else does
+        tag_name = custom_image_tag(self.client.images.get(base_image).id, username)
+        return self._build_cached(tag_name, {'Dockerfile': custom_user_dockerfile(base_image, username)})
+
+    def build_userinit_image(self, base_image) -> str:
+        """
+        Builds the shared vaultos-userinit image for base_image (once per base
+        digest). Containers pick their user via VAULTOS_USER. Returns the image tag.
         """
+        tag_name = userinit_image_tag(self.client.images.get(base_image).id)
+        return self._build_cached(tag_name, {
+            'Dockerfile': userinit_dockerfile(base_image),
+            'vaultos-userinit.sh': USERINIT_SCRIPT,
+        })
+
+    def _build_cached(self, tag_name, files) -> str:
+        """Builds files ({path: text}, including a Dockerfile) as tag_name unless that tag exists."""
         import io
-        
-        # Check if Alpine (latest or explicit alpine tag)
-        is_alpine = "dis-alpine" in base_image # Tag logic we used is os-desktop, so 'alpine' in string?
-        # base_image is "lscr.io/linuxserver/webtop:tag"
-        # our tag logic: "alpine-xfce", "arch-kde", etc. "latest" is alpine.
-        if ":latest" in base_image or "alpine" in base_image:
-             # Alpine Logic:
-             # - Install sudo, shadow (for chpasswd), bash
-             # - adduser -D
-             dockerfile = f"""
-             FROM {base_image}
-             ENV USER={username}
-             ENV HOME=/home/{username}
-             RUN apk add --no-cache sudo shadow bash && \\
-                 usermod -l {username} abc && \\
-                 (groupmod -n {username} abc || true) && \\
-                 if [ -d "/home/abc" ]; then mv /home/abc /home/{username}; else mkdir -p /home/{username}; fi && \\
-                 usermod -d /home/{username} {username} && \\
-                 ln -s /home/{username} /home/abc && \\
-                 chown -R {username}:{username} /home/{username} && \\
-                 chown -R {username}:{username} /config || true && \\
-                 (find /etc/cont-init.d /etc/services.d /etc/s6-overlay -type f -exec sed -i 's/abc/{username}/g' {{}} + || true) && \\
-                 echo '{username}:{username}' | chpasswd && \\
-                 echo '{username} ALL=(ALL) NOPASSWD: ALL' > /etc/sudoers.d/{username} && \\
-                 chmod 0440 /etc/sudoers.d/{username}
-             """
-        else:
-             # Standard Linux (Debian/Ubuntu/Fedora/Arch/EL)
-             dockerfile = f"""
-             FROM {base_image}
-             ENV USER={username}
-             ENV HOME=/home/{username}
-             RUN usermod -l {username} abc && \\
-                 (groupmod -n {username} abc || true) && \\
-                 if [ -d "/home/abc" ]; then mv /home/abc /home/{username}; else mkdir -p /home/{username}; fi && \\
-                 usermod -d /home/{username} {username} && \\
-                 ln -s /home/{username} /home/abc && \\
-                 chown -R {username}:{username} /home/{username} && \\
-                 chown -R {username}:{username} /config || true && \\
-                 (find /etc/cont-init.d /etc/services.d /etc/s6-overlay -type f -exec sed -i 's/abc/{username}/g' {{}} + || true) && \\
-                 echo '{username}:{username}' | chpasswd && \\
-                 echo '{username} ALL=(ALL) NOPASSWD: ALL' > /etc/sudoers.d/{username} && \\
-                 chmod 0440 /etc/sudoers.d/{username}
-             """
-        
-        tag_name = f"vaultos-custom-{username}"
-        f = io.BytesIO(dockerfile.encode('utf-8'))
-        
+
+        if self.image_exists(tag_name):
+            self._count_build(hit=True)
+            return tag_name
+        self._count_build(hit=False)
+
+        f = io.BytesIO(build_context(files))
         logs = []
         try:
              # self.client.images.build returns (image, logs)
-             image, logs = self.client.images.build(fileobj=f, tag=tag_name, rm=True)
+             image, logs = self.client.images.build(fileobj=f, custom_context=True, tag=tag_name, rm=True)
              return tag_name
         except Exception as e:
              # Print logs for debugging if build fails
@@ -236,94 +692,235 @@ class DockerManager:
         
         return now + seconds
 
-    def get_and_prune_containers(self):
-        """Checks for expired containers, removes them, and returns the list of active vaultOS containers."""
+    def get_and_prune_containers(self, strict=False):
+        """
+        Checks for expired containers, removes them, and returns the list of active vaultOS containers.
+        strict: raise if the daemon cannot be listed, instead of returning [].
+        """
         import time
         try:
-            # We fetch all containers once
-            # Optimize: Maybe filters={'label': ['app=vaultOS']}?
-            # But we also filter by name prefix for legacy/robustness.
-            # Let's stick to python filter for now, but fetching 'all' is expensive.
-            # Improvement: Use docker filters if possible.
-            # self.client.containers.list(all=True, filters={"label": "app=vaultOS"}) 
-            # + another call for names?
-            # For now, let's keep Python logic but do it in one pass.
-            
-            all_containers = self.list_containers()
+            # Single filtered listing, shared with get_system_info by the caller
+            all_containers = self.list_containers(strict=strict)
             active_containers = []
             now = time.time()
             
             for c in all_containers:
-                expiry = c.labels.get('vaultos.expires')
+                expiry = self.container_expiry(c)
                 if expiry:
-                    if now > float(expiry):
+                    if now > expiry:
+                        if self.reaper:
+                            # Removal happens on the reaper's pool, off the refresh path
+                            self.reaper.schedule(c.id, expiry)
+                            continue
                         print(f"Container {c.name} expired. Removing.")
                         try:
                             c.remove(force=True)
                         except: 
                             pass # Already gone?
+                        self.invalidate(c.id)
                         continue # Don't add to active list
                 
+                if self.is_idle_pool_member(c):
+                    continue
+
                 active_containers.append(c)
-                
+
+            if self.registry and self._can_prune_registry(all_containers):
+                self.registry.prune(c.id for c in all_containers)
             return active_containers
         except Exception as e:
+            if strict:
+                raise
             print(f"Error checking expired: {e}")
             return []
 
-    def start_container(self, container_id: str):
+    def _can_prune_registry(self, containers):
+        # An empty list may be a failed listing; never drop claims on it
+        return bool(containers)
+
+    def get_container(self, container_id: str):
+        """Returns a fresh copy of one container (written through to the snapshot), or None if gone."""
+        from docker.errors import NotFound
         try:
             container = self.client.containers.get(container_id)
+        except NotFound:
+            self.invalidate(container_id)
+            return None
+        with self._cache_lock:
+            if self._snapshot is not None:
+                self._snapshot[container_id] = container
+        return container
+
+    def stream_events(self):
+        """
+        Blocking generator over daemon container events for vaultOS containers.
+        Yields (action, container_id). Stop it from another thread with close_events().
+        """
+        filters = {'type': 'container', 'event': WATCHED_EVENTS}
+        self._events_stream = self.client.events(decode=True, filters=filters)
+        try:
+            for event in self._events_stream:
+                actor = event.get('Actor', {})
+                attrs = actor.get('Attributes', {})
+                # Labels are flattened into the actor attributes
+                if not is_vaultos(attrs.get('name'), attrs):
+                    continue
+                if event.get('Action') == 'destroy':
+                    self.invalidate(actor.get('ID'))
+                yield event.get('Action', event.get('status')), actor.get('ID', event.get('id'))
+        finally:
+            self._events_stream = None
+
+    def close_events(self):
+        """Unblocks a running stream_events() generator."""
+        stream = self._events_stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def stream_stats(self, container_id: str):
+        """Blocking generator over a container's raw stats documents, one per second."""
+        return self.client.api.stats(container_id, stream=True, decode=True)
+
+    def stream_logs(self, container_id: str, tail=LOG_TAIL):
+        """
+        Follows a container's output (stdout and stderr), starting with its last
+        `tail` lines. Yields raw chunks; close() it from another thread to stop.
+        """
+        return self.client.api.logs(container_id, stream=True, follow=True, tail=tail)
+
+    def start_container(self, container_id: str):
+        try:
+            container = self._lookup(container_id)
             container.start()
+            self.invalidate()
         except Exception as e:
             raise RuntimeError(f"Failed to start container: {e}")
 
-    def stop_container(self, container_id: str):
+    def stop_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        """timeout: seconds the daemon waits for a graceful shutdown before killing."""
         try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+            container = self._lookup(container_id)
+            container.stop(timeout=timeout)
+            self.invalidate()
         except Exception as e:
             raise RuntimeError(f"Failed to stop container: {e}")
 
+    def restart_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        try:
+            container = self._lookup(container_id)
+            container.restart(timeout=timeout)
+            self.invalidate()
+        except Exception as e:
+            raise RuntimeError(f"Failed to restart container: {e}")
+
+    def bulk_action(self, action, container_ids, names=None, workers=BULK_WORKERS, stop_timeout=STOP_TIMEOUT,
+                    progress_callback=None) -> dict:
+        """
+        Runs one of BULK_ACTIONS on many containers on a bounded thread pool.
+        names: optional {container id: display name} for progress and results.
+        Returns {'results': [{'id', 'name', 'seconds', 'error'?}], 'elapsed': seconds}.
+        A failure does not stop the others.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if action not in BULK_ACTIONS:
+            raise RuntimeError(f"Unknown bulk action: {action}")
+        method = getattr(self, f"{action}_container")
+        kwargs = {'timeout': stop_timeout} if action in ('stop', 'restart') else {}
+        names = names or {}
+        started = time.monotonic()
+        done = []
+        lock = threading.Lock()
+
+        def run_one(cid):
+            item_started = time.monotonic()
+            result = {'id': cid, 'name': names.get(cid, cid[:12])}
+            try:
+                method(cid, **kwargs)
+            except Exception as e:
+                result['error'] = str(e)
+            result['seconds'] = time.monotonic() - item_started
+            if progress_callback:
+                with lock:
+                    done.append(result)
+                    progress_callback(format_bulk_progress(action, result, len(done), len(container_ids)))
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(container_ids)))) as pool:
+            results = list(pool.map(run_one, container_ids))
+        self.invalidate()
+        return {'results': results, 'elapsed': time.monotonic() - started}
+
     def delete_container(self, container_id: str):
         try:
-            container = self.client.containers.get(container_id)
+            container = self._lookup(container_id)
             container.remove(force=True) # Force remove to handle running containers if needed, or just remove stopped
+            self.invalidate()
         except Exception as e:
             raise RuntimeError(f"Failed to delete container: {e}")
 
-    def _pull_with_progress(self, image_name, callback):
-        import json
+    def image_exists(self, image_name) -> bool:
+        from docker.errors import NotFound
         try:
-             # Parse repo/tag
-             if ":" in image_name:
-                 repo, tag = image_name.split(":")
-             else:
-                 repo, tag = image_name, "latest"
-                 
-             stream = self.client.api.pull(repo, tag=tag, stream=True, decode=True)
-             for chunk in stream:
-                 # Chunk is a dict like {'status': 'Downloading', 'progressDetail': {'current': 123, 'total': 456}, 'id': '...'}
-                 # We simply want to show the current Status + potentially 'id'
-                 status = chunk.get('status', '')
-                 cid = chunk.get('id', '')
-                 progress = chunk.get('progress', '')
-                 
-                 msg = f"{status}"
-                 if cid:
-                     msg += f" [{cid}]"
-                 if progress:
-                     msg += f" {progress}"
-                     
-                 callback(msg)
+            self.client.images.get(image_name)
+            return True
+        except NotFound:
+            return False
+
+    def pull_image(self, image_name, on_chunk=None):
+        """Pulls image_name, handing each raw progress chunk to on_chunk. Raises on stream errors."""
+        # Parse repo/tag
+        if ":" in image_name:
+            repo, tag = image_name.split(":")
+        else:
+            repo, tag = image_name, "latest"
+
+        stream = self.client.api.pull(repo, tag=tag, stream=True, decode=True)
+        for chunk in stream:
+            if 'error' in chunk:
+                raise RuntimeError(chunk['error'])
+            if on_chunk:
+                on_chunk(chunk)
+
+    def _pull_with_progress(self, image_name, callback=None):
+        """Pulls image_name, calling back with a coalesced PullSnapshot instead of every raw chunk."""
+        progress = PullProgress(image_name)
+        started = time.monotonic()
+
+        def on_chunk(chunk):
+            snapshot = progress.update(chunk)
+            if callback and snapshot:
+                callback(snapshot)
+
+        try:
+             self.pull_image(image_name, on_chunk)
+             self._record_pull(image_name, started, progress)
+             if callback:
+                 callback(progress.snapshot())
         except Exception as e:
-            callback(f"Download failed: {e}")
+            self._record_pull(image_name, started, progress, str(e))
+            if callback:
+                callback(f"Download failed: {e}")
             raise e
 
-    def get_system_info(self):
-        """Returns tuple: (engine_version, kv_stats_dict)"""
+    def get_system_info(self, containers=None):
+        """
+        Returns a dict with engine version and vaultOS container counts.
+        containers: optional list from get_and_prune_containers to avoid listing again.
+        connected reflects the listing, since the version is only fetched once.
+        """
         try:
-            ver = self.client.version()
+            if containers is None:
+                containers = self.list_containers(strict=True)
+            elif self._listing_failed:
+                # An empty list may be a failed listing, not an empty host
+                raise RuntimeError("Container listing failed")
+            if self._version is None:
+                self._version = self.client.version()
+            ver = self._version
             engine_ver = ver.get('Version', 'Unknown')
             # client pkg version is hard to get from SDK directly, usually just docker sdk version or API version
             api_ver = ver.get('ApiVersion', 'Unknown')
@@ -334,7 +931,6 @@ class DockerManager:
             # "Docker connected... status total" implies global or app-specific. 
             # Let's return counts for vaultOS containers specifically as that looks cleaner for this app.
             
-            containers = self.list_containers()
             total = len(containers)
             running = sum(1 for c in containers if c.status == 'running')
             stopped = sum(1 for c in containers if c.status != 'running')
@@ -357,6 +953,27 @@ class DockerManager:
                 'connected': False
             }
 
+def create_manager(backend=None, connect_timeout=None):
+    """
+    Returns the Docker backend selected by backend, $VAULTOS_BACKEND or config.DOCKER_BACKEND:
+    "sync" (docker-py, default) or "async" (native asyncio over the Unix socket).
+    With config.DOCKER_HOSTS set, a FleetManager over those hosts instead.
+    connect_timeout: passed to DockerManager; the async backend connects lazily.
+    """
+    import os
+    from config import DOCKER_BACKEND, DOCKER_HOSTS
+
+    if DOCKER_HOSTS:
+        from fleet import FleetManager
+        return FleetManager(connect_timeout=connect_timeout)
+    backend = backend or os.environ.get('VAULTOS_BACKEND') or DOCKER_BACKEND
+    if backend == 'async':
+        from async_docker_manager import AsyncDockerManager
+        return AsyncDockerManager()
+    if backend != 'sync':
+        raise RuntimeError(f"Unknown Docker backend: {backend}")
+    return DockerManager(connect_timeout=connect_timeout)
+
 if __name__ == "__main__":
     # fast verification
     try:
@@ -0,0 +1,105 @@
+"""
+Minimal blocking Engine API client over the Unix socket, without docker-py.
+`vaultos ls` lists through it: importing docker-py alone takes longer than the
+command's startup budget, and a listing is only two GET requests.
+"""
+import json
+import os
+import socket
+from urllib.parse import quote, urlencode
+from config import DOCKER_TIMEOUT
+from docker_manager import DockerManager, merge_listings
+
+def socket_path_from_env():
+    """Unix socket path from $DOCKER_HOST (default /var/run/docker.sock)."""
+    host = os.environ.get('DOCKER_HOST', 'unix:///var/run/docker.sock')
+    if not host.startswith('unix://'):
+        raise RuntimeError(f"Needs a unix:// DOCKER_HOST, got {host}")
+    return host[len('unix://'):]
+
+def _dechunk(body):
+    data = b''
+    while True:
+        size_line, _, body = body.partition(b'\r\n')
+        size = int(size_line.split(b';')[0].strip() or b'0', 16)
+        if size == 0:
+            return data
+        data += body[:size]
+        body = body[size + 2:]
+
+def get_json(socket_path, path, params=None, timeout=DOCKER_TIMEOUT):
+    """GET path from the Engine API and decode the JSON body. Raises RuntimeError on a non-2xx status."""
+    if params:
+        path += '?' + urlencode(params)
+    # HTTP/1.0: the daemon answers with a plain body and closes, so reading to EOF is the whole response
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(f"GET {path} HTTP/1.0\r\nHost: docker\r\nUser-Agent: vaultos\r\n\r\n".encode('latin-1'))
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+    head, _, body = b''.join(chunks).partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        headers[key.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = _dechunk(body)
+    data = json.loads(body) if body else None
+    if status >= 400:
+        message = data.get('message', data) if isinstance(data, dict) else data
+        raise RuntimeError(f"{status}: {message}")
+    return data
+
+class ListedContainer:
+    """The parts of docker-py's Container that the listing helpers read."""
+    def __init__(self, attrs):
+        self.attrs = attrs
+
+    @property
+    def id(self):
+        return self.attrs.get('Id')
+
+    @property
+    def name(self):
+        return (self.attrs.get('Name') or '').lstrip('/')
+
+    @property
+    def labels(self):
+        return self.attrs.get('Config', {}).get('Labels') or {}
+
+    @property
+    def status(self):
+        state = self.attrs.get('State')
+        return state.get('Status') if isinstance(state, dict) else state
+
+class SocketDockerManager(DockerManager):
+    """
+    Read-only DockerManager for listings. The snapshot cache and the details,
+    expiry and pool helpers are inherited; nothing else talks to the daemon.
+    """
+    def __init__(self, socket_path=None, cache_ttl=None, timeout=DOCKER_TIMEOUT):
+        path = socket_path or socket_path_from_env()
+        if not os.path.exists(path):
+            raise RuntimeError(f"Could not connect to Docker Daemon: {path} not found")
+        self.client = None # No docker-py client
+        self.socket_path = path
+        self.timeout = timeout
+        self._init_state(cache_ttl)
+
+    def _get(self, path, params=None):
+        return get_json(self.socket_path, path, params, self.timeout)
+
+    def _fetch_containers(self):
+        return merge_listings(self._get('/containers/json', {'all': 1, 'filters': json.dumps({'label': ['app=vaultOS']})}),
+                              self._get('/containers/json', {'all': 1, 'filters': json.dumps({'name': ['vaultos-']})}),
+                              ListedContainer)
+
+    def _image_repo_tags(self, image_id):
+        return self._get(f"/images/{quote(image_id, safe='')}/json").get('RepoTags')
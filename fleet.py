@@ -0,0 +1,312 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import DOCKER_HOSTS, FLEET_HOST_TIMEOUT, STOP_TIMEOUT
+from docker_manager import DockerManager
+
+class Host:
+    """One named Docker endpoint of the fleet and its last known state."""
+    def __init__(self, name, url, tls=None):
+        self.name = name
+        self.url = url
+        self.tls = tls
+        self.manager = None # DockerManager once connected
+        self.error = None # Why the last call failed or timed out, else None
+        self.containers = [] # Last successful listing, shown while the host is slow
+        self.listed = False
+        self.pending = None # Future of the call in flight, if any
+
+    @property
+    def running(self):
+        return sum(1 for c in self.containers if c.status == 'running')
+
+def parse_hosts(hosts):
+    """{name: url or {'url', 'tls'}} (config.DOCKER_HOSTS) -> [Host]."""
+    parsed = []
+    for name, entry in hosts.items():
+        if isinstance(entry, str):
+            entry = {'url': entry}
+        parsed.append(Host(name, entry['url'], entry.get('tls')))
+    return parsed
+
+class FleetManager(DockerManager):
+    """
+    The DockerManager interface over several Docker daemons. Listings fan out
+    to every host in parallel; a host that does not answer within `timeout`
+    keeps its last listing and is reported, instead of stalling the others.
+    Container operations go to the host the container lives on; creates go
+    to config['host'], or to the host running the fewest desktops.
+    Always docker-py based (ssh:// and TLS endpoints), whatever DOCKER_BACKEND says.
+    """
+    def __init__(self, hosts=None, cache_ttl=None, connect_timeout=None, metrics=None, timeout=FLEET_HOST_TIMEOUT):
+        self.client = None # Each host has its own client
+        self.hosts = {host.name: host for host in parse_hosts(DOCKER_HOSTS if hosts is None else hosts)}
+        if not self.hosts:
+            raise RuntimeError("No Docker hosts configured")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout or timeout
+        self._host_of = {} # container id -> host name
+        self._event_streams = []
+        # One call in flight per host, plus room for event streams
+        self._executor = ThreadPoolExecutor(max_workers=len(self.hosts) * 2, thread_name_prefix="vaultos-fleet")
+        self._init_state(cache_ttl)
+        self.metrics = metrics or self.metrics
+
+        self._fan_out(self._connect)
+        if not self._members():
+            errors = "; ".join(f"{h.name}: {h.error}" for h in self.hosts.values())
+            raise RuntimeError(f"Could not connect to any Docker host: {errors}")
+
+    # The registry, reaper and store are shared by every host's manager
+    @property
+    def registry(self):
+        return self._registry
+
+    @registry.setter
+    def registry(self, value):
+        self._registry = value
+        for manager in self._members():
+            manager.registry = value
+
+    @property
+    def reaper(self):
+        return self._reaper
+
+    @reaper.setter
+    def reaper(self, value):
+        self._reaper = value
+        for manager in self._members():
+            manager.reaper = value
+
+    @property
+    def store(self):
+        return self._store
+
+    @store.setter
+    def store(self, value):
+        self._store = value
+        for manager in self._members():
+            manager.store = value
+
+    def _connect(self, host):
+        if host.manager is None:
+            manager = DockerManager(cache_ttl=self.cache_ttl, connect_timeout=self.connect_timeout,
+                                    metrics=self.metrics, base_url=host.url, tls=host.tls)
+            manager.registry = self._registry
+            manager.reaper = self._reaper
+            manager.store = self._store
+            host.manager = manager
+        return host.manager
+
+    def _members(self):
+        return [host.manager for host in self.hosts.values() if host.manager is not None]
+
+    def _fan_out(self, fn):
+        """
+        Runs fn(host) for every host in parallel and waits at most self.timeout.
+        Returns {host name: result} for the hosts that answered in time. A host
+        still busy with an earlier call is skipped rather than queued again.
+        """
+        futures = {}
+        for host in self.hosts.values():
+            if host.pending is not None and not host.pending.done():
+                continue
+            host.pending = self._executor.submit(fn, host)
+            futures[host.pending] = host
+        done, _ = wait(futures, timeout=self.timeout)
+
+        results = {}
+        for future, host in futures.items():
+            if future not in done:
+                host.error = f"no answer within {self.timeout}s"
+                continue
+            try:
+                results[host.name] = future.result()
+                host.error = None
+            except Exception as e:
+                host.error = str(e)
+        for host in self.hosts.values():
+            if host.pending is not None and host.pending not in futures:
+                host.error = host.error or f"no answer within {self.timeout}s"
+        return results
+
+    def _member(self, container_id):
+        """Manager of the host running container_id (an ID, ID prefix or name)."""
+        name = self._host_of.get(container_id)
+        if name is None:
+            for c in self.list_containers():
+                if c.id.startswith(container_id) or c.name == container_id:
+                    name = self._host_of[c.id]
+                    break
+            else:
+                raise RuntimeError(f"No such container on any host: {container_id}")
+        manager = self.hosts[name].manager
+        if manager is None:
+            raise RuntimeError(f"Host {name} is not connected")
+        return manager
+
+    def host_name(self, container):
+        """Name of the host a listed container runs on."""
+        return self._host_of.get(container.id, "?")
+
+    def host_status(self):
+        """{host name: error or None} from the last fan-out."""
+        return {host.name: host.error for host in self.hosts.values()}
+
+    def least_loaded_host(self):
+        """The reachable host with the fewest running desktops (config order breaks ties)."""
+        candidates = [h for h in self.hosts.values() if h.manager is not None and not h.error]
+        if not candidates:
+            raise RuntimeError("No Docker host is reachable")
+        return min(candidates, key=lambda h: h.running).name
+
+    def invalidate(self, container_id=None):
+        if container_id is None:
+            for manager in self._members():
+                manager.invalidate()
+        elif container_id in self._host_of:
+            self.hosts[self._host_of[container_id]].manager.invalidate(container_id)
+
+    def list_containers(self, force=False, strict=False):
+        """Merged listing of every host; slow or failed hosts contribute their last listing."""
+        results = self._fan_out(lambda host: self._connect(host).list_containers(force, strict=True))
+        for name, containers in results.items():
+            host = self.hosts[name]
+            host.containers = containers
+            host.listed = True
+        merged = []
+        for host in self.hosts.values():
+            for c in host.containers:
+                self._host_of[c.id] = host.name
+            merged.extend(host.containers)
+        if strict and not results:
+            raise RuntimeError("No Docker host answered")
+        return merged
+
+    def _can_prune_registry(self, containers):
+        # Claims on a host we could not list are still valid
+        return bool(containers) and all(h.listed and not h.error for h in self.hosts.values())
+
+    def get_container(self, container_id: str):
+        return self._member(container_id).get_container(container_id)
+
+    def start_container(self, container_id: str):
+        self._member(container_id).start_container(container_id)
+
+    def stop_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        self._member(container_id).stop_container(container_id, timeout)
+
+    def restart_container(self, container_id: str, timeout=STOP_TIMEOUT):
+        self._member(container_id).restart_container(container_id, timeout)
+
+    def delete_container(self, container_id: str):
+        self._member(container_id).delete_container(container_id)
+
+    def stream_stats(self, container_id: str):
+        return self._member(container_id).stream_stats(container_id)
+
+    def stream_logs(self, container_id: str, **kwargs):
+        return self._member(container_id).stream_logs(container_id, **kwargs)
+
+    def _target(self, config):
+        name = config.get('host') or self.least_loaded_host()
+        host = self.hosts.get(name)
+        if host is None or host.manager is None:
+            raise RuntimeError(f"Docker host {name} is not connected")
+        return host
+
+    def create_container(self, config: dict, progress_callback=None) -> str:
+        if self.pool and config.get('type') == 'ephemeral':
+            started = time.monotonic()
+            cid = self.pool.claim(config)
+            if cid:
+                self._record_create(config, cid, started)
+                return cid
+        host = self._target(config)
+        cid = host.manager.create_container(config, progress_callback)
+        self._host_of[cid] = host.name
+        return cid
+
+    def bound_host_ports(self) -> set:
+        """Ports taken on any connected host, so a port picked here is free wherever the create lands."""
+        ports = set()
+        for taken in self._fan_out(lambda host: self._connect(host).bound_host_ports()).values():
+            ports |= taken
+        return ports
+
+    def create_batch(self, config: dict, count: int, port_range=None, **kwargs) -> dict:
+        host = self._target(config)
+        batch = host.manager.create_batch(config, count, port_range, **kwargs)
+        for result in batch['results']:
+            result['host'] = host.name
+            if 'id' in result:
+                self._host_of[result['id']] = host.name
+        return batch
+
+    def image_exists(self, image_name) -> bool:
+        """True once every connected host has the image."""
+        return all(manager.image_exists(image_name) for manager in self._members())
+
+    def pull_image(self, image_name, on_chunk=None):
+        """Pulls the image on each connected host that lacks it."""
+        for manager in self._members():
+            if not manager.image_exists(image_name):
+                manager.pull_image(image_name, on_chunk)
+
+    def build_cache_stats(self) -> dict:
+        stats = {'hits': 0, 'misses': 0}
+        for manager in self._members():
+            for key, value in manager.build_cache_stats().items():
+                stats[key] += value
+        return stats
+
+    def stream_events(self):
+        """Merged events of every connected host. Yields (action, container_id)."""
+        events = queue.Queue()
+        members = [(host.name, host.manager) for host in self.hosts.values() if host.manager is not None]
+        self._event_streams = [manager for _, manager in members]
+
+        def follow(name, manager):
+            try:
+                for action, cid in manager.stream_events():
+                    events.put((name, action, cid))
+            except Exception:
+                pass # That host's stream dropped; the others keep going
+            finally:
+                events.put(None)
+
+        for name, manager in members:
+            threading.Thread(target=follow, args=(name, manager), daemon=True,
+                             name=f"vaultos-events-{name}").start()
+        remaining = len(members)
+        while remaining:
+            item = events.get()
+            if item is None:
+                remaining -= 1
+                continue
+            name, action, cid = item
+            self._host_of[cid] = name
+            yield action, cid
+
+    def close_events(self):
+        for manager in self._event_streams:
+            manager.close_events()
+
+    def get_system_info(self, containers=None):
+        """Fleet-wide counts; versions and reachability per host."""
+        if containers is None:
+            containers = self.list_containers()
+        infos = self._fan_out(lambda host: self._connect(host).get_system_info(host.containers))
+        versions = sorted({i['engine_version'] for i in infos.values() if i['connected']})
+        apis = sorted({i['api_version'] for i in infos.values() if i['connected']})
+        running = sum(1 for c in containers if c.status == 'running')
+        return {
+            'engine_version': ", ".join(versions) or 'N/A',
+            'api_version': ", ".join(apis) or 'N/A',
+            'total': len(containers),
+            'running': running,
+            'stopped': len(containers) - running,
+            'connected': any(i['connected'] for i in infos.values()),
+            'hosts': self.host_status(),
+        }
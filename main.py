@@ -1,10 +1,53 @@
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
-from textual.widgets import Header, Footer, DataTable, Button, Static
-from textual import on, work
-from docker_manager import DockerManager
-from ui.modals import DownloadProgressModal, CreateContainerModal, AboutModal
+from textual.widgets import Header, Footer, Button, Static, Input
+from textual import events, on, work
+from textual.binding import Binding
+from textual.screen import ModalScreen
+from textual.worker import get_current_worker
+from pool import WarmPool
+from registry import Registry
+from reaper import ExpiryReaper
+from ui.table_diff import diff_rows
+from ui.container_table import Column, ContainerTable
+from ui.refresh_scheduler import RefreshScheduler
+from store import Store
+from stats import StatsPool, format_cpu, format_memory
+from config import (PREFETCH_ENABLED, WARM_POOL, DOCKER_HOSTS,
+                    DOCKER_CONNECT_TIMEOUT, CONNECT_RETRY_MIN, CONNECT_RETRY_MAX,
+                    METRICS_PORT, METRICS_FILE, METRICS_DUMP_INTERVAL)
 import asyncio
+import sqlite3
+import threading
+import time
+
+EXPIRES_COLUMN = 6 # Index of the Expires cell in a rendered row
+CPU_COLUMN = 7
+MEMORY_COLUMN = 8
+HOST_COLUMN = 9 # Fleet mode only (config.DOCKER_HOSTS)
+
+def format_expiry(expiry_ts, now):
+    """Formats a vaultos.expires timestamp as a DD:HH:MM:SS countdown."""
+    if not expiry_ts:
+        return "No Expire"
+    remaining = float(expiry_ts) - now
+    if remaining <= 0:
+        return "Expired"
+    m, s = divmod(int(remaining), 60)
+    h, m = divmod(m, 60)
+    d, h = divmod(h, 24)
+    return f"{d:02d}:{h:02d}:{m:02d}:{s:02d}"
+
+def expiry_sort_key(value):
+    """Expired first, then soonest countdown first, then no expiry."""
+    if value == "Expired":
+        return (0, "")
+    if value == "No Expire":
+        return (2, "")
+    return (1, tuple(map(int, value.split(':')))) # DD grows past two digits after 99 days
+
+def port_sort_key(value):
+    return int(value) if str(value).isdigit() else -1
 
 class VaultOSApp(App):
     """A TUI to manage vaultOS containers."""
@@ -14,14 +57,33 @@ class VaultOSApp(App):
     Screen {
         layout: vertical;
     }
-    DataTable {
+    ContainerTable {
         height: 1fr;
         border: solid cyan;
     }
+    ContainerTable.stale {
+        text-opacity: 60%;
+    }
+    #search {
+        display: none;
+    }
+    #search.visible {
+        display: block;
+    }
     #bottom_container {
         height: auto;
         /* dock: bottom; Removed to let it stack naturally above footer */
     }
+    #metrics_panel {
+        height: auto;
+        max-height: 12;
+        border: solid $accent;
+        padding: 0 1;
+        display: none;
+    }
+    #metrics_panel.visible {
+        display: block;
+    }
     #statusbar {
         height: 1;
         background: $surface;
@@ -51,186 +113,674 @@ class VaultOSApp(App):
         ("q", "quit", "Quit"),
         ("r", "refresh_list", "Refresh"),
         ("c", "create_container", "Create Container"),
+        ("l", "show_logs", "Logs"),
+        ("space", "toggle_mark", "Mark"),
+        ("f", "mark_filter", "Mark by filter"),
+        ("/", "search", "Search"),
+        ("s", "sort", "Sort"),
+        ("S", "reverse_sort", "Reverse"),
+        Binding("escape", "clear_search", "Clear search", show=False),
+        ("m", "toggle_metrics", "Metrics"),
         ("?", "show_about", "About"),
     ]
 
     def action_show_about(self):
+        from ui.modals import AboutModal
         self.push_screen(AboutModal())
 
     def on_mount(self):
         self.manager = None
-        try:
-            self.manager = DockerManager()
-        except RuntimeError as e:
-            self.notify(str(e), severity="error", timeout=10)
-        
-        table = self.query_one(DataTable)
+        self.thread_manager = None
+        self.fleet = bool(DOCKER_HOSTS) # Several daemons: the table gains a Host column
+        self.containers = {} # In-memory model: container id -> container
+        self.running = set() # Ids of running containers in the model, for the status bar counts
+        self.rendered_rows = {} # What the table currently shows: container id -> cells
+        self.expiring = {} # container id -> expiry timestamp, for the local countdown
+        self.prune_requested = set()
+        self.marked = set() # Container ids selected for bulk start/stop/restart/delete
+        self.events_closed = threading.Event() # Set on unmount; ends the events thread
+        self.system_info = None
+        self.ui_thread = threading.get_ident()
+        self.loop = asyncio.get_running_loop()
+        self.connection_status = "🟡 Connecting to Docker..."
+        self.snapshot_time = None # Set while the table shows the rows persisted in the store
+        self.store = self.open_store()
+        self.reaper = None
+        self.prefetcher = None
+        self.metrics_server = None
+        self.stats = None
+        self.cpu_cap = 1.0 # Cores per container, known once docker_manager is loaded
         
         # Dynamic Column Sizing based on Terminal Width
         screen_width = self.app.console.size.width
-        # Reserve space for borders, scrollbars, and EXTENSIVE column padding.
-        # We have 13 columns (7 data + 6 separators). Textual adds padding to EACH column.
-        # 13 cols * 2 padding = ~26 chars. Plus scrollbar + borders + separator widths (6).
-        # Total deduction needs to be high: ~40-50 chars.
-        usable_width = max(50, screen_width - 50)
+        # Reserve space for borders, the scrollbar, and each column's padding and separator (3 chars)
+        column_count = 10 if self.fleet else 9
+        usable_width = max(60, screen_width - 3 * column_count - 6)
         
-        # Percentages: ID 15%, Name 30%, Status 10%, OS 10%, Desktop 15%, Port 10%, Expires 10%
+        # Percentages: ID 12%, Name 23%, Status 9%, OS 9%, Desktop 11%, Port 8%, Expires 12%, CPU 6%, Memory 10%
         # Calculate widths for data columns
-        w_id = int(usable_width * 0.15)
-        w_name = int(usable_width * 0.30)
-        w_status = int(usable_width * 0.10)
-        w_os = int(usable_width * 0.10)
-        w_desktop = int(usable_width * 0.15)
-        w_port = int(usable_width * 0.10)
-        w_expires = int(usable_width * 0.10)
-
-        sep = "│"
-        
-        table.add_column("ID", width=w_id)
-        table.add_column(sep, width=1)
-        table.add_column("Name", width=w_name)
-        table.add_column(sep, width=1)
-        table.add_column("Status", width=w_status)
-        table.add_column(sep, width=1)
-        table.add_column("OS", width=w_os)
-        table.add_column(sep, width=1)
-        table.add_column("Desktop", width=w_desktop)
-        table.add_column(sep, width=1)
-        table.add_column("Port", width=w_port)
-        table.add_column(sep, width=1)
-        table.add_column("Expires", width=w_expires)
-        table.cursor_type = "row"
-        table.zebra_stripes = True
-        
-        self.action_refresh_list()
+        w_id = int(usable_width * 0.12)
+        w_name = int(usable_width * 0.23)
+        w_status = int(usable_width * 0.09)
+        w_os = int(usable_width * 0.09)
+        w_desktop = int(usable_width * 0.11)
+        w_port = int(usable_width * 0.08)
+        w_expires = int(usable_width * 0.12)
+        w_cpu = int(usable_width * 0.06)
+        w_memory = int(usable_width * 0.10)
+        w_host = int(usable_width * 0.08) if self.fleet else 0
+        w_name -= w_host # The Host column shares the Name column's space
+
+        # Search covers name, status, OS, desktop, port and expiry (plus ID and host);
+        # live stats change every second and only exist for rows on screen, so they are not sortable
+        columns = [
+            Column("id", "ID", w_id, indexed=True, sort_key=lambda v: v.lstrip("● ")),
+            Column("name", "Name", w_name, indexed=True),
+            Column("status", "Status", w_status, indexed=True),
+            Column("os", "OS", w_os, indexed=True),
+            Column("desktop", "Desktop", w_desktop, indexed=True),
+            Column("port", "Port", w_port, indexed=True, sort_key=port_sort_key),
+            Column("expires", "Expires", w_expires, indexed=True, sort_key=expiry_sort_key),
+            Column("cpu", "CPU", w_cpu, sort_key=None),
+            Column("memory", "Memory", w_memory, sort_key=None),
+        ]
+        if self.fleet:
+            columns.append(Column("host", "Host", w_host, indexed=True))
+        table = self.query_one(ContainerTable)
+        table.set_columns(columns)
+        table.focus()
+
+        # Paint the last known state right away; Docker connects in the background
+        self.paint_snapshot()
+        self.connect_docker()
+        # Safety net for missed events; the scheduler decides when one is due
+        self.scheduler = RefreshScheduler()
+        self.set_interval(0.5, self.tick_refresh)
         self.set_interval(1, self.check_expiration) # Update every 1s for countdown
+        self.set_interval(1, self.update_metrics_panel)
+        self.set_interval(1, self.update_stats)
+
+    def open_store(self):
+        try:
+            return Store()
+        except (sqlite3.Error, OSError) as e:
+            # The dashboard works without it; it just starts empty and keeps no history
+            self.notify(f"Metadata store unavailable: {e}", severity="warning")
+            return None
+
+    def save_rows(self):
+        if self.store:
+            self.store.save_rows(self.rendered_rows, self.expiring, self.containers)
+
+    def paint_snapshot(self):
+        """Fills the table from the rows last saved to the store, marked stale until the first reconcile."""
+        snapshot = self.store.load_rows() if self.store else None
+        if not snapshot:
+            self.update_status_bar()
+            return
+        rows, expiring, saved_at = snapshot
+        table = self.query_one(ContainerTable)
+        for cid, cells in rows.items():
+            if len(cells) > 1 and cells[1] == "│":
+                cells = cells[::2] # Saved before the table drew its own separators
+            # Marks and live stats are not restored; rows saved without a fleet have no Host cell
+            host = cells[HOST_COLUMN:HOST_COLUMN + 1] or ("?",)
+            cells = (cid[:12],) + cells[1:EXPIRES_COLUMN + 1] + ("", "") + (host if self.fleet else ())
+            rows[cid] = cells
+            table.add_row(*cells, key=cid)
+        self.rendered_rows = rows
+        self.expiring = expiring
+        self.snapshot_time = saved_at
+        table.add_class("stale")
+        self.update_status_bar()
+
+    @work(exclusive=True, group="connect")
+    async def connect_docker(self):
+        """Connects off the UI thread with a short timeout, retrying with exponential backoff."""
+        # docker-py and the async backend are only imported here, after the first frame
+        from docker_manager import create_manager
+
+        delay = CONNECT_RETRY_MIN
+        while True:
+            try:
+                manager = await asyncio.to_thread(create_manager, connect_timeout=DOCKER_CONNECT_TIMEOUT)
+                if manager.is_async:
+                    # The async client connects lazily; make sure the daemon answers
+                    info = await manager.get_system_info([])
+                    if not info['connected']:
+                        await manager.aclose()
+                        raise RuntimeError("Could not connect to Docker Daemon: no response")
+                break
+            except RuntimeError as e:
+                if delay == CONNECT_RETRY_MIN:
+                    self.notify(str(e), severity="error", timeout=10)
+                self.connection_status = f"🔴 Docker Disconnected | Retrying in {delay}s"
+                self.update_status_bar()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, CONNECT_RETRY_MAX)
+                self.connection_status = "🟡 Connecting to Docker..."
+                self.update_status_bar()
+
+        self.manager = manager
+        self.on_docker_connected()
+
+    def on_docker_connected(self):
+        """Starts everything that needs the daemon: reaper, warm pool, reconcile, events."""
+        # Expiry is enforced on its own thread, at the exact deadline.
+        # Reconciles and events feed it deadlines, so it never lists on its own.
+        self.reaper = ExpiryReaper(self.manager, resync_interval=None, remove=self.remove_expired)
+        self.manager.reaper = self.reaper
+        self.reaper.start()
+
+        # Pool claims and their deadlines live in the VaultOS registry; create and
+        # pull timings are kept in the store
+        self.manager.registry = Registry()
+        self.manager.store = self.store
+
+        # The warm pool, prefetcher, stats and log streams are thread based; give them a
+        # docker-py manager if the UI runs the async backend
+        from docker_manager import DockerManager, NANO_CPUS
+        self.thread_manager = DockerManager(metrics=self.manager.metrics) if self.manager.is_async else self.manager
+        self.thread_manager.registry = self.manager.registry
+        self.thread_manager.reaper = self.reaper
+        self.thread_manager.store = self.store
+        if WARM_POOL:
+            self.manager.pool = WarmPool(self.thread_manager, self.manager.registry)
+            self.manager.pool.refill_in_background()
+
+        # Live CPU/memory: streaming stats for the visible rows only (see update_stats)
+        self.cpu_cap = NANO_CPUS / 1e9
+        self.stats = StatsPool(self.thread_manager)
+
+        # Optional Prometheus export of the Docker API metrics
+        if METRICS_PORT:
+            try:
+                self.metrics_server = self.manager.metrics.serve(METRICS_PORT)
+            except OSError as e:
+                self.notify(f"Metrics endpoint on port {METRICS_PORT} failed: {e}", severity="error")
+        if METRICS_FILE:
+            self.set_interval(METRICS_DUMP_INTERVAL, self.dump_metrics)
 
-    def check_expiration(self):
-        """Called every 1s to trigger refresh (which handles pruning)."""
         self.action_refresh_list()
+        self.watch_events()
+        if PREFETCH_ENABLED:
+            self.prefetch_images()
+
+    def action_show_logs(self):
+        cid = self.get_selected_container_id()
+        if not self.manager or not cid or cid not in self.containers:
+            self.notify("Select a container first.", severity="warning")
+            return
+        from ui.modals import LogViewerModal
+        name = self.manager.display_name(self.containers[cid])
+        self.push_screen(LogViewerModal(self.thread_manager, cid, name))
+
+    def action_toggle_metrics(self):
+        self.query_one("#metrics_panel").toggle_class("visible")
+        self.update_metrics_panel()
+
+    def update_metrics_panel(self):
+        panel = self.query_one("#metrics_panel", Static)
+        if panel.has_class("visible"):
+            if self.manager:
+                panel.update(self.manager.metrics.format_table())
+            else:
+                panel.update("Docker not connected.")
+
+    def dump_metrics(self):
+        try:
+            self.manager.metrics.dump(METRICS_FILE)
+        except OSError as e:
+            self.notify(f"Writing metrics to {METRICS_FILE} failed: {e}", severity="error")
+
+    async def call_manager(self, method, *args, **kwargs):
+        """Runs a manager method without blocking the event loop, whichever backend is active."""
+        fn = getattr(self.manager, method)
+        if self.manager.is_async:
+            return await fn(*args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def run_on_ui(self, callback, *args, **kwargs):
+        """Invokes callback on the UI thread, from a worker thread or the event loop itself."""
+        if threading.get_ident() == self.ui_thread:
+            return callback(*args, **kwargs)
+        return self.call_from_thread(callback, *args, **kwargs)
+
+    def remove_expired(self, cid):
+        """Reaper removal hook; runs on a reaper pool thread."""
+        if self.manager.is_async:
+            future = asyncio.run_coroutine_threadsafe(self.manager.delete_container(cid), self.loop)
+            return future.result()
+        return self.manager.delete_container(cid)
+
+    def on_unmount(self):
+        if self.manager and self.snapshot_time is None:
+            self.save_rows()
+        if self.manager and METRICS_FILE:
+            self.dump_metrics()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+        if self.manager:
+            self.events_closed.set()
+            self.manager.close_events()
+        if self.reaper:
+            self.reaper.stop()
+        if self.prefetcher:
+            self.prefetcher.stop()
+        if self.stats:
+            self.stats.stop()
+        if self.store:
+            self.store.close()
+
+    def check_expiration(self):
+        """
+        Called every 1s. Recomputes the countdown locally from the cached
+        vaultos.expires labels and updates only the Expires cells; no daemon I/O.
+        """
+        try:
+            table = self.query_one(ContainerTable)
+        except:
+             return
+
+        now = time.time()
+        newly_expired = False
+        for cid, expiry_ts in self.expiring.items():
+            row = self.rendered_rows.get(cid)
+            if row is None:
+                continue
+            value = format_expiry(expiry_ts, now)
+            if value != row[EXPIRES_COLUMN]:
+                table.update_cell(cid, EXPIRES_COLUMN, value)
+                self.rendered_rows[cid] = row[:EXPIRES_COLUMN] + (value,) + row[EXPIRES_COLUMN + 1:]
+            if value == "Expired" and cid not in self.prune_requested:
+                self.prune_requested.add(cid)
+                newly_expired = True
+
+        if newly_expired:
+            self.action_refresh_list() # Reconcile prunes the expired containers
+
+    def visible_container_ids(self):
+        """Row keys currently on screen, top to bottom."""
+        return self.query_one(ContainerTable).visible_keys()
+
+    def stats_cells(self, cid):
+        """(CPU, Memory) cells from the latest streamed sample; blank until one arrives."""
+        if self.stats is None:
+            return "", ""
+        sample = self.stats.latest(cid)
+        return format_cpu(sample, self.cpu_cap), format_memory(sample)
+
+    def update_stats(self):
+        """
+        Called every 1s. Points the stats streams at the running containers on
+        screen and copies their latest samples into the CPU/Memory cells.
+        """
+        if self.stats is None:
+            return
+        try:
+            visible = self.visible_container_ids()
+        except Exception:
+            return
+        running = [cid for cid in visible if cid in self.containers and self.containers[cid].status == 'running']
+        self.stats.watch(running)
+
+        table = self.query_one(ContainerTable)
+        for cid, row in self.rendered_rows.items():
+            cpu, memory = self.stats_cells(cid)
+            if (cpu, memory) == (row[CPU_COLUMN], row[MEMORY_COLUMN]):
+                continue
+            table.update_cell(cid, CPU_COLUMN, cpu)
+            table.update_cell(cid, MEMORY_COLUMN, memory)
+            self.rendered_rows[cid] = row[:CPU_COLUMN] + (cpu, memory) + row[MEMORY_COLUMN + 1:]
+
+    def watch_events(self):
+        """Follows the daemon events stream and applies each changed container to the model."""
+        if self.manager.is_async:
+            self.watch_events_async()
+        else:
+            self.watch_events_thread()
+
+    @work(thread=True, exclusive=True, group="events")
+    def watch_events_thread(self):
+        worker = get_current_worker()
+        while not worker.is_cancelled:
+            try:
+                for action, cid in self.manager.stream_events():
+                    container = None if action == 'destroy' else self.manager.get_container(cid)
+                    self.call_from_thread(self.apply_container_event, cid, container)
+            except Exception:
+                pass
+            # Stream dropped (daemon restart?). Reconnect after a pause; reconcile covers the gap.
+            # Closed on unmount: stop now, or the interpreter waits out the pause at exit
+            if self.events_closed.wait(5):
+                return
+
+    @work(exclusive=True, group="events")
+    async def watch_events_async(self):
+        while True:
+            try:
+                async for action, cid in self.manager.stream_events():
+                    container = None if action == 'destroy' else await self.manager.get_container(cid)
+                    self.apply_container_event(cid, container)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            # Stream dropped (daemon restart?). Reconnect after a pause; reconcile covers the gap.
+            await asyncio.sleep(5)
+
+    @work(thread=True, group="prefetch")
+    def prefetch_images(self):
+        """Opt-in (config.PREFETCH_ENABLED): warms the image cache for every OS x desktop combination."""
+        from prefetch import ImagePrefetcher
+
+        self.prefetcher = ImagePrefetcher(self.thread_manager)
+        self.prefetcher.run()
+        warm = self.prefetcher.warm_status()
+        cold = sorted(f"{os_name}/{desktop}" for (os_name, desktop), ok in warm.items() if not ok)
+        message = f"Image prefetch: {len(warm) - len(cold)}/{len(warm)} combinations warm"
+        if cold:
+            message += f" (cold: {', '.join(cold)})"
+        self.call_from_thread(self.notify, message)
+
+    def apply_container_event(self, cid, container):
+        if container is None:
+            self.containers.pop(cid, None)
+        elif self.manager.is_idle_pool_member(container):
+            return # Unclaimed warm-pool desktops are not shown
+        else:
+            self.containers[cid] = container
+            expiry = self.manager.container_expiry(container)
+            if expiry and self.reaper:
+                self.reaper.schedule(cid, expiry)
+        self.scheduler.poke()
+        # Only this row is rebuilt and diffed; a bulk operation's burst of events stays cheap
+        self.render_table([cid])
 
     def compose(self) -> ComposeResult:
         yield Header()
-        yield DataTable()
+        yield Input(placeholder="Search name, status, OS, desktop, port, expiry... (Enter: keep, Esc: clear)", id="search")
+        yield ContainerTable()
+        yield Static(id="metrics_panel")
         with Vertical(id="bottom_container"):
              yield Static(id="statusbar")
              with Horizontal(id="toolbar"):
                 yield Button("Create", variant="primary", id="btn_create")
                 yield Button("Start", variant="success", id="btn_start")
                 yield Button("Stop", variant="warning", id="btn_stop")
+                yield Button("Restart", variant="warning", id="btn_restart")
                 yield Button("Delete", variant="error", id="btn_delete")
                 yield Button("Refresh", id="btn_refresh")
         yield Footer()
 
     def update_status_bar(self):
         status_bar = self.query_one("#statusbar", Static)
-        if not self.manager:
-             status_bar.update("🔴 Docker Disconnected | Ver: N/A")
+        if not self.manager or not self.system_info:
+             content = self.connection_status
+             if self.snapshot_time:
+                 saved = time.strftime('%H:%M:%S', time.localtime(self.snapshot_time))
+                 content += f" | Showing {len(self.rendered_rows)} containers from {saved} (stale)"
+             status_bar.update(content)
              return
 
-        info = self.manager.get_system_info()
+        info = self.system_info
         icon = "🟢" if info['connected'] else "🔴"
         ver = f"Docker v{info['engine_version']} (API {info['api_version']})"
-        total = info['total']
-        running = info['running']
-        stopped = info['stopped']
+        # Counts come from the live model so events update them without a daemon call
+        total = len(self.containers)
+        running = len(self.running)
+        stopped = total - running
         stats = f"Status Total: {total} ({running}/{stopped})" 
         content = f"{icon} {ver} | {stats}"
+        table = self.query_one(ContainerTable)
+        if table.index.query.strip():
+            content += f" | Search: {table.row_count} of {total}"
+        if self.marked:
+            content += f" | Marked: {len(self.marked)}"
+        if info.get('hosts'):
+            down = [name for name, error in info['hosts'].items() if error]
+            content += f" | Hosts: {len(info['hosts']) - len(down)}/{len(info['hosts'])} up"
+            if down:
+                content += f" ({', '.join(down)} not answering)"
+        builds = self.manager.build_cache_stats()
+        if builds['hits'] or builds['misses']:
+            content += f" | Image Cache: {builds['hits']} hit / {builds['misses']} miss"
         status_bar.update(content)
 
-    @work(exclusive=True)
+    def tick_refresh(self):
+        """Starts a reconcile when the scheduler says one is due."""
+        # Nobody is looking: in the background, or busy with a dialog
+        paused = not self.app_focus or isinstance(self.screen, ModalScreen)
+        if self.manager and self.scheduler.due(paused):
+            self.action_refresh_list()
+
+    def on_key(self, event: events.Key):
+        self.scheduler.poke()
+
+    def watch_app_focus(self, focused):
+        if focused:
+            self.scheduler.poke()
+
+    @work(exclusive=True, group="refresh")
     async def action_refresh_list(self):
+        """Full reconcile: re-lists from the daemon and replaces the in-memory model."""
         if not self.manager:
              self.update_status_bar()
              return
-        
+
+        run = self.scheduler.start()
+        changed = False
+        try:
+            changed = await self.reconcile()
+        finally:
+            self.scheduler.finish(run, changed)
+
+    async def reconcile(self):
+        """Returns True if the listing differed from the model (something events missed)."""
         try:
-            # Run blocking Docker IO in a separate thread to keep UI responsive
-            containers = await asyncio.to_thread(self.manager.get_and_prune_containers)
+            # Docker IO runs off the event loop (thread or native async) to keep UI responsive.
+            # Strict: a failed listing must not read as "no containers"
+            containers = await self.call_manager('get_and_prune_containers', strict=True)
+            self.system_info = await self.call_manager('get_system_info', containers)
         except Exception as e:
+            # Keep the model, the store and the reaper's deadlines as they were
+            if self.system_info:
+                self.system_info = dict(self.system_info, connected=False)
             self.notify(f"Error fetching containers: {e}", severity="error")
             self.query_one("#statusbar", Static).update("🔴 Error fetching data")
-            return
+            return False
 
-        # UI Updates happen on main thread (async method context is main thread)
+        changed = {c.id: c.status for c in containers} != {cid: c.status for cid, c in self.containers.items()}
+        self.containers = {c.id: c for c in containers}
+        if self.reaper:
+            self.reaper.sync(containers)
+        if self.snapshot_time:
+            # First live listing replaces the rows painted from the store
+            self.snapshot_time = None
+            self.query_one(ContainerTable).remove_class("stale")
+        self.render_table()
+        self.save_rows()
+        return changed
+
+    def render_table(self, cids=None):
+        """
+        Draws the table from the in-memory model. No daemon I/O for the model itself.
+        cids: redraw only these rows (an event); None redraws and diffs them all (a reconcile).
+        """
         try:
-            table = self.query_one(DataTable)
+            table = self.query_one(ContainerTable)
         except:
              return
 
-        selected_row = table.cursor_row
-        table.clear()
-        
         try:
-            import time
             now = time.time()
-
+            if cids is None:
+                old = self.rendered_rows
+                containers = self.containers.values()
+            else:
+                old = {cid: self.rendered_rows[cid] for cid in cids if cid in self.rendered_rows}
+                containers = [self.containers[cid] for cid in cids if cid in self.containers]
+            rows = {}
+            expiring = {}
+            running = set()
             for c in containers:
-                # Extract Port
-                ports = c.attrs['NetworkSettings']['Ports']
-                host_port = "N/A"
-                if ports and '3000/tcp' in ports and ports['3000/tcp']:
-                    host_port = ports['3000/tcp'][0]['HostPort']
-                
-                # Extract OS/Desktop from Image Tag
-                image_tag = c.image.tags[0] if c.image.tags else "unknown"
-                os_name = "N/A"
-                desktop = "N/A"
-                tag_suffix = image_tag.split(":")[-1]
-                if tag_suffix == "latest":
-                    os_name = "Alpine"
-                    desktop = "XFCE"
-                else:
-                    parts = tag_suffix.split("-")
-                    if len(parts) >= 3:
-                         os_name = parts[1].capitalize()
-                         desktop = parts[2].upper()
-                    elif len(parts) == 2:
-                         os_name = parts[0].capitalize()
-                         desktop = parts[1].upper()
-                
-                # Expiry
-                expiry_ts = c.labels.get('vaultos.expires')
-                expiry_str = "No Expire"
+                if c.status == 'running':
+                    running.add(c.id)
+                expiry_ts = self.manager.container_expiry(c)
                 if expiry_ts:
-                    remaining = float(expiry_ts) - now
-                    if remaining > 0:
-                        m, s = divmod(int(remaining), 60)
-                        h, m = divmod(m, 60)
-                        d, h = divmod(h, 24)
-                        expiry_str = f"{d:02d}:{h:02d}:{m:02d}:{s:02d}"
-                    else:
-                        expiry_str = "Expired"
-
-                sep = "│"
-                table.add_row(
-                    c.short_id, sep,
-                    c.name, sep,
-                    c.status, sep,
-                    os_name, sep,
-                    desktop, sep,
-                    host_port, sep,
-                    expiry_str, 
-                    key=c.id
-                )
-            
-            if selected_row is not None and selected_row < len(containers):
-                 table.cursor_coordinate = (selected_row, 0)
+                    expiring[c.id] = expiry_ts
+                rows[c.id] = self.row_cells(c, expiry_ts, now)
+
+            # Touch only what changed so the cursor and scroll position stay put
+            added, removed, changed = diff_rows(old, rows)
+            for cid in removed:
+                table.remove_row(cid)
+            for cid, cells in changed.items():
+                for index, value in cells:
+                    table.update_cell(cid, index, value)
+            for cid in added:
+                table.add_row(*rows[cid], key=cid)
+
+            if cids is None:
+                self.rendered_rows = rows
+                self.expiring = expiring
+                self.running = running
+                self.prune_requested &= set(expiring)
+                self.marked &= set(rows)
+            else:
+                for cid in cids:
+                    self.rendered_rows.pop(cid, None)
+                    self.expiring.pop(cid, None)
+                    self.running.discard(cid)
+                    if cid not in expiring:
+                        self.prune_requested.discard(cid)
+                    if cid not in rows:
+                        self.marked.discard(cid)
+                self.rendered_rows.update(rows)
+                self.expiring.update(expiring)
+                self.running |= running
 
             self.update_status_bar()
             
         except Exception as e:
             self.notify(f"Error updating UI: {e}", severity="error")
 
+    def row_cells(self, c, expiry_ts, now):
+        """One container's table row, from labels in the listing (no per-row API calls)."""
+        os_key, desktop_key, host_port = self.manager.container_details(c)
+        os_name = os_key.capitalize() if os_key else "N/A"
+        desktop = desktop_key.upper() if desktop_key else "N/A"
+        expiry_str = format_expiry(expiry_ts, now)
+        cpu, memory = self.stats_cells(c.id)
+
+        cells = (
+            self.id_cell(c.id),
+            self.manager.display_name(c),
+            c.status,
+            os_name,
+            desktop,
+            host_port,
+            expiry_str,
+            cpu,
+            memory,
+        )
+        if self.fleet:
+            cells += (self.manager.host_name(c),)
+        return cells
+
+    def id_cell(self, cid):
+        return ("● " if cid in self.marked else "") + cid[:12]
+
+    def set_marked(self, marked):
+        """Replaces the marked rows, repainting only the ID cells that change."""
+        table = self.query_one(ContainerTable)
+        changed = self.marked ^ marked
+        self.marked = set(marked)
+        for cid in changed:
+            row = self.rendered_rows.get(cid)
+            if row is None:
+                continue
+            value = self.id_cell(cid)
+            table.update_cell(cid, 0, value)
+            self.rendered_rows[cid] = (value,) + row[1:]
+        self.update_status_bar()
+
+    def action_toggle_mark(self):
+        cid = self.get_selected_container_id()
+        if cid is None:
+            return
+        self.set_marked(self.marked ^ {cid})
+        table = self.query_one(ContainerTable)
+        table.move_cursor(table.cursor + 1)
+
+    def action_mark_filter(self):
+        """Marks every row whose cells contain all the words typed; an empty filter clears the marks."""
+        def handle_filter(text):
+            if text is None:
+                return
+            words = text.lower().split()
+            if not words:
+                self.set_marked(set())
+                return
+            matches = {cid for cid, cells in self.rendered_rows.items()
+                       if all(w in " ".join(map(str, cells)).lower() for w in words)}
+            self.set_marked(self.marked | matches)
+            self.notify(f"Marked {len(matches)} matching containers ({len(self.marked)} in total)")
+
+        from ui.modals import MarkFilterModal
+        self.push_screen(MarkFilterModal(), handle_filter)
+
+    def action_search(self):
+        search = self.query_one("#search", Input)
+        search.add_class("visible")
+        search.focus()
+
+    @on(Input.Changed, "#search")
+    def on_search_changed(self, event: Input.Changed):
+        # Incremental: each keystroke narrows the index, then only visible rows repaint
+        self.query_one(ContainerTable).search(event.value)
+        self.update_status_bar()
+
+    @on(Input.Submitted, "#search")
+    def on_search_submitted(self, event: Input.Submitted):
+        if not event.value:
+            self.action_clear_search()
+            return
+        self.query_one(ContainerTable).focus() # The filter stays until cleared
+
+    def action_clear_search(self):
+        search = self.query_one("#search", Input)
+        if not search.has_class("visible"):
+            return
+        search.value = ""
+        search.remove_class("visible")
+        table = self.query_one(ContainerTable)
+        table.search("")
+        table.focus()
+        self.update_status_bar()
+
+    def action_sort(self):
+        """Cycles the sort column through the sortable columns, then back to unsorted."""
+        table = self.query_one(ContainerTable)
+        sortable = [i for i, c in enumerate(table.columns) if c.sort_key is not None]
+        current = table.index.sort_column
+        if current is None:
+            column = sortable[0]
+        elif current == sortable[-1]:
+            column = None
+        else:
+            column = sortable[sortable.index(current) + 1]
+        table.sort(column)
+        label = table.columns[column].label if column is not None else "none"
+        self.notify(f"Sorted by {label}", timeout=2)
+
+    def action_reverse_sort(self):
+        table = self.query_one(ContainerTable)
+        if table.index.sort_column is not None:
+            table.sort(table.index.sort_column, not table.index.reverse)
+
     def get_selected_container_id(self):
-        table = self.query_one(DataTable)
-        try:
-            if table.cursor_row is None:
-                 return None
-            row_key = table.coordinate_to_cell_key(table.cursor_coordinate).row_key
-            return row_key.value # key was passed as string c.id
-        except:
-             return None
+        return self.query_one(ContainerTable).selected_key()
 
     @on(Button.Pressed, "#btn_create")
     def on_create_btn(self):
@@ -242,73 +792,140 @@ class VaultOSApp(App):
              return
         
         def handle_create(result):
-            if result:
+            if result and result.get('count', 1) > 1:
+                self.notify(f"Creating {result['count']} x {result['name']}... (Mode: {result['type']})")
+                self.create_batch_worker(result)
+            elif result:
                 self.notify(f"Creating container {result['name']}... (Mode: {result['type']})")
                 # Run creation in background worker (managed by textual)
                 self.create_container_worker(result)
 
-        self.push_screen(CreateContainerModal(), handle_create)
+        from ui.modals import CreateContainerModal
+        hosts = list(self.manager.hosts) if self.fleet else None
+        self.push_screen(CreateContainerModal(hosts), handle_create)
 
-    @work(exclusive=True, thread=True)
-    def create_container_worker(self, config):
+    # Not exclusive: a second create must not cancel one already running
+    @work(group="create")
+    async def create_container_worker(self, config):
+        from ui.modals import DownloadProgressModal
         dl_modal = DownloadProgressModal()
         is_downloading = False
         
         def progress_handler(msg: str):
-             # This runs in worker thread. Schedule update on main thread.
+             # Sync backend calls this from its worker thread; async backend from the loop.
              nonlocal is_downloading
              if not is_downloading:
-                 self.app.call_from_thread(self.push_screen, dl_modal)
+                 self.run_on_ui(self.push_screen, dl_modal)
                  is_downloading = True
              
-             self.app.call_from_thread(dl_modal.update_status, msg)
+             self.run_on_ui(dl_modal.update_status, msg)
 
         try:
             # We pass the callback. The manager will invoke it if it downloads.
-            cid = self.manager.create_container(config, progress_callback=progress_handler)
+            cid = await self.call_manager('create_container', config, progress_callback=progress_handler)
             
             if is_downloading:
-                self.app.call_from_thread(dl_modal.dismiss)
+                dl_modal.dismiss()
                 
-            self.app.call_from_thread(self.notify, f"Container Created: {cid}", severity="success")
-            self.app.call_from_thread(self.action_refresh_list)
+            self.notify(f"Container Created: {cid}", severity="success")
+            self.action_refresh_list()
         except Exception as e:
             if is_downloading:
-                self.app.call_from_thread(dl_modal.dismiss)
-            self.app.call_from_thread(self.notify, f"Creation failed: {e}", severity="error", timeout=10)
+                dl_modal.dismiss()
+            self.notify(f"Creation failed: {e}", severity="error", timeout=10)
+
+    @work(group="create")
+    async def create_batch_worker(self, config):
+        from ui.modals import DownloadProgressModal
+        dl_modal = DownloadProgressModal("Creating Desktops...")
+        self.push_screen(dl_modal)
+
+        def progress_handler(msg: str):
+            self.run_on_ui(dl_modal.update_status, msg)
+
+        try:
+            batch = await self.call_manager(
+                'create_batch', config, config['count'],
+                port_range=config.get('port_range'), progress_callback=progress_handler)
+        except Exception as e:
+            dl_modal.dismiss()
+            self.notify(f"Batch creation failed: {e}", severity="error", timeout=10)
+            return
+
+        dl_modal.dismiss()
+        failed = [r for r in batch['results'] if 'error' in r]
+        created = len(batch['results']) - len(failed)
+        self.notify(f"Created {created}/{len(batch['results'])} desktops in {batch['elapsed']:.1f}s",
+                    severity="error" if failed else "information", timeout=10)
+        for r in failed:
+            self.notify(f"{r['name']} (port {r['port']}): {r['error']}", severity="error", timeout=10)
+        self.action_refresh_list()
 
     @on(Button.Pressed, "#btn_start")
-    async def on_start_btn(self):
-        cid = self.get_selected_container_id()
-        if cid and self.manager:
-            try:
-                self.manager.start_container(cid)
-                self.notify(f"Started {cid}")
-                self.action_refresh_list()
-            except Exception as e:
-                self.notify(f"Start failed: {e}", severity="error")
+    def on_start_btn(self):
+        self.run_lifecycle('start')
 
     @on(Button.Pressed, "#btn_stop")
-    async def on_stop_btn(self):
-        cid = self.get_selected_container_id()
-        if cid and self.manager:
+    def on_stop_btn(self):
+        self.run_lifecycle('stop')
+
+    @on(Button.Pressed, "#btn_restart")
+    def on_restart_btn(self):
+        self.run_lifecycle('restart')
+
+    @on(Button.Pressed, "#btn_delete")
+    def on_delete_btn(self):
+        self.run_lifecycle('delete')
+
+    def run_lifecycle(self, action):
+        """Applies action to the marked rows, or to the selected row if none are marked."""
+        if not self.manager:
+            return
+        targets = [cid for cid in self.rendered_rows if cid in self.marked]
+        if not targets:
+            cid = self.get_selected_container_id()
+            targets = [cid] if cid else []
+        if targets:
+            self.bulk_worker(action, targets)
+
+    # Not exclusive: a stop batch must not cancel a delete batch already running
+    @work(group="bulk")
+    async def bulk_worker(self, action, targets):
+        verb = {'start': "Started", 'stop': "Stopped", 'restart': "Restarted", 'delete': "Deleted"}[action]
+        if len(targets) == 1:
             try:
-                self.manager.stop_container(cid)
-                self.notify(f"Stopped {cid}")
-                self.action_refresh_list()
+                await self.call_manager(f"{action}_container", targets[0])
+                self.notify(f"{verb} {targets[0]}")
             except Exception as e:
-                self.notify(f"Stop failed: {e}", severity="error")
+                self.notify(f"{action.capitalize()} failed: {e}", severity="error")
+            self.action_refresh_list()
+            return
 
-    @on(Button.Pressed, "#btn_delete")
-    async def on_delete_btn(self):
-        cid = self.get_selected_container_id()
-        if cid and self.manager:
-             try:
-                self.manager.delete_container(cid)
-                self.notify(f"Deleted {cid}")
-                self.action_refresh_list()
-             except Exception as e:
-                self.notify(f"Delete failed: {e}", severity="error")
+        from ui.modals import DownloadProgressModal
+        dl_modal = DownloadProgressModal(f"{action.capitalize()} {len(targets)} desktops...")
+        self.push_screen(dl_modal)
+
+        def progress_handler(msg: str):
+            self.run_on_ui(dl_modal.update_status, msg)
+
+        names = {cid: self.manager.display_name(self.containers[cid]) for cid in targets if cid in self.containers}
+        try:
+            batch = await self.call_manager('bulk_action', action, targets, names=names,
+                                            progress_callback=progress_handler)
+        except Exception as e:
+            dl_modal.dismiss()
+            self.notify(f"{action.capitalize()} failed: {e}", severity="error", timeout=10)
+            return
+
+        dl_modal.dismiss()
+        failed = [r for r in batch['results'] if 'error' in r]
+        self.notify(f"{verb} {len(targets) - len(failed)}/{len(targets)} desktops in {batch['elapsed']:.1f}s",
+                    severity="error" if failed else "information", timeout=10)
+        for r in failed:
+            self.notify(f"{r['name']}: {r['error']}", severity="error", timeout=10)
+        # Failed rows stay marked, ready for a retry
+        self.set_marked({r['id'] for r in failed})
+        self.action_refresh_list()
 
     @on(Button.Pressed, "#btn_refresh")
     def on_refresh_btn(self):
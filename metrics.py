@@ -0,0 +1,183 @@
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Latency histogram bucket upper bounds, in seconds (Prometheus defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def endpoint_name(method, path):
+    """
+    'GET /v1.43/containers/3f2a.../json' -> 'GET /containers/{id}/json'.
+    IDs and names are folded so each endpoint is one series.
+    """
+    path = re.sub(r'^/v[\d.]+', '', urlparse(path).path)
+    # Image names contain slashes: lscr.io/linuxserver/webtop:latest
+    path = re.sub(r'^/images/(?!create$|json$|load$|search$|prune$|get$)(.+?)(/json|/history|/push|/tag|/get)?$',
+                  r'/images/{name}\2', path)
+    path = re.sub(r'^/(containers|exec|networks|volumes)/(?!json$|create$|prune$)[^/]+', r'/\1/{id}', path)
+    return f"{method} {path}"
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0 # Transport failures and 5xx answers
+        self.client_errors = 0 # 4xx answers (no such image, conflicts, ...)
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1) # Last one is +Inf
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile; None past the last bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (None,), self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+class Metrics:
+    """
+    Per-endpoint Docker API call counts, latency histograms and errors.
+    Cheap enough to record every call; safe to use from any thread.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {} # endpoint -> EndpointStats
+        self.started = time.time()
+
+    def observe(self, endpoint, seconds, status=None):
+        """Records one call. status: HTTP status, or None if the call failed before an answer."""
+        index = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.buckets[index] += 1
+            if status is None or status >= 500:
+                stats.errors += 1
+            elif status >= 400:
+                stats.client_errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """{endpoint: EndpointStats copy}, busiest endpoint first."""
+        with self._lock:
+            copies = {}
+            for endpoint, stats in self._stats.items():
+                copy = EndpointStats()
+                copy.__dict__.update(stats.__dict__, buckets=list(stats.buckets))
+                copies[endpoint] = copy
+        return dict(sorted(copies.items(), key=lambda item: -item[1].count))
+
+    def format_table(self):
+        """Plain-text table for the TUI panel."""
+        snapshot = self.snapshot()
+        elapsed = max(time.time() - self.started, 1e-9)
+        lines = [f"{'Endpoint':40} {'Calls':>7} {'/min':>6} {'Err':>5} {'4xx':>5} {'Avg ms':>8} {'p99 ms':>8}"]
+        for endpoint, s in snapshot.items():
+            p99 = s.quantile(0.99)
+            p99_text = f"{p99 * 1000:8.0f}" if p99 is not None else f"{'>10s':>8}"
+            lines.append(f"{endpoint[:40]:40} {s.count:7} {s.count * 60 / elapsed:6.1f} {s.errors:5} "
+                         f"{s.client_errors:5} {s.seconds / s.count * 1000:8.1f} {p99_text}")
+        if not snapshot:
+            lines.append("No Docker API calls yet.")
+        return "\n".join(lines)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        snapshot = self.snapshot()
+        out = [
+            "# HELP vaultos_docker_requests_total Docker Engine API calls made by VaultOS.",
+            "# TYPE vaultos_docker_requests_total counter",
+        ]
+        out += [f'vaultos_docker_requests_total{{endpoint="{e}"}} {s.count}' for e, s in snapshot.items()]
+        out += [
+            "# HELP vaultos_docker_request_errors_total Calls that failed (connection error or 5xx).",
+            "# TYPE vaultos_docker_request_errors_total counter",
+        ]
+        out += [f'vaultos_docker_request_errors_total{{endpoint="{e}"}} {s.errors}' for e, s in snapshot.items()]
+        out += [
+            "# HELP vaultos_docker_request_client_errors_total Calls answered with a 4xx status.",
+            "# TYPE vaultos_docker_request_client_errors_total counter",
+        ]
+        out += [f'vaultos_docker_request_client_errors_total{{endpoint="{e}"}} {s.client_errors}'
+                for e, s in snapshot.items()]
+        out += [
+            "# HELP vaultos_docker_request_duration_seconds Time until the daemon's response headers.",
+            "# TYPE vaultos_docker_request_duration_seconds histogram",
+        ]
+        for e, s in snapshot.items():
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                cumulative += n
+                out.append(f'vaultos_docker_request_duration_seconds_bucket{{endpoint="{e}",le="{bound}"}} {cumulative}')
+            out.append(f'vaultos_docker_request_duration_seconds_bucket{{endpoint="{e}",le="+Inf"}} {s.count}')
+            out.append(f'vaultos_docker_request_duration_seconds_sum{{endpoint="{e}"}} {s.seconds}')
+            out.append(f'vaultos_docker_request_duration_seconds_count{{endpoint="{e}"}} {s.count}')
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        """Writes the Prometheus text atomically (e.g. for node_exporter's textfile collector)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves /metrics on a daemon thread. Returns the server (call shutdown() to stop)."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True, name="vaultos-metrics").start()
+        return server
+
+def instrument_session(session, metrics):
+    """Records every request a requests.Session (docker-py's APIClient) sends."""
+    send = session.send
+
+    def timed_send(request, **kwargs):
+        endpoint = endpoint_name(request.method, request.path_url)
+        started = time.perf_counter()
+        try:
+            response = send(request, **kwargs)
+        except Exception:
+            metrics.observe(endpoint, time.perf_counter() - started)
+            raise
+        # Streaming responses (pull, events) are timed to their headers
+        metrics.observe(endpoint, time.perf_counter() - started, response.status_code)
+        return response
+
+    session.send = timed_send
@@ -0,0 +1,84 @@
+import threading
+from config import WARM_POOL, WARM_POOL_PORT_RANGE
+
+class WarmPool:
+    """
+    Keeps N already-running, unclaimed ephemeral desktops per (os, desktop).
+    Members carry the vaultos.pool label; since labels are fixed at creation,
+    claims (owner name, expiry) are recorded in the Registry. Claiming is a
+    registry update, and the pool then refills itself in the background.
+    """
+    def __init__(self, manager, registry, targets=None, port_range=WARM_POOL_PORT_RANGE, refill_on_claim=True):
+        """refill_on_claim: start a background refill after each claim (off for short-lived processes)."""
+        self.manager = manager
+        self.registry = registry
+        self.targets = dict(WARM_POOL if targets is None else targets)
+        self.port_range = port_range
+        self.refill_on_claim = refill_on_claim
+        self._claim_lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+
+    def idle_members(self, os_name, desktop):
+        """Running pool members for the combination that nobody has claimed."""
+        return [c for c in self.manager.list_containers()
+                if c.status == 'running'
+                and c.labels.get('vaultos.os') == os_name
+                and c.labels.get('vaultos.desktop') == desktop
+                and self.manager.is_idle_pool_member(c)]
+
+    def claim(self, config):
+        """
+        Claims an idle member for an ephemeral wizard config.
+        Returns the container id, or None if the pool has nothing for that combination.
+        The desktop keeps the member's host port; the requested port is not used.
+        """
+        key = (config.get('os', 'alpine'), config.get('desktop', 'xfce'))
+        if key not in self.targets:
+            return None
+
+        expires = None
+        if config.get('timer'):
+            expires = self.manager._parse_timer(config.get('timer'))
+
+        with self._claim_lock:
+            for member in self.idle_members(*key):
+                if self.registry.claim(member.id, config.get('name'), expires):
+                    claimed = member.id
+                    break
+            else:
+                return None
+
+        if expires and self.manager.reaper:
+            self.manager.reaper.schedule(claimed, expires)
+        if self.refill_on_claim:
+            self.refill_in_background()
+        return claimed
+
+    def refill(self, progress_callback=None):
+        """Creates members until every combination is back at its target. Returns the batch results."""
+        results = []
+        with self._refill_lock:
+            for (os_name, desktop), target in self.targets.items():
+                missing = target - len(self.idle_members(os_name, desktop))
+                if missing <= 0:
+                    continue
+                config = {
+                    'name': f"pool-{os_name}-{desktop}",
+                    'type': 'ephemeral',
+                    'os': os_name,
+                    'desktop': desktop,
+                    'pool': True,
+                }
+                batch = self.manager.create_batch(config, missing, self.port_range,
+                                                  progress_callback=progress_callback)
+                results.extend(batch['results'])
+        return results
+
+    def refill_in_background(self):
+        threading.Thread(target=self._refill_quietly, name="vaultos-pool-refill", daemon=True).start()
+
+    def _refill_quietly(self):
+        try:
+            self.refill()
+        except Exception as e:
+            print(f"Warm pool refill failed: {e}")
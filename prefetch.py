@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import OS_DESKTOP_MAP, PREFETCH_PARALLEL, PREFETCH_MAX_BYTES_PER_SEC
+
+class ImagePrefetcher:
+    """
+    Pulls every OS x desktop webtop image in the background, so creating a
+    desktop never waits on the network once the cache is warm.
+    """
+    def __init__(self, manager, parallel=PREFETCH_PARALLEL, max_bytes_per_sec=PREFETCH_MAX_BYTES_PER_SEC):
+        """
+        parallel: concurrent pulls.
+        max_bytes_per_sec: average download budget across all pulls, or None for no cap.
+            The daemon cannot throttle a pull in flight, so the budget is enforced
+            by holding back the next pull until the average falls under the cap.
+        """
+        self.manager = manager
+        self.parallel = parallel
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self._lock = threading.Lock()
+        self._started = None
+        self._bytes = 0
+        self._stopped = threading.Event()
+
+    def matrix(self):
+        """Every (os, desktop, image) combination, resolved exactly as create_container does."""
+        return [(os_name, desktop, self.manager.resolve_image(os_name, desktop))
+                for os_name, desktops in OS_DESKTOP_MAP.items()
+                for desktop in desktops]
+
+    def warm_status(self):
+        """Returns {(os, desktop): True if the image is already local}."""
+        # Several combinations can share an image (alpine/xfce is :latest); check each once
+        present = {}
+        status = {}
+        for os_name, desktop, image in self.matrix():
+            if image not in present:
+                present[image] = self.manager.image_exists(image)
+            status[(os_name, desktop)] = present[image]
+        return status
+
+    def stop(self):
+        """Lets running pulls finish but starts no new ones."""
+        self._stopped.set()
+
+    def run(self, progress_callback=None):
+        """
+        Pulls every missing image with bounded parallelism.
+        progress_callback: function(str) -> None, called as each image starts and finishes.
+        Returns {image: None on success or the error string}.
+        """
+        missing = []
+        for os_name, desktop, image in self.matrix():
+            if image not in missing and not self.manager.image_exists(image):
+                missing.append(image)
+
+        self._started = time.monotonic()
+        self._bytes = 0
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="vaultos-prefetch") as pool:
+            for image, error in zip(missing, pool.map(lambda image: self._pull(image, progress_callback), missing)):
+                results[image] = error
+        return results
+
+    def _pull(self, image, progress_callback):
+        if self._stopped.is_set():
+            return "cancelled"
+        self._wait_for_budget()
+        if progress_callback:
+            progress_callback(f"Prefetching {image}...")
+
+        layers = {} # layer id -> bytes downloaded so far
+        counted = [0]
+
+        def on_chunk(chunk):
+            if chunk.get('status') != 'Downloading':
+                return
+            current = chunk.get('progressDetail', {}).get('current') or 0
+            layers[chunk.get('id')] = current
+            total = sum(layers.values())
+            with self._lock:
+                self._bytes += total - counted[0]
+            counted[0] = total
+
+        try:
+            self.manager.pull_image(image, on_chunk)
+        except Exception as e:
+            if progress_callback:
+                progress_callback(f"Prefetch failed for {image}: {e}")
+            return str(e)
+        if progress_callback:
+            progress_callback(f"Prefetched {image} ({counted[0] / 1e6:.0f} MB)")
+        return None
+
+    def _wait_for_budget(self):
+        if not self.max_bytes_per_sec:
+            return
+        while not self._stopped.is_set():
+            with self._lock:
+                # Time the bytes so far should have taken at the capped rate
+                earliest = self._started + self._bytes / self.max_bytes_per_sec
+            delay = earliest - time.monotonic()
+            if delay <= 0:
+                return
+            self._stopped.wait(min(delay, 1.0))
@@ -0,0 +1,110 @@
+import time
+from config import PULL_PROGRESS_HZ
+
+# Layer statuses after which a layer has nothing left to download
+DOWNLOADED = ('Verifying Checksum', 'Download complete', 'Extracting', 'Pull complete', 'Already exists')
+
+def format_bytes(n):
+    return f"{n / 1e6:.1f} MB"
+
+class LayerProgress:
+    """Download state of one image layer."""
+    def __init__(self, layer_id, started):
+        self.id = layer_id
+        self.status = ''
+        self.current = 0
+        self.total = 0
+        self.started = started # When its first bytes arrived
+        self.rate = 0.0 # bytes/second since started
+
+    @property
+    def done(self):
+        return self.status in DOWNLOADED
+
+class PullSnapshot:
+    """
+    Immutable view of a pull at one moment, handed to progress callbacks.
+    str() gives a one-line summary, so plain-text callbacks keep working.
+    """
+    def __init__(self, image, current, total, rate, eta, layers_done, layers, slowest):
+        self.image = image
+        self.current = current # bytes downloaded across all layers
+        self.total = total # bytes to download across layers whose size is known
+        self.rate = rate # overall bytes/second
+        self.eta = eta # seconds, or None while unknown
+        self.layers_done = layers_done
+        self.layers = layers
+        self.slowest = slowest # [(layer id, current, total, rate)] of the slowest layers still downloading
+
+    @property
+    def fraction(self):
+        return self.current / self.total if self.total else 0.0
+
+    def __str__(self):
+        msg = f"{format_bytes(self.current)} / {format_bytes(self.total)}"
+        msg += f" at {format_bytes(self.rate)}/s"
+        if self.eta is not None:
+            msg += f", {int(self.eta // 60)}m{int(self.eta % 60):02d}s left"
+        msg += f" ({self.layers_done}/{self.layers} layers)"
+        return msg
+
+class PullProgress:
+    """
+    Aggregates a pull's raw JSON progress stream per layer and coalesces it:
+    update() returns a PullSnapshot at most `hz` times a second and None otherwise.
+    """
+    def __init__(self, image='', hz=PULL_PROGRESS_HZ, slowest=3, clock=time.monotonic):
+        self.image = image
+        self.interval = 1.0 / hz
+        self.slowest = slowest
+        self.clock = clock
+        self.started = clock()
+        self.layers = {} # layer id -> LayerProgress, in first-seen order
+        self._last_emit = None
+
+    def update(self, chunk):
+        """Feeds one progress chunk. Returns a snapshot if one is due, else None."""
+        layer_id = chunk.get('id')
+        status = chunk.get('status', '')
+        # Chunks without a layer ID are image-level messages ("Pulling from ...", "Digest: ...")
+        if layer_id and status and not status.startswith('Pulling from'):
+            now = self.clock()
+            layer = self.layers.get(layer_id)
+            if layer is None:
+                layer = self.layers[layer_id] = LayerProgress(layer_id, now)
+            layer.status = status
+            if status == 'Downloading':
+                detail = chunk.get('progressDetail') or {}
+                if not layer.current:
+                    layer.started = now
+                layer.current = detail.get('current') or layer.current
+                layer.total = detail.get('total') or layer.total
+                elapsed = now - layer.started
+                layer.rate = layer.current / elapsed if elapsed > 0 else 0.0
+            elif layer.done and layer.total:
+                layer.current = layer.total
+
+        now = self.clock()
+        if self._last_emit is not None and now - self._last_emit < self.interval:
+            return None
+        self._last_emit = now
+        return self.snapshot()
+
+    def snapshot(self):
+        """Current aggregate, regardless of the rate limit (e.g. for the final update)."""
+        layers = list(self.layers.values())
+        current = sum(l.current for l in layers)
+        total = sum(l.total for l in layers)
+        elapsed = self.clock() - self.started
+        rate = current / elapsed if elapsed > 0 else 0.0
+
+        # ETA is only meaningful once every downloading layer has reported its size
+        eta = None
+        pending = [l for l in layers if not l.done]
+        if rate > 0 and all(l.total for l in pending):
+            eta = (total - current) / rate
+
+        downloading = sorted((l for l in pending if l.total), key=lambda l: l.rate)
+        slowest = [(l.id, l.current, l.total, l.rate) for l in downloading[:self.slowest]]
+        return PullSnapshot(self.image, current, total, rate, eta,
+                            len(layers) - len(pending), len(layers), slowest)
@@ -0,0 +1,127 @@
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import REAPER_WORKERS, REAPER_RESYNC_INTERVAL
+
+class ExpiryReaper:
+    """
+    Removes ephemeral containers at their vaultos.expires deadline.
+    Deadlines live in a min-heap; the reaper thread sleeps until the earliest one
+    and hands removals to a small worker pool, so it never blocks a UI refresh.
+    """
+    def __init__(self, manager, workers=REAPER_WORKERS, resync_interval=REAPER_RESYNC_INTERVAL, remove=None):
+        """
+        resync_interval: seconds between self-syncs from manager.list_containers(),
+            or None when the owner feeds deadlines via sync()/schedule() itself.
+        remove: callable(container_id) used for removals (default manager.delete_container).
+        """
+        self.manager = manager
+        self.resync_interval = resync_interval
+        self._remove_container = remove or manager.delete_container
+        self._heap = [] # (deadline, container_id)
+        self._deadlines = {} # container_id -> deadline currently scheduled
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vaultos-reaper")
+        self._stopped = False
+        self._thread = None
+        self._following = False
+
+    def schedule(self, container_id, deadline):
+        """Registers (or moves) a container's expiry deadline."""
+        deadline = float(deadline)
+        with self._cond:
+            if self._deadlines.get(container_id) == deadline:
+                return
+            self._deadlines[container_id] = deadline
+            heapq.heappush(self._heap, (deadline, container_id))
+            self._cond.notify()
+
+    def sync(self, containers=None):
+        """Schedules every expiring container (label or pool claim) the manager knows about."""
+        if containers is None:
+            containers = self.manager.list_containers()
+        for c in containers:
+            expiry = self.manager.container_expiry(c)
+            if expiry:
+                self.schedule(c.id, expiry)
+
+    def follow_events(self):
+        """
+        Schedules containers as manager.stream_events() reports them created or
+        started, so a new deadline does not wait for the next resync. Blocks until
+        stop(); reconnects after a failed stream.
+        """
+        self._following = True
+        while not self._stopped:
+            try:
+                for action, cid in self.manager.stream_events():
+                    if action not in ('create', 'start'):
+                        continue
+                    container = self.manager.get_container(cid)
+                    expiry = self.manager.container_expiry(container) if container else None
+                    if expiry:
+                        self.schedule(cid, expiry)
+            except Exception as e:
+                print(f"Reaper event stream failed: {e}")
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped, timeout=5)
+
+    def pending(self):
+        with self._cond:
+            return len(self._deadlines)
+
+    def start(self):
+        """Runs the reaper on a background daemon thread."""
+        self._thread = threading.Thread(target=self.run, name="vaultos-reaper", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._following:
+            self.manager.close_events()
+        self._pool.shutdown(wait=False)
+
+    def run(self):
+        """Reaper loop. Blocks until stop() is called."""
+        next_sync = 0.0 if self.resync_interval is not None else float('inf')
+        while True:
+            if time.monotonic() >= next_sync:
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"Reaper sync failed: {e}")
+                next_sync = time.monotonic() + self.resync_interval
+
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.time()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    deadline, cid = heapq.heappop(self._heap)
+                    # Skip entries superseded by a later schedule() call
+                    if self._deadlines.get(cid) == deadline:
+                        del self._deadlines[cid]
+                        due.append(cid)
+
+                if not due:
+                    timeout = None if next_sync == float('inf') else max(0.0, next_sync - time.monotonic())
+                    if self._heap:
+                        until_deadline = self._heap[0][0] - now
+                        timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+                    self._cond.wait(timeout)
+                    continue
+
+            for cid in due:
+                self._pool.submit(self._remove, cid)
+
+    def _remove(self, container_id):
+        try:
+            self._remove_container(container_id)
+            print(f"Container {container_id[:12]} expired. Removed.")
+        except Exception:
+            pass # Already gone?
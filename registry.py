@@ -0,0 +1,57 @@
+import json
+import os
+import threading
+import time
+from config import REGISTRY_PATH
+
+class Registry:
+    """
+    VaultOS-side record of facts Docker labels cannot hold because labels are
+    fixed at creation: which warm-pool containers are claimed, by whom, and
+    when they expire. Stored as a small JSON file, written atomically.
+    """
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+    def claim(self, container_id, name, expires=None):
+        """Marks a container as claimed. Returns False if someone else claimed it first."""
+        with self._lock:
+            if container_id in self._entries:
+                return False
+            self._entries[container_id] = {'name': name, 'claimed_at': time.time(), 'expires': expires}
+            self._save()
+            return True
+
+    def get(self, container_id):
+        with self._lock:
+            return self._entries.get(container_id)
+
+    def is_claimed(self, container_id):
+        with self._lock:
+            return container_id in self._entries
+
+    def prune(self, existing_ids):
+        """Forgets entries whose containers no longer exist."""
+        existing_ids = set(existing_ids)
+        with self._lock:
+            stale = [cid for cid in self._entries if cid not in existing_ids]
+            for cid in stale:
+                del self._entries[cid]
+            if stale:
+                self._save()
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+from config import STATS_MAX_STREAMS, STATS_HISTORY, STATS_ALERT_PERCENT
+
+class StatsSample:
+    """One reading from a container's stats stream."""
+    def __init__(self, cpu, memory, limit, at):
+        self.cpu = cpu # Cores in use (1.5 = one and a half cores), or None on the first reading
+        self.memory = memory # bytes, page cache excluded (as `docker stats` reports it)
+        self.limit = limit # bytes
+        self.at = at
+
+def parse_stats(raw, now=None):
+    """Turns one raw /containers/{id}/stats document into a StatsSample, or None for an empty one."""
+    memory_stats = raw.get('memory_stats') or {}
+    if 'usage' not in memory_stats:
+        return None # Container not running: the daemon sends zeroed documents
+
+    cpu = None
+    cpu_stats = raw.get('cpu_stats') or {}
+    precpu = raw.get('precpu_stats') or {}
+    cpu_delta = cpu_stats.get('cpu_usage', {}).get('total_usage', 0) - precpu.get('cpu_usage', {}).get('total_usage', 0)
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu.get('system_cpu_usage', 0)
+    # The first document of a stream has no previous reading to diff against
+    if precpu.get('system_cpu_usage') and system_delta > 0:
+        online = cpu_stats.get('online_cpus') or len(cpu_stats.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+        cpu = cpu_delta / system_delta * online
+
+    details = memory_stats.get('stats') or {}
+    # cgroup v2 reports inactive_file, v1 total_inactive_file
+    cache = details.get('inactive_file', details.get('total_inactive_file', 0))
+    memory = max(0, memory_stats['usage'] - cache)
+    return StatsSample(cpu, memory, memory_stats.get('limit', 0), time.time() if now is None else now)
+
+def format_cpu(sample, cap_cores):
+    """CPU use as a percentage of the container's core cap ("▲" once near it)."""
+    if sample is None or sample.cpu is None:
+        return ""
+    percent = sample.cpu / cap_cores * 100
+    flag = "▲" if percent >= STATS_ALERT_PERCENT else ""
+    return f"{flag}{percent:.0f}%"
+
+def format_memory(sample):
+    """Memory use against the limit, e.g. '612M/1.0G' ("▲" once near the limit)."""
+    if sample is None:
+        return ""
+    flag = "▲" if sample.limit and sample.memory * 100 >= sample.limit * STATS_ALERT_PERCENT else ""
+    return f"{flag}{sample.memory / 2**20:.0f}M/{sample.limit / 2**30:.1f}G"
+
+class StatsPool:
+    """
+    Long-lived stats streams for the containers the dashboard is showing.
+    At most max_streams are open at once; each keeps its last `history`
+    samples in a ring buffer, dropped when its stream closes.
+    """
+    def __init__(self, manager, max_streams=STATS_MAX_STREAMS, history=STATS_HISTORY):
+        self.manager = manager # Thread based: stream_stats() is a blocking generator
+        self.max_streams = max_streams
+        self.history = history
+        self._lock = threading.Lock()
+        self._streams = {} # container id -> stop Event, until its thread exits
+        self._samples = {} # container id -> deque of StatsSample
+
+    def watch(self, container_ids):
+        """Follows exactly these containers (the first max_streams of them) and stops the rest."""
+        wanted = list(dict.fromkeys(container_ids))[:self.max_streams]
+        with self._lock:
+            for cid, stop in self._streams.items():
+                if cid not in wanted:
+                    stop.set()
+            for cid in wanted:
+                stop = self._streams.get(cid)
+                if stop is not None:
+                    stop.clear() # Scrolled back before its stream wound down
+                    continue
+                # Stopped streams count until their thread exits, so the bound is strict;
+                # the next watch() picks up whatever did not fit
+                if len(self._streams) >= self.max_streams:
+                    break
+                stop = self._streams[cid] = threading.Event()
+                self._samples[cid] = deque(maxlen=self.history)
+                threading.Thread(target=self._follow, args=(cid, stop), daemon=True,
+                                 name=f"vaultos-stats-{cid[:12]}").start()
+
+    def _follow(self, cid, stop):
+        try:
+            for raw in self.manager.stream_stats(cid):
+                # The daemon sends a document per second, so a stop takes effect within one
+                if stop.is_set():
+                    break
+                sample = parse_stats(raw)
+                if sample is not None:
+                    self._samples[cid].append(sample)
+        except Exception:
+            pass # Container removed or daemon gone; a later watch() resubscribes if still shown
+        finally:
+            with self._lock:
+                if self._streams.get(cid) is stop:
+                    del self._streams[cid]
+                    self._samples.pop(cid, None)
+
+    def latest(self, cid):
+        """Most recent sample for cid, or None."""
+        samples = self._samples.get(cid)
+        return samples[-1] if samples else None
+
+    def samples(self, cid):
+        """Buffered samples for cid, oldest first."""
+        return list(self._samples.get(cid) or ())
+
+    def streaming(self):
+        """Container ids with an open stream."""
+        with self._lock:
+            return [cid for cid, stop in self._streams.items() if not stop.is_set()]
+
+    def stop(self):
+        self.watch([])
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import STORE_PATH, STORE_RETENTION_DAYS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS containers (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT,
+    cells TEXT,          -- JSON list: the dashboard row as last shown
+    expires REAL,
+    config TEXT,         -- JSON: the create config, when VaultOS created it
+    created_at REAL,
+    last_seen REAL,
+    gone_at REAL         -- Set once a listing no longer has it
+);
+CREATE TABLE IF NOT EXISTS creates (
+    container_id TEXT,
+    name TEXT,
+    at REAL,
+    seconds REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS pulls (
+    image TEXT,
+    at REAL,
+    seconds REAL,
+    bytes INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class Store:
+    """
+    Local SQLite record of what VaultOS knows about its containers: the
+    dashboard row as last shown, the create config, and the history of
+    creates and pulls. The daemon stays the source of truth; the store lets
+    the dashboard paint at launch and keeps timings across restarts.
+    """
+    def __init__(self, path=STORE_PATH, retention_days=STORE_RETENTION_DAYS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._saved = {} # container id -> (cells, expires) last written, so saves only write changes
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written from the UI thread and worker threads; the lock serialises them
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            # WAL without a sync per commit: a crash may lose the last save, never corrupt the file
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            cutoff = time.time() - retention_days * 86400
+            with self._db:
+                self._db.execute("DELETE FROM containers WHERE gone_at < ?", (cutoff,))
+                self._db.execute("DELETE FROM creates WHERE at < ?", (cutoff,))
+                self._db.execute("DELETE FROM pulls WHERE at < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def save_rows(self, rows, expiring, containers=None):
+        """
+        Records the dashboard rows (container id -> cells), expiry timestamps and,
+        from `containers` (id -> container), each one's name and status. Only rows
+        that changed since the last save are written; containers no longer
+        listed are marked gone, keeping their config and history.
+        """
+        now = time.time()
+        containers = containers or {}
+        current = {cid: (list(cells), expiring.get(cid)) for cid, cells in rows.items()}
+        changed = []
+        for cid, (cells, expires) in current.items():
+            if self._saved.get(cid) != (cells, expires):
+                c = containers.get(cid)
+                changed.append((cid, c and c.name, c and c.status, json.dumps(cells), expires, now))
+        try:
+            self._write_rows(changed, current, now)
+        except sqlite3.Error:
+            pass # Best effort: the next save writes the rows again
+
+    def _write_rows(self, changed, current, now):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO containers (id, name, status, cells, expires, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name=coalesce(excluded.name, name), "
+                "status=coalesce(excluded.status, status), cells=excluded.cells, "
+                "expires=excluded.expires, last_seen=excluded.last_seen, gone_at=NULL", changed)
+            # Anything shown at the previous save (or launch) and missing now is gone
+            gone = [(now, cid) for cid, in self._db.execute(
+                "SELECT id FROM containers WHERE gone_at IS NULL AND cells IS NOT NULL") if cid not in current]
+            self._db.executemany("UPDATE containers SET gone_at = ? WHERE id = ?", gone)
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('saved_at', ?)", (str(now),))
+            self._saved = current
+
+    def load_rows(self):
+        """Returns (rows, expiring, saved_at) from the last save_rows, or None if there is none."""
+        try:
+            return self._read_rows()
+        except (sqlite3.Error, ValueError, TypeError):
+            return None
+
+    def _read_rows(self):
+        with self._lock:
+            saved_at = self._db.execute("SELECT value FROM meta WHERE key = 'saved_at'").fetchone()
+            if saved_at is None:
+                return None
+            rows, expiring = {}, {}
+            for cid, cells, expires in self._db.execute(
+                    "SELECT id, cells, expires FROM containers WHERE gone_at IS NULL AND cells IS NOT NULL"):
+                rows[cid] = tuple(json.loads(cells))
+                if expires:
+                    expiring[cid] = expires
+            self._saved = {cid: (list(cells), expiring.get(cid)) for cid, cells in rows.items()}
+            return rows, expiring, float(saved_at[0])
+
+    def record_create(self, config, container_id, seconds, error=None):
+        """
+        Records one create (or failed attempt) and, on success, the config it was
+        created from. Best effort, like every write here: a busy or broken store
+        never fails the create itself.
+        """
+        now = time.time()
+        try:
+            with self._lock, self._db:
+                self._db.execute("INSERT INTO creates VALUES (?, ?, ?, ?, ?)",
+                                 (container_id, config.get('name'), now, seconds, error))
+                if container_id:
+                    self._db.execute(
+                        "INSERT INTO containers (id, name, config, created_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET config=excluded.config, created_at=excluded.created_at",
+                        (container_id, config.get('name'), json.dumps(config), now))
+        except sqlite3.Error:
+            pass
+
+    def record_pull(self, image, seconds, nbytes, error=None):
+        """Records one pull: how long it took and how many bytes it downloaded."""
+        try:
+            with self._lock, self._db:
+                self._db.execute("INSERT INTO pulls VALUES (?, ?, ?, ?, ?)", (image, time.time(), seconds, nbytes, error))
+        except sqlite3.Error:
+            pass
+
+    def get(self, container_id):
+        """What the store knows about a container: {'name', 'status', 'config', 'created_at', 'last_seen', 'gone_at'}, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT name, status, config, created_at, last_seen, gone_at FROM containers WHERE id = ?",
+                (container_id,)).fetchone()
+        if row is None:
+            return None
+        name, status, config, created_at, last_seen, gone_at = row
+        return {'name': name, 'status': status, 'config': json.loads(config) if config else None,
+                'created_at': created_at, 'last_seen': last_seen, 'gone_at': gone_at}
+
+    def create_seconds(self, limit=100):
+        """Durations of the most recent successful creates, newest first."""
+        with self._lock:
+            return [s for s, in self._db.execute(
+                "SELECT seconds FROM creates WHERE error IS NULL ORDER BY at DESC LIMIT ?", (limit,))]
+
+    def pulls(self, image=None, limit=100):
+        """Recent pulls, newest first: [{'image', 'at', 'seconds', 'bytes', 'error'}]."""
+        query = "SELECT image, at, seconds, bytes, error FROM pulls"
+        params = ()
+        if image:
+            query += " WHERE image = ?"
+            params = (image,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY at DESC LIMIT ?", params + (limit,)).fetchall()
+        return [dict(zip(('image', 'at', 'seconds', 'bytes', 'error'), row)) for row in rows]
@@ -19,7 +19,7 @@ def test_advanced():
         print(f"Created ephemeral: {cid}")
         print("Waiting 3s...")
         time.sleep(3)
-        dm.check_prune_expired()
+        dm.get_and_prune_containers()
         if any(c.id == cid for c in dm.list_containers()):
             print("OK: Still exists.")
         else:
@@ -27,7 +27,7 @@ def test_advanced():
             
         print("Waiting 3s (Total 6s)...")
         time.sleep(3)
-        dm.check_prune_expired()
+        dm.get_and_prune_containers()
         if any(c.id == cid for c in dm.list_containers()):
             print("FAIL: Should have expired and been removed.")
         else:
@@ -0,0 +1,224 @@
+import unittest
+import sys
+import os
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+import main
+from main import format_expiry
+from fake_engine import FakeEngine
+from registry import Registry
+from store import Store
+
+class TestCountdown(unittest.TestCase):
+    def test_format_expiry(self):
+        now = 1000.0
+        self.assertEqual(format_expiry(None, now), "No Expire")
+        self.assertEqual(format_expiry("999", now), "Expired")
+        self.assertEqual(format_expiry(str(now + 90061), now), "01:01:01:01")
+
+
+class DashboardTestCase(unittest.IsolatedAsyncioTestCase):
+    """Headless dashboard against a fake engine; the registry and store live in a temp dir."""
+    containers = 20
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.store_path = os.path.join(self.dir, "vaultos.db")
+        self.engine = FakeEngine(containers=self.containers).start()
+        self.addCleanup(self.engine.stop)
+        for patcher in (mock.patch.object(main, 'Store', lambda: Store(self.store_path)),
+                        mock.patch.object(main, 'Registry', lambda: Registry(os.path.join(self.dir, "registry.json"))),
+                        mock.patch.object(main, 'PREFETCH_ENABLED', False),
+                        mock.patch.dict(os.environ, {'DOCKER_HOST': self.engine.url, 'VAULTOS_BACKEND': 'sync'})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def wait_for(self, pilot, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in time")
+            await pilot.pause(0.05)
+
+    def status_text(self, app):
+        return str(app.query_one("#statusbar").render())
+
+
+class TestContainerEvents(DashboardTestCase):
+    async def test_event_rebuilds_only_its_row(self):
+        app = main.VaultOSApp()
+        async with app.run_test(size=(200, 40)) as pilot:
+            await self.wait_for(pilot, lambda: len(app.rendered_rows) == self.containers)
+            cid = next(c.id for c in app.containers.values() if c.status == 'running')
+            await asyncio.to_thread(app.manager.stop_container, cid)
+            container = await asyncio.to_thread(app.manager.get_container, cid)
+
+            with mock.patch.object(app, 'row_cells', wraps=app.row_cells) as row_cells:
+                app.apply_container_event(cid, container)
+            self.assertEqual([call.args[0].id for call in row_cells.call_args_list], [cid])
+            self.assertEqual(app.rendered_rows[cid][2], "exited")
+            self.assertEqual(app.query_one(main.ContainerTable).index.rows[cid][2], "exited")
+
+            app.apply_container_event(cid, None)
+            self.assertNotIn(cid, app.rendered_rows)
+            self.assertNotIn(cid, app.query_one(main.ContainerTable).index.rows)
+            self.assertIn(f"Status Total: {self.containers - 1} ", self.status_text(app))
+
+
+
+class TestTableClicks(DashboardTestCase):
+    async def test_clicks_on_the_bordered_table(self):
+        app = main.VaultOSApp()
+        async with app.run_test(size=(200, 40)) as pilot:
+            await self.wait_for(pilot, lambda: len(app.rendered_rows) == self.containers)
+            table = app.query_one(main.ContainerTable)
+            # Outer line 0 is the border, line 1 the header, line 2 the first row
+            await pilot.click(main.ContainerTable, offset=(5, 4))
+            self.assertEqual(table.selected_key(), table.index.view()[2])
+
+            name_x = 1 + table.columns[0].width + 3 + 1
+            await pilot.click(main.ContainerTable, offset=(name_x, 1))
+            await pilot.pause()
+            self.assertEqual((table.index.sort_column, table.index.reverse), (1, False))
+            names = [table.index.rows[key][1] for key in table.index.view()]
+            self.assertEqual(names, sorted(names, key=str.lower))
+            await pilot.click(main.ContainerTable, offset=(name_x, 1))
+            self.assertEqual((table.index.sort_column, table.index.reverse), (1, True))
+
+            # The border itself does nothing
+            await pilot.click(main.ContainerTable, offset=(name_x, 0))
+            self.assertEqual((table.index.sort_column, table.index.reverse), (1, True))
+
+
+class TestReconcile(DashboardTestCase):
+    async def test_failed_listing_keeps_model_and_store(self):
+        app = main.VaultOSApp()
+        async with app.run_test(size=(200, 40)) as pilot:
+            await self.wait_for(pilot, lambda: len(app.rendered_rows) == self.containers)
+            rows = dict(app.rendered_rows)
+            with mock.patch.object(app.manager, '_fetch_containers', side_effect=ConnectionError("daemon down")), \
+                    mock.patch.object(app.reaper, 'sync') as sync:
+                app.manager.invalidate()
+                await app.action_refresh_list().wait()
+            self.assertEqual(app.rendered_rows, rows)
+            self.assertEqual(len(app.containers), self.containers)
+            self.assertEqual(app.query_one(main.ContainerTable).row_count, self.containers)
+            sync.assert_not_called()
+            self.assertFalse(app.system_info['connected'])
+            self.assertIn("🔴", self.status_text(app))
+        # The next launch still paints every desktop
+        store = Store(self.store_path)
+        saved, _, _ = store.load_rows()
+        store.close()
+        self.assertEqual(set(saved), set(rows))
+
+
+class TestConnect(DashboardTestCase):
+    def flaky_create_manager(self, failures):
+        """create_manager that fails `failures` times, then connects; records the timeouts it was given."""
+        import docker_manager
+        real = docker_manager.create_manager
+        self.connect_timeouts = []
+
+        def create_manager(backend=None, connect_timeout=None):
+            self.connect_timeouts.append(connect_timeout)
+            if len(self.connect_timeouts) <= failures:
+                raise RuntimeError("Could not connect to Docker Daemon: connection refused")
+            return real(backend, connect_timeout)
+        return mock.patch('docker_manager.create_manager', create_manager)
+
+    async def test_retries_with_backoff_until_connected(self):
+        statuses = []
+        update_status_bar = main.VaultOSApp.update_status_bar
+
+        def record_status(app):
+            update_status_bar(app)
+            statuses.append(self.status_text(app))
+
+        with self.flaky_create_manager(failures=3), \
+                mock.patch.object(main, 'CONNECT_RETRY_MIN', 0.05), mock.patch.object(main, 'CONNECT_RETRY_MAX', 0.1), \
+                mock.patch.object(main.VaultOSApp, 'update_status_bar', autospec=True, side_effect=record_status):
+            app = main.VaultOSApp()
+            async with app.run_test(size=(200, 40)) as pilot:
+                await self.wait_for(pilot, lambda: len(app.rendered_rows) == self.containers)
+                self.assertIn("🟢", self.status_text(app))
+        self.assertEqual(self.connect_timeouts, [main.DOCKER_CONNECT_TIMEOUT] * 4)
+        retries = [status for status in statuses if "Retrying" in status]
+        # The delay doubles up to CONNECT_RETRY_MAX
+        self.assertEqual([r.split("Retrying in ")[1] for r in retries], ["0.05s", "0.1s", "0.1s"])
+        self.assertTrue(all(r.startswith("🔴 Docker Disconnected") for r in retries))
+
+    async def test_async_backend_probes_the_daemon(self):
+        with mock.patch.dict(os.environ, {'VAULTOS_BACKEND': 'async'}):
+            app = main.VaultOSApp()
+            async with app.run_test(size=(200, 40)) as pilot:
+                await self.wait_for(pilot, lambda: len(app.rendered_rows) == self.containers)
+                self.assertTrue(app.manager.is_async)
+                self.assertIn("🟢", self.status_text(app))
+
+
+class TestStaleSnapshot(DashboardTestCase):
+    def save_snapshot(self):
+        """Rows as a previous session left them: every desktop 'running', plus one since removed."""
+        rows = {}
+        for c in self.engine.containers.values():
+            if c['labels']:
+                rows[c['id']] = (c['id'][:12], c['name'], "running", "Alpine", "XFCE", str(c['port']), "No Expire", "", "")
+        self.gone = "f" * 64
+        rows[self.gone] = (self.gone[:12], "vaultos-gone", "running", "Alpine", "XFCE", "9999", "No Expire", "", "")
+        store = Store(self.store_path)
+        store.save_rows(rows, {})
+        store.close()
+        return rows
+
+    async def test_stale_rows_replaced_in_place(self):
+        rows = self.save_snapshot()
+        connected = threading.Event()
+        import docker_manager
+        real = docker_manager.create_manager
+
+        def create_manager(**kwargs):
+            connected.wait(10)
+            return real(**kwargs)
+
+        with mock.patch('docker_manager.create_manager', create_manager):
+            app = main.VaultOSApp()
+            async with app.run_test(size=(200, 40)) as pilot:
+                await pilot.pause(0.1)
+                table = app.query_one(main.ContainerTable)
+                # Painted from the store before Docker answers
+                self.assertTrue(table.has_class("stale"))
+                self.assertEqual(set(table.index.rows), set(rows))
+                self.assertIn("Docker", self.status_text(app))
+                self.assertIn(f"Showing {len(rows)} containers from", self.status_text(app))
+                self.assertIn("(stale)", self.status_text(app))
+                table.move_cursor(2)
+                selected = table.selected_key()
+
+                with mock.patch.object(table, 'remove_row', wraps=table.remove_row) as remove_row, \
+                        mock.patch.object(table, 'add_row', wraps=table.add_row) as add_row:
+                    connected.set()
+                    await self.wait_for(pilot, lambda: not table.has_class("stale"))
+                # Only the removed desktop left the table; the others were updated where they stand
+                self.assertEqual([call.args[0] for call in remove_row.call_args_list], [self.gone])
+                add_row.assert_not_called()
+                self.assertEqual(table.selected_key(), selected)
+                self.assertIsNone(app.snapshot_time)
+                exited = [c['id'] for c in self.engine.containers.values() if c['labels'] and c['state'] == 'exited']
+                self.assertEqual({table.index.rows[cid][2] for cid in exited}, {"exited"})
+                self.assertNotIn("(stale)", self.status_text(app))
+
+
+if __name__ == '__main__':
+    unittest.main()
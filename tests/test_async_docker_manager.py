@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_docker_manager import AsyncDockerManager, UnixHTTPPool
+
+
+class EngineHandler(BaseHTTPRequestHandler):
+    """Just enough of the Engine API for the async backend, with keep-alive."""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/version":
+            return self.send_json(200, {"Version": "24.0.0", "ApiVersion": "1.43"})
+        if url.path == "/containers/json":
+            filters = json.loads(parse_qs(url.query)["filters"][0])
+            if "label" in filters:
+                return self.send_json(200, [{"Id": "a" * 64, "Names": ["/vaultos-aaaaa-one"], "State": "running",
+                                             "Labels": {"app": "vaultOS", "vaultos.os": "ubuntu"}, "Image": "x",
+                                             "Ports": [{"PrivatePort": 3000, "PublicPort": 4001, "Type": "tcp"}]}])
+            return self.send_json(200, [{"Id": "b" * 64, "Names": ["/vaultos-legacy"], "State": "exited",
+                                         "Labels": {}, "Image": "y", "Ports": []}])
+        if url.path == "/events":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in ({"Action": "start", "Actor": {"ID": "c1", "Attributes": {"name": "vaultos-x"}}},
+                          {"Action": "start", "Actor": {"ID": "d2", "Attributes": {"name": "other"}}}):
+                data = json.dumps(event).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_json(404, {"message": "No such container"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.endswith("/stop?t=10") or self.path.endswith("/start"):
+            self.send_response(204)
+            self.end_headers()
+            return
+        self.send_json(404, {"message": "No such container"})
+
+
+class TestAsyncDockerManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "docker.sock")
+        EngineHandler.connections = 0
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, EngineHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    def test_listing_and_info_reuse_pooled_connections(self):
+        async def scenario():
+            dm = AsyncDockerManager(socket_path=self.path, pool_size=2, cache_ttl=0)
+            containers = await dm.get_and_prune_containers()
+            info = await dm.get_system_info(containers)
+            await dm.list_containers(force=True)
+            await dm.aclose()
+            return containers, info
+
+        containers, info = self.run_async(scenario())
+        self.assertEqual(sorted(c.name for c in containers), ["vaultos-aaaaa-one", "vaultos-legacy"])
+        self.assertEqual(info['engine_version'], "24.0.0")
+        self.assertEqual(info['running'], 1)
+        # 5 requests over at most 2 keep-alive connections
+        self.assertLessEqual(EngineHandler.connections, 2)
+
+    def test_registry_prune_follows_can_prune_registry(self):
+        async def scenario(can_prune):
+            dm = AsyncDockerManager(socket_path=self.path)
+            dm.registry = mock.Mock(get=mock.Mock(return_value=None))
+            dm._can_prune_registry = mock.Mock(return_value=can_prune)
+            containers = await dm.get_and_prune_containers()
+            await dm.aclose()
+            dm._can_prune_registry.assert_called_once_with(containers)
+            return dm.registry.prune.called
+
+        self.assertTrue(self.run_async(scenario(True)))
+        self.assertFalse(self.run_async(scenario(False)))
+
+    def test_lifecycle_and_errors(self):
+        async def scenario():
+            dm = AsyncDockerManager(socket_path=self.path)
+            await dm.start_container("a1")
+            await dm.stop_container("a1")
+            self.assertIsNone(await dm.get_container("missing"))
+            with self.assertRaises(RuntimeError):
+                await dm.delete_container("missing")
+            await dm.aclose()
+
+        self.run_async(scenario())
+
+    def test_event_stream_filters_vaultos(self):
+        async def scenario():
+            dm = AsyncDockerManager(socket_path=self.path)
+            events = [e async for e in dm.stream_events()]
+            await dm.aclose()
+            return events
+
+        self.assertEqual(self.run_async(scenario()), [("start", "c1")])
+
+    def test_request_timeout(self):
+        async def scenario():
+            pool = UnixHTTPPool(self.path, timeout=0.2)
+            # A listening socket that accepts but never replies
+            silent = os.path.join(self.tmp.name, "silent.sock")
+            sock = socket.socket(socket.AF_UNIX)
+            sock.bind(silent)
+            sock.listen()
+            pool.path = silent
+            try:
+                with self.assertRaises(TimeoutError):
+                    await pool.request("GET", "/version")
+            finally:
+                sock.close()
+
+        self.run_async(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
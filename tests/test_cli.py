@@ -0,0 +1,142 @@
+import unittest
+import sys
+import os
+import io
+import json
+import subprocess
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docker.models.containers import Container
+from docker_manager import DockerManager, summary_to_attrs
+import vaultos
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def container(cid, name, labels=None, state="running"):
+    labels = dict({'app': 'vaultOS'}, **(labels or {}))
+    return Container(attrs=summary_to_attrs({'Id': cid, 'Names': [f"/{name}"], 'Labels': labels, 'State': state,
+                                             'Image': 'lscr.io/linuxserver/webtop:ubuntu-kde', 'Ports': []}))
+
+
+def run_cli(argv, manager):
+    out = io.StringIO()
+    with mock.patch.object(vaultos, 'connect', return_value=manager), redirect_stdout(out):
+        code = vaultos.main(argv)
+    return code, out.getvalue()
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.manager = DockerManager.__new__(DockerManager)
+        self.manager._init_state(cache_ttl=60)
+        self.manager.registry = mock.Mock(is_claimed=mock.Mock(return_value=False), get=mock.Mock(return_value=None))
+        self.containers = [
+            container("a" * 64, "vaultos-aaaaa-dev", {'vaultos.port': '3001'}),
+            container("b" * 64, "vaultos-bbbbb-tmp", {'vaultos.expires': str(time.time() - 5)}, state="exited"),
+            container("c" * 64, "vaultos-ccccc-pool", {'vaultos.pool': '1'}),
+        ]
+        self.manager.list_containers = mock.Mock(return_value=self.containers)
+        self.manager.delete_container = mock.Mock()
+
+    def test_ls_json(self):
+        code, out = run_cli(["ls", "--json"], self.manager)
+        rows = json.loads(out)
+        self.assertEqual(code, 0)
+        self.assertEqual([r['name'] for r in rows], ["vaultos-aaaaa-dev", "vaultos-bbbbb-tmp"]) # idle pool member hidden
+        self.assertEqual((rows[0]['os'], rows[0]['desktop'], rows[0]['port']), ('ubuntu', 'kde', '3001'))
+
+    def test_prune_removes_only_expired(self):
+        code, out = run_cli(["prune", "--json"], self.manager)
+        self.assertEqual(code, 0)
+        self.assertEqual([r['id'] for r in json.loads(out)], ["b" * 64])
+        self.manager.delete_container.assert_called_once_with("b" * 64)
+
+    def test_reap_sees_pool_claim_deadlines(self):
+        # A claimed pool desktop has no expiry label; its deadline is in the registry
+        claim = {'name': 'dev', 'expires': time.time() - 5}
+        self.manager.registry.get = mock.Mock(side_effect=lambda cid: claim if cid == "c" * 64 else None)
+        scheduled = {}
+
+        def run(reaper):
+            reaper.sync()
+            scheduled.update(reaper._deadlines)
+            raise KeyboardInterrupt
+
+        with mock.patch('reaper.ExpiryReaper.run', run), mock.patch('reaper.ExpiryReaper.follow_events') as follow:
+            code, _ = run_cli(["reap"], self.manager)
+        self.assertEqual(code, 0)
+        follow.assert_called_once_with() # New desktops are scheduled from events between resyncs
+        self.assertEqual(scheduled["c" * 64], claim['expires'])
+
+    def test_create_one_without_port_keeps_its_name(self):
+        self.manager.bound_host_ports = mock.Mock(return_value={3000, 3001})
+        self.manager.create_container = mock.Mock(return_value="d" * 64)
+        self.manager.get_container = mock.Mock(return_value=container("d" * 64, "vaultos-ddddd-dev", {'vaultos.port': '3002'}))
+        with mock.patch('config.BATCH_PORT_RANGE', (3000, 3010)):
+            code, out = run_cli(["create", "dev", "--json"], self.manager)
+        self.assertEqual(code, 0)
+        config = self.manager.create_container.call_args.args[0]
+        self.assertEqual((config['name'], config['port']), ("dev", 3002))
+        self.assertEqual(json.loads(out), {'id': "d" * 64, 'port': '3002'})
+
+    def test_ls_fleet_has_host_column(self):
+        self.manager.host_name = mock.Mock(return_value="build1")
+        code, out = run_cli(["ls"], self.manager)
+        header, first = out.splitlines()[:2]
+        self.assertEqual(code, 0)
+        self.assertEqual(header.split()[-2:], ["EXPIRES", "HOST"])
+        self.assertEqual(first.index("build1"), header.index("HOST"))
+
+    def test_prefetch_and_pool_use_connect(self):
+        self.manager.image_exists = mock.Mock(return_value=True)
+        self.manager.resolve_image = mock.Mock(side_effect=lambda os_name, desktop: f"webtop:{os_name}-{desktop}")
+        code, out = run_cli(["prefetch", "--status"], self.manager)
+        self.assertEqual(code, 0)
+        self.assertTrue(out.startswith("warm"))
+        self.manager.create_batch = mock.Mock(return_value={'results': [{'name': 'pool-1', 'port': 5000, 'id': 'p'}]})
+        targets = {('ubuntu', 'kde'): 1}
+        with mock.patch('config.WARM_POOL', targets), mock.patch('pool.WARM_POOL', targets):
+            code, out = run_cli(["pool"], self.manager)
+        self.assertEqual(code, 0)
+        self.assertIn("1 created", out)
+
+    def test_lifecycle_reports_failures(self):
+        def stop(cid, timeout):
+            if cid == "b" * 64:
+                raise RuntimeError("Failed to stop container: gone")
+
+        self.manager.stop_container = mock.Mock(side_effect=stop)
+        code, out = run_cli(["stop", "vaultos-aaaaa-dev", "bbbb", "--json", "--timeout", "3"], self.manager)
+        self.assertEqual(code, 1)
+        self.assertEqual([(r['id'], r['ok']) for r in json.loads(out)], [("a" * 64, True), ("b" * 64, False)])
+        self.manager.stop_container.assert_any_call("a" * 64, timeout=3)
+
+    def test_lifecycle_refuses_other_containers(self):
+        # The daemon would resolve "postgres" too; only listed VaultOS desktops are touched
+        code, out = run_cli(["rm", "postgres", "vaultos-", "--json"], self.manager)
+        self.assertEqual(code, 1)
+        self.assertEqual([r['error'] for r in json.loads(out)],
+                         ["no such VaultOS desktop", "no such VaultOS desktop"])
+        self.manager.delete_container.assert_not_called()
+
+        self.containers.append(container("a" * 12 + "f" * 52, "vaultos-fffff-other"))
+        code, out = run_cli(["rm", "aaaa", "--json"], self.manager)
+        self.assertEqual(json.loads(out)[0]['error'], "ambiguous, matches 2 desktops")
+        self.manager.delete_container.assert_not_called()
+
+    def test_cli_and_tui_imports_stay_lazy(self):
+        # The CLI never loads Textual; the TUI module loads docker-py only once the app starts
+        # `ls` lists over the raw socket, without docker-py
+        check = ("import sys, vaultos; vaultos.build_parser(); assert 'textual' not in sys.modules;"
+                 "import main, docker_socket; assert 'docker' not in sys.modules")
+        subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.container_table import Column, TableIndex
+from main import expiry_sort_key, port_sort_key
+
+
+def make_index():
+    columns = [
+        Column("name", "Name", 20, indexed=True),
+        Column("status", "Status", 8, indexed=True),
+        Column("port", "Port", 6, indexed=True, sort_key=port_sort_key),
+        Column("expires", "Expires", 12, indexed=True, sort_key=expiry_sort_key),
+        Column("cpu", "CPU", 5, sort_key=None),
+    ]
+    index = TableIndex(columns)
+    index.put("a", ("web-ubuntu", "running", "3002", "00:01:00:00", ""))
+    index.put("b", ("db-alpine", "exited", "3001", "No Expire", ""))
+    index.put("c", ("ci-ubuntu", "running", "N/A", "Expired", ""))
+    return index
+
+
+class TestTableIndex(unittest.TestCase):
+    def test_search_matches_every_word_in_indexed_columns(self):
+        index = make_index()
+        index.search("ubuntu")
+        self.assertEqual(index.view(), ["a", "c"])
+        index.search("ubuntu 3002")
+        self.assertEqual(index.view(), ["a"])
+        index.search("")
+        self.assertEqual(index.view(), ["a", "b", "c"])
+
+    def test_typing_narrows_previous_matches(self):
+        index = make_index()
+        index.search("u")
+        self.assertEqual(index.view(), ["a", "c"])
+        # Rows outside the previous matches are not looked at again
+        index._text["b"] = "ubuntu"
+        index.search("ub")
+        self.assertEqual(index.view(), ["a", "c"])
+        # Deleting a character searches everything again
+        index.search("u")
+        self.assertEqual(index.view(), ["a", "b", "c"])
+
+    def test_sort_keys(self):
+        index = make_index()
+        index.sort(2)
+        self.assertEqual(index.view(), ["c", "b", "a"]) # N/A, 3001, 3002
+        index.sort(3)
+        self.assertEqual(index.view(), ["c", "a", "b"]) # Expired, countdown, none
+        index.sort(3, reverse=True)
+        self.assertEqual(index.view(), ["b", "a", "c"])
+
+    def test_expiry_sorts_numerically(self):
+        values = ['100:00:00:05', 'No Expire', '99:00:00:00', 'Expired', '00:00:00:09', '00:00:01:00']
+        self.assertEqual(sorted(values, key=expiry_sort_key),
+                         ['Expired', '00:00:00:09', '00:00:01:00', '99:00:00:00', '100:00:00:05', 'No Expire'])
+
+    def test_updates_only_invalidate_view_when_rows_can_move(self):
+        index = make_index()
+        index.search("running")
+        index.sort(0)
+        view = index.view()
+        # CPU is neither searched nor sorted
+        self.assertFalse(index.put("a", ("web-ubuntu", "running", "3002", "00:01:00:00", "5%")))
+        self.assertIs(index.view(), view)
+        # A status change drops the row from the search
+        self.assertTrue(index.put("a", ("web-ubuntu", "exited", "3002", "00:01:00:00", "5%")))
+        self.assertEqual(index.view(), ["c"])
+        index.remove("c")
+        self.assertEqual(index.view(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docker.models.containers import Container
+from docker_manager import DockerManager, summary_to_attrs, allocate_ports, batch_configs, custom_image_tag, build_context
+
+
+def make_manager(client):
+    # Bypass docker.from_env() so tests never need a daemon
+    dm = DockerManager.__new__(DockerManager)
+    dm.client = client
+    dm._init_state(cache_ttl=60)
+    # prepare_model just wraps the attrs, like docker-py's collection does
+    client.containers.prepare_model.side_effect = lambda attrs: Container(attrs=attrs)
+    return dm
+
+
+def summary(cid, name, labels=None, state="running", port=None):
+    ports = [{'PrivatePort': 3000, 'Type': 'tcp'}]
+    if port:
+        ports = [{'IP': '0.0.0.0', 'PrivatePort': 3000, 'PublicPort': port, 'Type': 'tcp'}]
+    return {'Id': cid, 'Names': [f"/{name}"], 'Labels': labels or {}, 'State': state,
+            'Image': 'lscr.io/linuxserver/webtop:latest', 'Ports': ports}
+
+
+def fake_container(cid, name, labels=None, status="running"):
+    c = mock.Mock()
+    c.id = cid
+    c.name = name
+    c.labels = labels or {}
+    c.status = status
+    return c
+
+
+class TestListContainers(unittest.TestCase):
+    def test_filters_pushed_to_daemon_and_merged(self):
+        labelled = summary("a1", "vaultos-aaaaa-one", {'app': 'vaultOS'})
+        legacy = summary("b2", "vaultos-legacy")
+        lookalike = summary("c3", "my-vaultos-thing")
+
+        client = mock.Mock()
+
+        def list_side_effect(all=False, filters=None, **kwargs):
+            if filters == {'label': 'app=vaultOS'}:
+                return [labelled]
+            if filters == {'name': 'vaultos-'}:
+                return [labelled, legacy, lookalike]
+            raise AssertionError(f"unexpected filters: {filters}")
+
+        client.api.containers.side_effect = list_side_effect
+        dm = make_manager(client)
+
+        result = dm.list_containers()
+        self.assertEqual([c.id for c in result], ["a1", "b2"])
+        self.assertEqual(result[1].name, "vaultos-legacy")
+        for call in client.api.containers.call_args_list:
+            self.assertIsNotNone(call.kwargs.get('filters'))
+
+    def test_system_info_reuses_given_list(self):
+        client = mock.Mock()
+        client.version.return_value = {'Version': '24.0', 'ApiVersion': '1.43'}
+        dm = make_manager(client)
+
+        containers = [fake_container("a1", "vaultos-a"), fake_container("b2", "vaultos-b", status="exited")]
+        info = dm.get_system_info(containers)
+        self.assertEqual((info['total'], info['running'], info['stopped']), (2, 1, 1))
+        client.api.containers.assert_not_called()
+
+    def test_summary_reshaped_like_inspect(self):
+        attrs = summary_to_attrs(summary("a1", "vaultos-x", {'app': 'vaultOS'}, port=4001))
+        c = Container(attrs=attrs)
+        self.assertEqual(c.name, "vaultos-x")
+        self.assertEqual(c.labels, {'app': 'vaultOS'})
+        self.assertEqual(c.status, "running")
+        self.assertEqual(c.attrs['NetworkSettings']['Ports']['3000/tcp'][0]['HostPort'], "4001")
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.api.containers.return_value = [summary("a1", "vaultos-a", {'app': 'vaultOS'})]
+        self.client.version.return_value = {'Version': '24.0', 'ApiVersion': '1.43'}
+        self.dm = make_manager(self.client)
+
+    def test_refresh_cycle_reuses_snapshot(self):
+        containers = self.dm.get_and_prune_containers()
+        self.dm.get_system_info()
+        self.dm.get_system_info(containers)
+        # Two filtered list requests, done once; version fetched once
+        self.assertEqual(self.client.api.containers.call_count, 2)
+        self.assertEqual(self.client.version.call_count, 1)
+
+    def test_failed_listing_reports_disconnected(self):
+        containers = self.dm.get_and_prune_containers()
+        self.assertTrue(self.dm.get_system_info(containers)['connected'])
+        # Daemon gone after connecting: the version is cached, the listing is not
+        self.client.api.containers.side_effect = ConnectionError("daemon down")
+        self.client.version.side_effect = ConnectionError("daemon down")
+        self.dm.cache_ttl = 0
+        containers = self.dm.get_and_prune_containers()
+        self.assertEqual(containers, [])
+        self.assertFalse(self.dm.get_system_info(containers)['connected'])
+        self.assertFalse(self.dm.get_system_info()['connected'])
+
+    def test_lifecycle_uses_snapshot_and_invalidates(self):
+        self.dm.list_containers()
+        with mock.patch.object(Container, 'stop') as stop:
+            self.dm.stop_container("a1")
+            stop.assert_called_once()
+        self.client.containers.get.assert_not_called()
+        self.dm.list_containers()
+        self.assertEqual(self.client.api.containers.call_count, 4)
+
+
+class TestEvents(unittest.TestCase):
+    def test_stream_events_keeps_vaultos_containers_only(self):
+        events = [
+            {'Action': 'start', 'Actor': {'ID': 'a1', 'Attributes': {'name': 'web', 'app': 'vaultOS'}}},
+            {'Action': 'die', 'Actor': {'ID': 'b2', 'Attributes': {'name': 'postgres'}}},
+            {'Action': 'destroy', 'Actor': {'ID': 'c3', 'Attributes': {'name': 'vaultos-legacy'}}},
+        ]
+        client = mock.Mock()
+        client.events.return_value = iter(events)
+        dm = make_manager(client)
+
+        self.assertEqual(list(dm.stream_events()), [('start', 'a1'), ('destroy', 'c3')])
+        filters = client.events.call_args.kwargs['filters']
+        self.assertEqual(filters['type'], 'container')
+
+
+class TestContainerDetails(unittest.TestCase):
+    def test_labels_need_no_api_calls(self):
+        client = mock.Mock()
+        dm = make_manager(client)
+        labels = {'app': 'vaultOS', 'vaultos.os': 'ubuntu', 'vaultos.desktop': 'kde', 'vaultos.port': '4001'}
+        c = Container(attrs=summary_to_attrs(summary("a1", "vaultos-a", labels, state="exited")))
+        self.assertEqual(dm.container_details(c), ('ubuntu', 'kde', '4001'))
+        client.images.get.assert_not_called()
+
+    def test_legacy_container_falls_back_to_memoized_image_lookup(self):
+        client = mock.Mock()
+        client.images.get.return_value.tags = ["lscr.io/linuxserver/webtop:amd64-fedora-mate"]
+        dm = make_manager(client)
+        attrs = summary("a1", "vaultos-old", port=4002)
+        attrs['Image'] = 'sha256:abc'
+        attrs['ImageID'] = 'sha256:abc'
+        c = Container(attrs=summary_to_attrs(attrs))
+
+        self.assertEqual(dm.container_details(c), ('fedora', 'mate', '4002'))
+        dm.container_details(c)
+        client.images.get.assert_called_once_with('sha256:abc')
+
+
+class TestBatch(unittest.TestCase):
+    def test_allocate_ports_skips_bound(self):
+        self.assertEqual(allocate_ports({4000, 4002}, 3, (4000, 4999)), [4001, 4003, 4004])
+        with self.assertRaises(RuntimeError):
+            allocate_ports({4000}, 2, (4000, 4001))
+
+    def test_batch_configs_names(self):
+        configs = batch_configs({'name': 'lab', 'type': 'default'}, list(range(4000, 4012)))
+        self.assertEqual(configs[0]['name'], 'lab-01')
+        self.assertEqual(configs[11]['port'], 4011)
+
+    def test_create_batch_reports_per_desktop(self):
+        client = mock.Mock()
+        client.api.containers.return_value = [{'Ports': [{'PrivatePort': 3000, 'PublicPort': 4000}]}]
+        dm = make_manager(client)
+        dm.list_containers = mock.Mock(return_value=[])
+
+        def run(image, name, ports, **kwargs):
+            if ports['3000/tcp'] == 4002:
+                raise RuntimeError("port is already allocated")
+            return mock.Mock(id=f"id-{name}")
+
+        client.containers.run.side_effect = run
+        messages = []
+        batch = dm.create_batch({'name': 'lab', 'type': 'default'}, 3, (4000, 4999), workers=3,
+                                progress_callback=messages.append)
+
+        results = batch['results']
+        self.assertEqual([r['port'] for r in results], [4001, 4002, 4003])
+        self.assertEqual(sum('error' in r for r in results), 1)
+        self.assertIn('elapsed', batch)
+        # Image resolved once, not per desktop
+        self.assertEqual(client.images.get.call_count, 1)
+        self.assertEqual(len(messages), 3)
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        import docker
+        self.client = mock.Mock()
+        self.local = {'base': mock.Mock(id="sha256:base1")}
+        def get(name):
+            if name not in self.local:
+                raise docker.errors.ImageNotFound(name)
+            return self.local[name]
+        def build(fileobj, tag, rm, custom_context):
+            self.local[tag] = mock.Mock()
+            return self.local[tag], []
+        self.client.images.get.side_effect = get
+        self.client.images.build.side_effect = build
+        self.dm = make_manager(self.client)
+
+    def test_tag_is_content_addressed(self):
+        self.assertEqual(custom_image_tag("sha256:a", "bob"), custom_image_tag("sha256:a", "bob"))
+        self.assertNotEqual(custom_image_tag("sha256:a", "bob"), custom_image_tag("sha256:b", "bob"))
+        self.assertTrue(custom_image_tag("sha256:a", "bob").startswith("vaultos-custom-bob:"))
+
+    def test_repeat_build_is_a_hit(self):
+        first = self.dm.build_custom_image('base', 'bob')
+        second = self.dm.build_custom_image('base', 'bob')
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.images.build.call_count, 1)
+        self.assertEqual(self.dm.build_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_new_base_digest_rebuilds(self):
+        first = self.dm.build_custom_image('base', 'bob')
+        self.local['base'] = mock.Mock(id="sha256:base2")
+        self.assertNotEqual(self.dm.build_custom_image('base', 'bob'), first)
+        self.assertEqual(self.client.images.build.call_count, 2)
+
+    def test_runtime_users_share_one_image(self):
+        self.dm.resolve_image = mock.Mock(return_value='base')
+        config = {'name': 'dev', 'port': 3001, 'type': 'persistent', 'advanced': True, 'user_mode': 'runtime'}
+        images = []
+        for user in ('bob', 'carol'):
+            plan = self.dm.plan_container(dict(config, username=user))
+            self.assertEqual(plan['environment']['VAULTOS_USER'], user)
+            images.append(self.dm.prepare_image(plan))
+        self.assertEqual(images[0], images[1])
+        self.assertTrue(images[0].startswith("vaultos-userinit:"))
+        self.assertEqual(self.client.images.build.call_count, 1)
+
+    def test_build_context_holds_hook(self):
+        import io
+        import tarfile
+        data = build_context({'Dockerfile': 'FROM x\n', 'vaultos-userinit.sh': '#!/bin/sh\n'})
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            self.assertEqual(sorted(tar.getnames()), ['Dockerfile', 'vaultos-userinit.sh'])
+
+
+if __name__ == '__main__':
+    unittest.main()
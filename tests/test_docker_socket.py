@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from fake_engine import FakeEngine
+from docker_manager import DockerManager
+from docker_socket import SocketDockerManager, get_json
+
+
+class TestSocketDockerManager(unittest.TestCase):
+    def setUp(self):
+        self.engine = FakeEngine(containers=30).start()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_listing_matches_docker_py(self):
+        light = SocketDockerManager(socket_path=self.engine.path)
+        full = DockerManager(base_url=self.engine.url)
+
+        def describe(manager):
+            return sorted((c.id, c.name, c.status, c.labels, manager.container_details(c))
+                          for c in manager.list_containers())
+
+        self.assertEqual(len(light.list_containers()), 30)
+        self.assertEqual(describe(light), describe(full))
+
+    def test_errors_and_missing_socket(self):
+        with self.assertRaises(RuntimeError):
+            get_json(self.engine.path, "/containers/missing/json")
+        with self.assertRaises(RuntimeError):
+            SocketDockerManager(socket_path=os.path.join(ROOT, "no-such.sock"))
+
+
+if __name__ == '__main__':
+    unittest.main()
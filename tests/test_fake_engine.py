@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from fake_engine import FakeEngine
+from docker_manager import DockerManager
+
+
+class TestFakeEngine(unittest.TestCase):
+    """The benchmark's stand-in daemon must behave enough like Docker for DockerManager."""
+    def setUp(self):
+        self.engine = FakeEngine(containers=40).start()
+        with mock.patch.dict(os.environ, {'DOCKER_HOST': self.engine.url}):
+            self.dm = DockerManager(cache_ttl=0)
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_listing_uses_two_filtered_calls(self):
+        self.engine.reset_calls()
+        containers = self.dm.list_containers()
+        self.assertEqual(len(containers), 40) # Unrelated containers filtered out by the "daemon"
+        self.assertEqual(dict(self.engine.calls), {'GET /containers/json': 2})
+        self.assertEqual(self.dm.container_details(containers[1]), ('ubuntu', 'kde', '10001'))
+
+    def test_create_pulls_then_runs(self):
+        self.engine.forget_images()
+        self.engine.reset_calls()
+        cid = self.dm.create_container({'name': 'bench', 'port': 30000, 'type': 'default'},
+                                       progress_callback=lambda msg: None)
+        self.assertEqual(self.engine.calls['POST /images/create'], 1)
+        self.assertEqual(self.engine.find(cid)['state'], 'running')
+        self.dm.delete_container(cid)
+        self.assertIsNone(self.engine.find(cid))
+
+    def test_bulk_stop_runs_in_parallel(self):
+        self.engine.stop_seconds = 0.3
+        running = [c.id for c in self.dm.list_containers() if c.status == 'running'][:12]
+        progress = []
+        batch = self.dm.bulk_action('stop', running, workers=16, progress_callback=progress.append)
+        # Twelve 0.3s graceful stops finish in about the time of one
+        self.assertLess(batch['elapsed'], 1.5)
+        self.assertEqual(len(progress), 12)
+        self.assertTrue(all('error' not in r for r in batch['results']))
+        self.assertTrue(all(self.engine.find(cid)['state'] == 'exited' for cid in running))
+
+    def test_bulk_stop_timeout_caps_graceful_wait(self):
+        self.engine.stop_seconds = 5
+        cid = next(c.id for c in self.dm.list_containers() if c.status == 'running')
+        batch = self.dm.bulk_action('stop', [cid], stop_timeout=0)
+        self.assertLess(batch['elapsed'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path so we can import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from fake_engine import FakeEngine
+from fleet import FleetManager, parse_hosts
+
+
+class TestParseHosts(unittest.TestCase):
+    def test_urls_and_tls_entries(self):
+        hosts = parse_hosts({'local': "unix:///var/run/docker.sock",
+                             'build2': {'url': "tcp://build2:2376", 'tls': True}})
+        self.assertEqual([(h.name, h.url, h.tls) for h in hosts],
+                         [('local', "unix:///var/run/docker.sock", None), ('build2', "tcp://build2:2376", True)])
+
+
+class TestFleetManager(unittest.TestCase):
+    def setUp(self):
+        self.a = FakeEngine(containers=8, seed='a').start()
+        self.b = FakeEngine(containers=4, seed='b').start()
+        self.fleet = FleetManager({'a': self.a.url, 'b': self.b.url}, cache_ttl=0, timeout=0.5)
+
+    def tearDown(self):
+        self.a.stop()
+        self.b.stop()
+
+    def test_listing_merges_hosts(self):
+        containers = self.fleet.list_containers()
+        self.assertEqual(len(containers), 12)
+        hosts = [self.fleet.host_name(c) for c in containers]
+        self.assertEqual((hosts.count('a'), hosts.count('b')), (8, 4))
+        info = self.fleet.get_system_info(containers)
+        self.assertEqual(info['total'], 12)
+        self.assertEqual(info['hosts'], {'a': None, 'b': None})
+
+    def test_operations_go_to_the_owning_host(self):
+        target = next(c for c in self.fleet.list_containers() if self.fleet.host_name(c) == 'b')
+        self.fleet.stop_container(target.id)
+        self.assertEqual(self.b.find(target.id)['state'], 'exited')
+        self.assertEqual(self.a.calls['POST /containers/{id}/stop'], 0)
+
+    def test_create_goes_to_least_loaded_or_chosen_host(self):
+        self.fleet.list_containers()
+        cid = self.fleet.create_container({'name': 'x', 'port': 30000, 'type': 'default'},
+                                            progress_callback=lambda msg: None)
+        self.assertIsNotNone(self.b.find(cid)) # b runs fewer desktops
+        cid = self.fleet.create_container({'name': 'y', 'port': 30001, 'type': 'default', 'host': 'a'},
+                                            progress_callback=lambda msg: None)
+        self.assertIsNotNone(self.a.find(cid))
+
+    def test_slow_host_does_not_stall_the_others(self):
+        self.fleet.list_containers()
+        self.b.latency = 2.0
+        started = time.monotonic()
+        containers = self.fleet.list_containers()
+        self.assertLess(time.monotonic() - started, 1.5)
+        # b keeps its last listing and is reported as not answering
+        self.assertEqual(len(containers), 12)
+        self.assertIsNotNone(self.fleet.host_status()['b'])
+        self.assertIsNone(self.fleet.host_status()['a'])
+        self.assertEqual(self.fleet.least_loaded_host(), 'a')
+        self.b.latency = 0.0
+
+
+if __name__ == '__main__':
+    unittest.main()
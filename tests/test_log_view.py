@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textual.app import App
+from ui.log_view import LogBuffer
+from ui.modals import LogViewerModal
+
+
+class TestLogBuffer(unittest.TestCase):
+    def test_partial_lines_wait_for_newline(self):
+        buffer = LogBuffer(capacity=10)
+        buffer.feed(b"first li")
+        self.assertEqual(buffer.drain(), [])
+        buffer.feed(b"ne\nsecond\n")
+        self.assertEqual(buffer.drain(), ["first line", "second"])
+        buffer.feed("tail without newline")
+        buffer.flush()
+        self.assertEqual(buffer.drain(), ["tail without newline"])
+
+    def test_capacity_bounds_lines_and_counts_dropped(self):
+        buffer = LogBuffer(capacity=3)
+        for i in range(5):
+            buffer.feed(f"line {i}\n")
+        buffer.drain()
+        self.assertEqual(list(buffer.lines), ["line 2", "line 3", "line 4"])
+        self.assertEqual(buffer.dropped, 2)
+
+    def test_burst_between_frames_stays_bounded(self):
+        buffer = LogBuffer(capacity=100)
+        buffer.feed("".join(f"{i}\n" for i in range(10000)).encode())
+        added = buffer.drain()
+        self.assertEqual(len(added), 100)
+        self.assertEqual(added[-1], "9999")
+        self.assertEqual(len(buffer.lines), 100)
+        self.assertEqual(buffer.dropped, 9900)
+
+    def test_escapes_and_carriage_returns_stripped(self):
+        buffer = LogBuffer()
+        buffer.feed(b"\x1b[32m[ok]\x1b[0m\tstarted\r\n\xff\n")
+        self.assertEqual(buffer.drain(), ["[ok]    started", "�"])
+
+
+
+class TestLogViewerModal(unittest.IsolatedAsyncioTestCase):
+    async def test_stream_opened_after_close_is_closed(self):
+        connecting = threading.Event()
+        release = threading.Event()
+        stream = mock.MagicMock()
+
+        def stream_logs(container_id):
+            connecting.set()
+            release.wait(5)
+            return stream
+
+        manager = mock.Mock(stream_logs=stream_logs)
+        app = App()
+        async with app.run_test() as pilot:
+            modal = LogViewerModal(manager, "a" * 64, "box")
+            await app.push_screen(modal)
+            self.assertTrue(connecting.wait(5))
+            # Closed before the daemon answered
+            app.pop_screen()
+            await pilot.pause()
+            release.set()
+            deadline = time.monotonic() + 5
+            while not stream.close.called and time.monotonic() < deadline:
+                await pilot.pause(0.02)
+        stream.close.assert_called_once()
+        stream.__iter__.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
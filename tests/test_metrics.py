@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import tempfile
+import urllib.request
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics, endpoint_name, instrument_session
+
+
+class TestEndpointName(unittest.TestCase):
+    def test_ids_and_names_folded(self):
+        self.assertEqual(endpoint_name("GET", "/v1.43/containers/json?all=1"), "GET /containers/json")
+        self.assertEqual(endpoint_name("POST", "/v1.43/containers/3f2a9c/stop?t=10"), "POST /containers/{id}/stop")
+        self.assertEqual(endpoint_name("DELETE", "/containers/vaultos-abcde-dev"), "DELETE /containers/{id}")
+        self.assertEqual(endpoint_name("GET", "/images/lscr.io/linuxserver/webtop:latest/json"),
+                         "GET /images/{name}/json")
+        self.assertEqual(endpoint_name("POST", "/images/create?fromImage=x"), "POST /images/create")
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        for seconds in (0.001, 0.002, 0.03, 0.2):
+            self.metrics.observe("GET /containers/json", seconds, 200)
+        self.metrics.observe("GET /images/{name}/json", 0.001, 404)
+        self.metrics.observe("GET /containers/json", 10.5) # Connection failure
+
+    def test_counts_and_errors(self):
+        stats = self.metrics.snapshot()["GET /containers/json"]
+        self.assertEqual((stats.count, stats.errors, stats.client_errors), (5, 1, 0))
+        self.assertEqual(self.metrics.snapshot()["GET /images/{name}/json"].client_errors, 1)
+        self.assertEqual(stats.quantile(0.5), 0.05)
+        self.assertIsNone(stats.quantile(0.99)) # Past the last bucket
+
+    def test_prometheus_text(self):
+        text = self.metrics.render_prometheus()
+        self.assertIn('vaultos_docker_requests_total{endpoint="GET /containers/json"} 5', text)
+        self.assertIn('vaultos_docker_request_duration_seconds_bucket{endpoint="GET /containers/json",le="0.005"} 2',
+                      text)
+        self.assertIn('vaultos_docker_request_duration_seconds_bucket{endpoint="GET /containers/json",le="+Inf"} 5',
+                      text)
+
+    def test_dump_and_serve(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "vaultos.prom")
+            self.metrics.dump(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), self.metrics.render_prometheus())
+
+        server = self.metrics.serve(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertIn(b"vaultos_docker_requests_total", response.read())
+        finally:
+            server.shutdown()
+
+    def test_instrument_session(self):
+        session = mock.Mock()
+        session.send.return_value = mock.Mock(status_code=204)
+        metrics = Metrics()
+        instrument_session(session, metrics)
+        session.send(mock.Mock(method="POST", path_url="/v1.43/containers/abc/start"))
+        self.assertEqual(metrics.snapshot()["POST /containers/{id}/start"].count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
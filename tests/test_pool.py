@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docker.models.containers import Container
+from docker_manager import DockerManager, summary_to_attrs
+from pool import WarmPool
+from registry import Registry
+
+
+def member(cid, os_name="alpine", desktop="xfce", state="running"):
+    labels = {'app': 'vaultOS', 'vaultos.pool': '1', 'vaultos.os': os_name, 'vaultos.desktop': desktop}
+    return Container(attrs=summary_to_attrs({'Id': cid, 'Names': [f"/vaultos-{cid}-pool"], 'Labels': labels,
+                                             'State': state, 'Image': 'x', 'Ports': []}))
+
+
+class TestWarmPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = Registry(os.path.join(self.tmp.name, "registry.json"))
+        self.manager = DockerManager.__new__(DockerManager)
+        self.manager._init_state(cache_ttl=60)
+        self.manager.registry = self.registry
+        self.containers = [member("m1"), member("m2", state="exited")]
+        self.manager.list_containers = lambda force=False, strict=False: list(self.containers)
+        self.manager.create_batch = mock.Mock(return_value={'results': [{'id': 'new'}], 'elapsed': 0.1})
+        self.pool = WarmPool(self.manager, self.registry, targets={('alpine', 'xfce'): 1})
+        self.pool.refill_in_background = mock.Mock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_claim_is_a_registry_update(self):
+        cid = self.pool.claim({'name': 'alice', 'type': 'ephemeral', 'os': 'alpine', 'desktop': 'xfce', 'timer': '1h'})
+        self.assertEqual(cid, "m1")
+        self.assertFalse(self.manager.is_idle_pool_member(self.containers[0]))
+        self.assertEqual(self.manager.display_name(self.containers[0]), "alice (pool)")
+        self.assertIsNotNone(self.manager.container_expiry(self.containers[0]))
+        self.pool.refill_in_background.assert_called_once()
+        self.manager.create_batch.assert_not_called()
+
+        # Persisted for other VaultOS processes
+        self.assertTrue(Registry(self.registry.path).is_claimed("m1"))
+
+    def test_empty_pool_falls_through(self):
+        self.registry.claim("m1", "someone")
+        self.assertIsNone(self.pool.claim({'name': 'bob', 'type': 'ephemeral', 'os': 'alpine', 'desktop': 'xfce'}))
+        self.assertIsNone(self.pool.claim({'name': 'bob', 'type': 'ephemeral', 'os': 'ubuntu', 'desktop': 'kde'}))
+
+    def test_refill_creates_only_the_shortfall(self):
+        self.pool.refill()
+        self.manager.create_batch.assert_not_called()
+        self.registry.claim("m1", "someone")
+        self.pool.refill()
+        config, count, port_range = self.manager.create_batch.call_args.args
+        self.assertEqual(count, 1)
+        self.assertTrue(config['pool'])
+
+    def test_idle_members_hidden_from_dashboard_list(self):
+        self.manager.reaper = None
+        self.assertEqual(self.manager.get_and_prune_containers(), [])
+        self.registry.claim("m2", "carol")
+        self.assertEqual([c.id for c in self.manager.get_and_prune_containers()], ["m2"])
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docker_manager import DockerManager
+from prefetch import ImagePrefetcher
+
+class FakeManager:
+    resolve_image = DockerManager.resolve_image
+    _get_architecture = DockerManager._get_architecture
+
+    def __init__(self, local=()):
+        self.local = set(local)
+        self.pulled = []
+        self.lock = threading.Lock()
+
+    def image_exists(self, image):
+        return image in self.local
+
+    def pull_image(self, image, on_chunk=None):
+        on_chunk({'status': 'Downloading', 'id': 'layer1', 'progressDetail': {'current': 500, 'total': 1000}})
+        on_chunk({'status': 'Downloading', 'id': 'layer1', 'progressDetail': {'current': 1000, 'total': 1000}})
+        with self.lock:
+            self.pulled.append(image)
+            self.local.add(image)
+
+class TestImagePrefetcher(unittest.TestCase):
+    def test_pulls_only_missing_images_once(self):
+        manager = FakeManager(local={"lscr.io/linuxserver/webtop:latest"})
+        prefetcher = ImagePrefetcher(manager, parallel=3)
+        images = {image for _, _, image in prefetcher.matrix()}
+
+        results = prefetcher.run()
+        self.assertEqual(sorted(manager.pulled), sorted(images - {"lscr.io/linuxserver/webtop:latest"}))
+        self.assertTrue(all(error is None for error in results.values()))
+        self.assertTrue(all(prefetcher.warm_status().values()))
+        self.assertEqual(prefetcher._bytes, 1000 * len(manager.pulled))
+
+    def test_warm_status_reports_cold_combinations(self):
+        prefetcher = ImagePrefetcher(FakeManager(local={"lscr.io/linuxserver/webtop:latest"}))
+        status = prefetcher.warm_status()
+        self.assertTrue(status[('alpine', 'xfce')])
+        self.assertFalse(status[('ubuntu', 'kde')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pull_progress import PullProgress, PullSnapshot
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def downloading(layer_id, current, total):
+    return {'status': 'Downloading', 'id': layer_id, 'progressDetail': {'current': current, 'total': total}}
+
+
+class TestPullProgress(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.progress = PullProgress("img", hz=10, clock=self.clock)
+
+    def test_updates_coalesced_to_rate(self):
+        snapshots = [self.progress.update(downloading('a', i, 1000)) for i in range(1, 101)]
+        self.assertEqual(sum(s is not None for s in snapshots), 1)
+        self.clock.now += 0.15
+        self.assertIsInstance(self.progress.update(downloading('a', 200, 1000)), PullSnapshot)
+
+    def test_aggregates_layers_with_rate_and_eta(self):
+        self.progress.update({'status': 'Pulling from linuxserver/webtop', 'id': 'latest'})
+        self.progress.update({'status': 'Already exists', 'id': 'base'})
+        self.progress.update(downloading('a', 0, 4000))
+        self.progress.update(downloading('b', 0, 6000))
+        self.clock.now += 2
+        self.progress.update(downloading('a', 4000, 4000))
+        self.progress.update({'status': 'Download complete', 'id': 'a'})
+        self.progress.update(downloading('b', 1000, 6000))
+
+        snap = self.progress.snapshot()
+        self.assertEqual((snap.current, snap.total), (5000, 10000))
+        self.assertEqual((snap.layers_done, snap.layers), (2, 3))
+        self.assertAlmostEqual(snap.rate, 2500)
+        self.assertAlmostEqual(snap.eta, 2)
+        self.assertEqual([layer[0] for layer in snap.slowest], ['b'])
+        self.assertIn("(2/3 layers)", str(snap))
+
+    def test_no_eta_until_sizes_known(self):
+        self.progress.update({'status': 'Pulling fs layer', 'id': 'a'})
+        self.progress.update(downloading('b', 0, 100))
+        self.clock.now += 1
+        self.progress.update(downloading('b', 50, 100))
+        self.assertIsNone(self.progress.snapshot().eta)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reaper import ExpiryReaper
+
+class FakeManager:
+    def __init__(self, containers=()):
+        self.containers = list(containers)
+        self.removed = []
+        self.done = threading.Event()
+
+    def list_containers(self):
+        return self.containers
+
+    def container_expiry(self, c):
+        return float(c.labels['vaultos.expires'])
+
+    def delete_container(self, cid):
+        self.removed.append((cid, time.time()))
+        self.done.set()
+
+class TestExpiryReaper(unittest.TestCase):
+    def test_removes_at_deadline_not_before(self):
+        now = time.time()
+        c = mock.Mock(id="a1", labels={'vaultos.expires': str(now + 0.3)})
+        keep = mock.Mock(id="b2", labels={'vaultos.expires': str(now + 3600)})
+        manager = FakeManager([c, keep])
+        reaper = ExpiryReaper(manager, workers=2, resync_interval=60)
+        reaper.start()
+        try:
+            self.assertTrue(manager.done.wait(5))
+        finally:
+            reaper.stop()
+        self.assertEqual([cid for cid, _ in manager.removed], ["a1"])
+        self.assertGreaterEqual(manager.removed[0][1], now + 0.3)
+        self.assertEqual(reaper.pending(), 1)
+
+    def test_schedule_wakes_sleeping_reaper(self):
+        manager = FakeManager()
+        reaper = ExpiryReaper(manager, workers=1, resync_interval=60)
+        reaper.start()
+        try:
+            time.sleep(0.1) # Reaper is now asleep with an empty heap
+            reaper.schedule("c3", time.time())
+            self.assertTrue(manager.done.wait(5))
+        finally:
+            reaper.stop()
+        self.assertEqual(manager.removed[0][0], "c3")
+
+    def test_follows_created_containers_between_resyncs(self):
+        manager = FakeManager()
+        closed = threading.Event()
+        created = mock.Mock(id="d4", labels={'vaultos.expires': str(time.time() + 0.2)})
+
+        def stream_events():
+            # Listings never show the container; only the event can report it
+            yield 'create', "d4"
+            closed.wait(5)
+
+        manager.stream_events = stream_events
+        manager.get_container = {"d4": created}.get
+        manager.close_events = closed.set
+        reaper = ExpiryReaper(manager, workers=1, resync_interval=3600)
+        reaper.start()
+        follower = threading.Thread(target=reaper.follow_events, daemon=True)
+        follower.start()
+        try:
+            self.assertTrue(manager.done.wait(5))
+        finally:
+            reaper.stop()
+        follower.join(5)
+        self.assertFalse(follower.is_alive())
+        self.assertEqual(manager.removed[0][0], "d4")
+
+if __name__ == '__main__':
+    unittest.main()
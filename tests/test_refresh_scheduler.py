@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.refresh_scheduler import RefreshScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RefreshScheduler(min_interval=2, max_interval=60, duration_factor=4, clock=self.clock)
+
+    def reconcile(self, seconds=0.1, changed=False):
+        run = self.scheduler.start()
+        self.clock.now += seconds
+        self.scheduler.finish(run, changed)
+        return self.scheduler.next_at - self.clock.now
+
+    def test_backs_off_while_nothing_changes(self):
+        self.assertTrue(self.scheduler.due())
+        waits = [self.reconcile() for _ in range(7)]
+        self.assertEqual(waits, [4, 8, 16, 32, 60, 60, 60])
+        self.assertEqual(self.reconcile(changed=True), 2)
+
+    def test_poke_brings_next_reconcile_forward(self):
+        for _ in range(5):
+            self.reconcile()
+        self.clock.now += 10
+        self.scheduler.poke()
+        self.assertFalse(self.scheduler.due())
+        self.clock.now += 2
+        self.assertTrue(self.scheduler.due())
+        self.assertEqual(self.reconcile(), 4) # Backoff restarted
+
+    def test_slow_reconciles_are_spaced_out(self):
+        # A 10s listing (a very large fleet) is never followed by another within 40s
+        self.assertEqual(self.reconcile(seconds=10, changed=True), 40)
+        self.scheduler.poke()
+        self.assertEqual(self.scheduler.next_at - self.clock.now, 40)
+
+    def test_nothing_due_while_running_or_paused(self):
+        run = self.scheduler.start()
+        self.clock.now += 1
+        self.assertFalse(self.scheduler.due())
+        self.scheduler.finish(run, False)
+        self.clock.now += 100
+        self.assertFalse(self.scheduler.due(paused=True))
+        self.assertTrue(self.scheduler.due())
+
+    def test_superseded_reconcile_ignored(self):
+        first = self.scheduler.start()
+        second = self.scheduler.start() # e.g. the user pressed `r` mid-reconcile
+        self.scheduler.finish(first, False)
+        self.assertTrue(self.scheduler.running)
+        self.scheduler.finish(second, True)
+        self.assertFalse(self.scheduler.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import queue
+import threading
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats import StatsPool, parse_stats, format_cpu, format_memory
+
+
+def document(cpu, precpu, system, presystem, usage=500 * 2**20, cache=0, limit=2**30):
+    return {
+        'cpu_stats': {'cpu_usage': {'total_usage': cpu}, 'system_cpu_usage': system, 'online_cpus': 4},
+        'precpu_stats': {'cpu_usage': {'total_usage': precpu}, 'system_cpu_usage': presystem},
+        'memory_stats': {'usage': usage, 'limit': limit, 'stats': {'inactive_file': cache}},
+    }
+
+
+class FakeManager:
+    """stream_stats() yields whatever the test puts on the container's queue; None ends it."""
+    def __init__(self):
+        self.queues = {}
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def stream_stats(self, cid):
+        with self.lock:
+            self.opened.append(cid)
+            q = self.queues.setdefault(cid, queue.Queue())
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            yield item
+
+    def send(self, cid, item):
+        with self.lock:
+            q = self.queues.setdefault(cid, queue.Queue())
+        q.put(item)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestParseStats(unittest.TestCase):
+    def test_cpu_is_cores_in_use(self):
+        # 2 of 4 host cores' worth of the system delta
+        sample = parse_stats(document(3_000, 1_000, 14_000, 10_000))
+        self.assertAlmostEqual(sample.cpu, 2.0)
+        self.assertEqual(format_cpu(sample, 2.0), "▲100%")
+
+    def test_first_document_has_no_cpu(self):
+        sample = parse_stats(document(3_000, 0, 14_000, 0))
+        self.assertIsNone(sample.cpu)
+        self.assertEqual(format_cpu(sample, 2.0), "")
+
+    def test_memory_excludes_page_cache(self):
+        sample = parse_stats(document(0, 0, 0, 0, usage=600 * 2**20, cache=100 * 2**20))
+        self.assertEqual(sample.memory, 500 * 2**20)
+        self.assertEqual(format_memory(sample), "500M/1.0G")
+        near_limit = parse_stats(document(0, 0, 0, 0, usage=1000 * 2**20))
+        self.assertEqual(format_memory(near_limit), "▲1000M/1.0G")
+
+    def test_stopped_container_document_ignored(self):
+        self.assertIsNone(parse_stats({'memory_stats': {}, 'cpu_stats': {}}))
+
+
+class TestStatsPool(unittest.TestCase):
+    def setUp(self):
+        self.manager = FakeManager()
+        self.pool = StatsPool(self.manager, max_streams=2, history=3)
+
+    def tearDown(self):
+        for cid in list(self.manager.queues):
+            self.manager.send(cid, None)
+
+    def test_ring_buffer_keeps_last_samples(self):
+        self.pool.watch(['a'])
+        for i in range(5):
+            self.manager.send('a', document(0, 0, 0, 0, usage=i))
+        wait_for(lambda: self.pool.latest('a') is not None and self.pool.latest('a').memory == 4)
+        self.assertEqual([s.memory for s in self.pool.samples('a')], [2, 3, 4])
+
+    def test_streams_bounded_and_follow_visible_rows(self):
+        self.pool.watch(['a', 'b', 'c'])
+        wait_for(lambda: len(self.manager.opened) == 2)
+        self.assertEqual(sorted(self.pool.streaming()), ['a', 'b'])
+
+        # Scrolling: 'a' goes off screen, but its stream counts until it winds down
+        self.pool.watch(['b', 'c'])
+        self.assertEqual(self.pool.streaming(), ['b'])
+        self.manager.send('a', document(0, 0, 0, 0))
+        wait_for(lambda: 'a' not in self.pool._streams)
+        self.assertIsNone(self.pool.latest('a'))
+
+        self.pool.watch(['b', 'c'])
+        wait_for(lambda: 'c' in self.manager.opened)
+        self.assertEqual(sorted(self.pool.streaming()), ['b', 'c'])
+
+    def test_ended_stream_resubscribes(self):
+        self.pool.watch(['a'])
+        wait_for(lambda: self.manager.opened == ['a'])
+        self.manager.send('a', None)
+        wait_for(lambda: not self.pool._streams)
+        self.pool.watch(['a'])
+        wait_for(lambda: self.manager.opened == ['a', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docker_manager import DockerManager
+from store import Store
+
+
+def row(cid, status="running"):
+    return (cid[:12], "│", f"box-{cid}", "│", status)
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "vaultos.db")
+        self.store = Store(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def reopen(self):
+        self.store.close()
+        self.store = Store(self.path)
+
+    def test_rows_survive_a_restart(self):
+        self.assertIsNone(self.store.load_rows())
+        self.store.save_rows({'a': row('a'), 'b': row('b')}, {'a': 1234.5})
+        self.reopen()
+        rows, expiring, saved_at = self.store.load_rows()
+        self.assertEqual(rows, {'a': row('a'), 'b': row('b')})
+        self.assertEqual(expiring, {'a': 1234.5})
+        self.assertGreater(saved_at, 0)
+
+    def test_removed_container_keeps_its_history(self):
+        self.store.record_create({'name': 'box-a', 'type': 'default'}, 'a', 2.5)
+        self.store.save_rows({'a': row('a'), 'b': row('b')}, {})
+        self.store.save_rows({'b': row('b', 'exited')}, {})
+        self.reopen()
+        rows, _, _ = self.store.load_rows()
+        self.assertEqual(rows, {'b': row('b', 'exited')})
+        gone = self.store.get('a')
+        self.assertIsNotNone(gone['gone_at'])
+        self.assertEqual(gone['config'], {'name': 'box-a', 'type': 'default'})
+
+        # Seen again (e.g. a host back from a timeout): no longer gone
+        self.store.save_rows({'a': row('a'), 'b': row('b', 'exited')}, {})
+        self.assertIsNone(self.store.get('a')['gone_at'])
+
+    def test_unchanged_rows_not_rewritten(self):
+        containers = {'a': mock.Mock(status='running'), 'b': mock.Mock(status='running')}
+        containers['a'].name, containers['b'].name = 'box-a', 'box-b'
+        self.store.save_rows({'a': row('a'), 'b': row('b')}, {}, containers)
+        first_seen = self.store.get('a')['last_seen']
+        containers['b'].status = 'exited'
+        self.store.save_rows({'a': row('a'), 'b': row('b', 'exited')}, {}, containers)
+        self.assertEqual(self.store.get('a')['last_seen'], first_seen)
+        self.assertEqual(self.store.get('a')['name'], 'box-a')
+        self.assertEqual(self.store.get('b')['status'], 'exited')
+
+    def test_create_and_pull_history(self):
+        self.store.record_create({'name': 'x'}, None, 0.1, error="port is already allocated")
+        self.store.record_create({'name': 'y'}, 'y', 3.0)
+        self.store.record_pull('webtop:latest', 40.0, 900_000_000)
+        self.reopen()
+        self.assertEqual(self.store.create_seconds(), [3.0])
+        pulls = self.store.pulls('webtop:latest')
+        self.assertEqual(len(pulls), 1)
+        self.assertEqual(pulls[0]['bytes'], 900_000_000)
+        self.assertEqual(self.store.pulls('other'), [])
+
+    def test_manager_records_creates(self):
+        client = mock.Mock()
+        client.containers.run.return_value = mock.Mock(id='new-id')
+        dm = DockerManager.__new__(DockerManager)
+        dm.client = client
+        dm._init_state(cache_ttl=60)
+        dm.store = self.store
+        dm.create_container({'name': 'box', 'type': 'default', 'port': 3001})
+        self.assertEqual(self.store.get('new-id')['config']['name'], 'box')
+
+        client.containers.run.side_effect = RuntimeError("no space left")
+        with self.assertRaises(RuntimeError):
+            dm.create_container({'name': 'box2', 'type': 'default', 'port': 3002})
+        self.assertEqual(len(self.store.create_seconds()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.table_diff import diff_rows
+
+class TestDiffRows(unittest.TestCase):
+    def test_unchanged_rows_produce_no_work(self):
+        rows = {"a": ("a", "running"), "b": ("b", "exited")}
+        self.assertEqual(diff_rows(rows, dict(rows)), ([], [], {}))
+
+    def test_added_removed_and_changed_cells(self):
+        old = {"a": ("a", "running", "00:01"), "b": ("b", "exited", "No Expire")}
+        new = {"a": ("a", "running", "00:00"), "c": ("c", "created", "No Expire")}
+        added, removed, changed = diff_rows(old, new)
+        self.assertEqual(added, ["c"])
+        self.assertEqual(removed, ["b"])
+        self.assertEqual(changed, {"a": [(2, "00:00")]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,352 @@
+from rich.cells import set_cell_size
+from rich.segment import Segment
+from textual import events
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+SEPARATOR = "│"
+
+class Column:
+    """
+    One table column. indexed columns are matched by search; sort_key maps a
+    cell value to its sort key (None: the column cannot be sorted).
+    """
+    def __init__(self, key, label, width, indexed=False, sort_key=str.lower):
+        self.key = key
+        self.label = label
+        self.width = width
+        self.indexed = indexed
+        self.sort_key = sort_key
+
+class TableIndex:
+    """
+    In-memory index over the table's rows: the search text of each row and the
+    current sort order. view() is rebuilt only when a change can move rows
+    (a new or removed row, a search match flipping, a sort key changing);
+    other cell updates cost one dict write.
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = {} # key -> cells, in insertion order
+        self.query = ''
+        self.sort_column = None # Column index, or None for insertion order
+        self.reverse = False
+        self._words = []
+        self._text = {} # key -> lower-cased indexed cells, for search
+        self._matches = None # Keys matching the query, or None without one
+        self._indexed = [i for i, c in enumerate(columns) if c.indexed]
+        self._view = None # Cached display order
+
+    def _search_text(self, cells):
+        return " ".join(str(cells[i]) for i in self._indexed).lower()
+
+    def _match(self, key):
+        text = self._text[key]
+        return all(w in text for w in self._words)
+
+    def _filter(self, keys):
+        # One pass per word, each a plain substring test: this is the keystroke's cost
+        text = self._text
+        for word in self._words:
+            keys = {key for key in keys if word in text[key]}
+        return keys
+
+    def put(self, key, cells):
+        """Adds or replaces a row. Returns True if the display order may have changed."""
+        old = self.rows.get(key)
+        self.rows[key] = cells
+        text = self._search_text(cells)
+        moved = old is None
+        if text != self._text.get(key):
+            self._text[key] = text
+            if self._matches is not None:
+                matched = self._match(key)
+                if matched != (key in self._matches):
+                    moved = True
+                    if matched:
+                        self._matches.add(key)
+                    else:
+                        self._matches.discard(key)
+        col = self.sort_column
+        if col is not None and old is not None and old[col] != cells[col]:
+            moved = True
+        if moved:
+            self._view = None
+        return moved
+
+    def remove(self, key):
+        if self.rows.pop(key, None) is None:
+            return False
+        self._text.pop(key, None)
+        if self._matches is not None:
+            self._matches.discard(key)
+        self._view = None
+        return True
+
+    def search(self, query):
+        """Filters to rows containing every word of query (any indexed column). '' clears."""
+        query = query.lower()
+        words = query.split()
+        if not words:
+            self._matches = None
+        elif self._matches is not None and query.startswith(self.query):
+            # Typing on narrows the previous matches; no need to look at every row again
+            self._words = words
+            self._matches = self._filter(self._matches)
+        else:
+            self._words = words
+            self._matches = self._filter(self.rows)
+        self.query = query
+        self._view = None
+
+    def sort(self, column, reverse=False):
+        """Orders the view by a column index (None: insertion order)."""
+        self.sort_column = column
+        self.reverse = reverse
+        self._view = None
+
+    def view(self):
+        """Keys of the rows to show, in display order."""
+        if self._view is None:
+            keys = self.rows if self._matches is None else [k for k in self.rows if k in self._matches]
+            if self.sort_column is None:
+                self._view = list(keys)
+            else:
+                sort_key = self.columns[self.sort_column].sort_key
+                col = self.sort_column
+                self._view = sorted(keys, key=lambda k: sort_key(self.rows[k][col]), reverse=self.reverse)
+        return self._view
+
+class ContainerTable(ScrollView, can_focus=True):
+    """
+    Virtualized table: rows live in a TableIndex and only the lines on screen
+    are rendered, so scrolling, cursor moves and cell updates cost the same for
+    ten rows or ten thousand. Row 0 on screen is the header; clicking a column
+    label sorts by it (again to reverse).
+    """
+    DEFAULT_CSS = """
+    ContainerTable {
+        background: $surface;
+        color: $foreground;
+        & > .container-table--header {
+            text-style: bold;
+            background: $panel;
+            color: $foreground;
+        }
+        & > .container-table--even-row {
+            background: $surface-lighten-1 50%;
+        }
+        &:dark > .container-table--even-row {
+            background: $surface-darken-1 40%;
+        }
+        & > .container-table--cursor {
+            background: $block-cursor-blurred-background;
+            color: $block-cursor-blurred-foreground;
+            text-style: $block-cursor-blurred-text-style;
+        }
+        &:focus > .container-table--cursor {
+            background: $block-cursor-background;
+            color: $block-cursor-foreground;
+            text-style: $block-cursor-text-style;
+        }
+    }
+    """
+    COMPONENT_CLASSES = {"container-table--header", "container-table--even-row", "container-table--cursor"}
+    BINDINGS = [
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+    ]
+
+    def __init__(self, columns=(), **kwargs):
+        super().__init__(**kwargs)
+        self.cursor = 0 # Position in the view
+        self._cursor_key = None # Row under the cursor, kept across re-sorts and filters
+        self._positions = {} # key -> position in the view
+        self._dirty = True
+        self._sync_pending = False
+        self.set_columns(columns)
+
+    def set_columns(self, columns):
+        """Sets the columns (list of Column); drops any rows."""
+        self.columns = list(columns)
+        self.index = TableIndex(self.columns)
+        self._width = sum(c.width + 2 for c in self.columns) + len(self.columns) - 1
+        self._dirty = True
+        self.refresh()
+
+    # Row updates (keys are container ids; column is an index into columns)
+
+    def add_row(self, *cells, key):
+        self.index.put(key, tuple(cells))
+        self._changed(key, True)
+
+    def remove_row(self, key):
+        if self.index.remove(key):
+            self._changed(key, True)
+
+    def update_cell(self, key, column, value):
+        cells = self.index.rows.get(key)
+        if cells is None or cells[column] == value:
+            return
+        self._changed(key, self.index.put(key, cells[:column] + (value,) + cells[column + 1:]))
+
+    def search(self, query):
+        self.index.search(query)
+        self._changed(None, True)
+
+    def sort(self, column, reverse=False):
+        self.index.sort(column, reverse)
+        self._changed(None, True)
+
+    def _changed(self, key, moved):
+        if moved:
+            self._dirty = True
+            if not self._sync_pending:
+                # Coalesce a burst of updates (a full reconcile) into one re-index
+                self._sync_pending = True
+                self.call_later(self._sync)
+        elif key in self._positions:
+            y = self._positions[key] - int(self.scroll_offset.y) + 1
+            if 1 <= y < self.size.height:
+                self.refresh_line(y)
+
+    def _sync(self):
+        """Rebuilds the view if rows moved; keeps the cursor on the same row when it is still shown."""
+        self._sync_pending = False
+        if not self._dirty:
+            return
+        self._dirty = False
+        view = self.index.view()
+        self._positions = {key: i for i, key in enumerate(view)}
+        if self._cursor_key in self._positions:
+            self.cursor = self._positions[self._cursor_key]
+        else:
+            self.cursor = max(0, min(self.cursor, len(view) - 1))
+            self._cursor_key = view[self.cursor] if view else None
+        self.virtual_size = Size(self._width, len(view) + 1)
+        self._scroll_to_cursor()
+        self.refresh()
+
+    # Queries
+
+    @property
+    def row_count(self):
+        self._sync()
+        return len(self.index.view())
+
+    def selected_key(self):
+        self._sync()
+        return self._cursor_key
+
+    def visible_keys(self):
+        """Keys of the rows on screen, top to bottom."""
+        self._sync()
+        first = int(self.scroll_offset.y)
+        return self.index.view()[first:first + max(0, self.size.height - 1)]
+
+    # Cursor
+
+    def move_cursor(self, row):
+        self._sync()
+        view = self.index.view()
+        if not view:
+            return
+        row = max(0, min(row, len(view) - 1))
+        old = self.cursor
+        self.cursor = row
+        self._cursor_key = view[row]
+        # Only the two lines involved are repainted
+        for position in (old, row):
+            y = position - int(self.scroll_offset.y) + 1
+            if 1 <= y < self.size.height:
+                self.refresh_line(y)
+        self._scroll_to_cursor()
+
+    def _scroll_to_cursor(self):
+        height = max(1, self.size.height - 1)
+        top = int(self.scroll_offset.y)
+        if self.cursor < top:
+            self.scroll_to(y=self.cursor, animate=False, immediate=True)
+        elif self.cursor >= top + height:
+            self.scroll_to(y=self.cursor - height + 1, animate=False, immediate=True)
+
+    def action_cursor_up(self):
+        self.move_cursor(self.cursor - 1)
+
+    def action_cursor_down(self):
+        self.move_cursor(self.cursor + 1)
+
+    def action_page_up(self):
+        self.move_cursor(self.cursor - max(1, self.size.height - 2))
+
+    def action_page_down(self):
+        self.move_cursor(self.cursor + max(1, self.size.height - 2))
+
+    def action_first(self):
+        self.move_cursor(0)
+
+    def action_last(self):
+        self.move_cursor(self.row_count - 1)
+
+    def on_click(self, event: events.Click):
+        # event.x/y count from the outer edge; borders and padding are not table lines
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        if offset.y == 0:
+            column = self._column_at(offset.x + int(self.scroll_offset.x))
+            if column is not None and self.columns[column].sort_key is not None:
+                reverse = self.index.sort_column == column and not self.index.reverse
+                self.sort(column, reverse)
+        else:
+            self.move_cursor(int(self.scroll_offset.y) + offset.y - 1)
+
+    def _column_at(self, x):
+        for i, column in enumerate(self.columns):
+            x -= column.width + 3
+            if x < 0:
+                return i
+        return None
+
+    def on_focus(self):
+        self.refresh()
+
+    def on_blur(self):
+        self.refresh()
+
+    # Rendering
+
+    def _line(self, cells, style):
+        text = f" {SEPARATOR} ".join(set_cell_size(str(cell), c.width) for cell, c in zip(cells, self.columns))
+        return Strip([Segment(f" {text} ", style)])
+
+    def render_line(self, y):
+        base = self.rich_style
+        if y == 0:
+            labels = []
+            for i, column in enumerate(self.columns):
+                label = column.label
+                if i == self.index.sort_column:
+                    label += " ▼" if self.index.reverse else " ▲"
+                labels.append(label)
+            strip = self._line(labels, base + self.get_component_rich_style("container-table--header"))
+        else:
+            view = self.index.view()
+            position = int(self.scroll_offset.y) + y - 1
+            cells = self.index.rows.get(view[position]) if position < len(view) else None
+            if cells is None:
+                return Strip.blank(self.size.width, base)
+            style = base
+            if position % 2:
+                style += self.get_component_rich_style("container-table--even-row")
+            if position == self.cursor:
+                style += self.get_component_rich_style("container-table--cursor")
+            strip = self._line(cells, style)
+        x = int(self.scroll_offset.x)
+        return strip.crop(x, x + self.size.width).extend_cell_length(self.size.width, base)
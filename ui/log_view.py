@@ -0,0 +1,97 @@
+import re
+import threading
+from collections import deque
+from rich.segment import Segment
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from config import LOG_BUFFER_LINES
+
+# Colour and cursor escapes; the pane shows plain text
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07')
+
+class LogBuffer:
+    """
+    Fixed-capacity ring buffer of log lines. feed() takes raw chunks from a
+    worker thread; drain() moves them into `lines` on the UI thread, so a
+    burst costs one repaint however many chunks it arrived in.
+    """
+    def __init__(self, capacity=LOG_BUFFER_LINES):
+        self.capacity = capacity
+        self.lines = deque(maxlen=capacity)
+        self.dropped = 0 # Lines discarded so far, oldest first
+        self._pending = deque(maxlen=capacity) # Anything older would be evicted on drain anyway
+        self._partial = ''
+        self._lock = threading.Lock()
+
+    def feed(self, chunk):
+        """Adds a chunk of output (bytes or str); a trailing partial line waits for the rest."""
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8', errors='replace')
+        with self._lock:
+            text = self._partial + chunk
+            *complete, self._partial = text.split('\n')
+            # A burst larger than the buffer only keeps its newest lines
+            skipped = max(0, len(complete) - self.capacity)
+            self.dropped += max(0, len(self._pending) + len(complete) - skipped - self.capacity) + skipped
+            self._pending.extend(self._clean(line) for line in complete[skipped:])
+
+    def flush(self):
+        """Ends the stream: a trailing partial line becomes a line of its own."""
+        with self._lock:
+            if self._partial:
+                self._pending.append(self._clean(self._partial))
+                self._partial = ''
+
+    def drain(self):
+        """Moves pending lines into the buffer. Returns the lines added."""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            self.dropped += max(0, len(self.lines) + len(pending) - self.capacity)
+        self.lines.extend(pending)
+        return pending
+
+    @staticmethod
+    def _clean(line):
+        return ANSI_ESCAPE.sub('', line).rstrip('\r').expandtabs()
+
+class LogView(ScrollView):
+    """Scrollable view over a LogBuffer that renders only the lines on screen."""
+    DEFAULT_CSS = """
+    LogView {
+        background: $surface;
+    }
+    """
+    def __init__(self, buffer, **kwargs):
+        super().__init__(**kwargs)
+        self.buffer = buffer
+        self.follow = True # Stick to the newest line until the user scrolls up
+        self._width = 0
+        self._count = 0
+
+    def update_lines(self, added):
+        """Call with what buffer.drain() returned: resizes the virtual area and keeps the scroll position."""
+        evicted = self._count + len(added) - len(self.buffer.lines)
+        self._count = len(self.buffer.lines)
+        # Widest line seen so far; only new lines need measuring
+        self._width = max([self._width] + [len(line) for line in added])
+        self.virtual_size = Size(self._width, len(self.buffer.lines))
+        if self.follow:
+            self.scroll_end(animate=False, immediate=True)
+        elif evicted:
+            # The lines on screen moved up by the evicted count
+            self.scroll_to(y=max(0, self.scroll_offset.y - evicted), animate=False, immediate=True)
+        self.refresh()
+
+    def render_line(self, y):
+        index = self.scroll_offset.y + y
+        if index >= len(self.buffer.lines):
+            return Strip.blank(self.size.width)
+        line = self.buffer.lines[index]
+        x = self.scroll_offset.x
+        return Strip([Segment(line[x:x + self.size.width])]).extend_cell_length(self.size.width)
+
+    def watch_scroll_y(self, old_value, new_value):
+        super().watch_scroll_y(old_value, new_value)
+        self.follow = round(new_value) >= self.max_scroll_y
@@ -1,9 +1,12 @@
+import threading
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical
-from textual.widgets import Button, Label, Input, RadioSet, RadioButton, Select, Checkbox
+from textual.widgets import Button, Label, Input, RadioSet, RadioButton, Select, Checkbox, ProgressBar
 from textual.screen import ModalScreen
-from textual import on
-from config import OS_OPTIONS, OS_DESKTOP_MAP, get_desktop_label
+from textual import on, work
+from config import OS_OPTIONS, OS_DESKTOP_MAP, get_desktop_label, LOG_FPS
+from pull_progress import PullSnapshot, format_bytes
+from ui.log_view import LogBuffer, LogView
 
 class AboutModal(ModalScreen):
     """Modal to show about information."""
@@ -74,14 +77,165 @@ class DownloadProgressModal(ModalScreen):
         width: 100%;
         text-align: center;
     }
+    #dl_bar {
+        width: 100%;
+        margin-top: 1;
+    }
+    #dl_layers {
+        width: 100%;
+        color: $text-muted;
+        margin-top: 1;
+    }
     """
+    def __init__(self, title="Downloading Image..."):
+        super().__init__()
+        self.title_text = title
+
     def compose(self) -> ComposeResult:
         with Vertical(id="download_dialog"):
-            yield Label("Downloading Image...", id="dl_title")
+            yield Label(self.title_text, id="dl_title")
             yield Label("Connecting to Docker Hub...", id="dl_status")
+            bar = ProgressBar(id="dl_bar", show_eta=False)
+            bar.display = False # Shown once a pull reports byte progress
+            yield bar
+            yield Label("", id="dl_layers")
     
-    def update_status(self, msg: str):
-         self.query_one("#dl_status", Label).update(msg)
+    def update_status(self, msg):
+         """msg: a status string, or a PullSnapshot while an image downloads."""
+         self.query_one("#dl_status", Label).update(str(msg))
+         if not isinstance(msg, PullSnapshot):
+             return
+         bar = self.query_one("#dl_bar", ProgressBar)
+         bar.display = True
+         bar.update(total=msg.total or None, progress=msg.current)
+         lines = [f"{layer_id[:12]}  {format_bytes(current)} / {format_bytes(total)}  {format_bytes(rate)}/s"
+                  for layer_id, current, total, rate in msg.slowest]
+         self.query_one("#dl_layers", Label).update("\n".join(["Slowest layers:"] + lines) if lines else "")
+
+class LogViewerModal(ModalScreen):
+    """Follows one container's logs in a bounded, frame-rate limited pane."""
+    BINDINGS = [("escape", "close", "Close")]
+    CSS = """
+    LogViewerModal {
+        align: center middle;
+    }
+    #log_dialog {
+        width: 90%;
+        height: 90%;
+        border: heavy $accent;
+        background: $surface;
+        padding: 0 1;
+    }
+    #log_title {
+        text-style: bold;
+        width: 100%;
+        text-align: center;
+    }
+    #log_view {
+        height: 1fr;
+        border: solid $primary;
+    }
+    #log_status {
+        width: 100%;
+        color: $text-muted;
+    }
+    #log_close_btn {
+        width: 100%;
+    }
+    """
+    def __init__(self, manager, container_id, name):
+        super().__init__()
+        self.manager = manager # Thread based: stream_logs() is a blocking iterator
+        self.container_id = container_id
+        self.container_name = name
+        self.buffer = LogBuffer()
+        self.stream = None
+        self.closed = False # Set on unmount; a stream opened after that is closed by the worker
+        self._stream_lock = threading.Lock()
+        self.ended = None # Set by the worker when the stream stops
+
+    def compose(self) -> ComposeResult:
+        with Vertical(id="log_dialog"):
+            yield Label(f"Logs: {self.container_name}", id="log_title")
+            yield LogView(self.buffer, id="log_view")
+            yield Label("Connecting...", id="log_status")
+            yield Button("Close", id="log_close_btn")
+
+    def on_mount(self):
+        # The worker only appends to the buffer; the pane repaints at a fixed rate
+        self.set_interval(1 / LOG_FPS, self.flush_lines)
+        self.follow_logs()
+
+    @work(thread=True, exclusive=True, group="logs")
+    def follow_logs(self):
+        try:
+            stream = self.manager.stream_logs(self.container_id)
+            with self._stream_lock:
+                if self.closed:
+                    # Closed while connecting: nobody else will close this one
+                    stream.close()
+                    return
+                self.stream = stream
+            for chunk in stream:
+                self.buffer.feed(chunk)
+            self.ended = "Log stream ended."
+        except Exception as e:
+            self.ended = f"Log stream failed: {e}"
+        finally:
+            self.buffer.flush()
+
+    def flush_lines(self):
+        added = self.buffer.drain()
+        if added:
+            self.query_one(LogView).update_lines(added)
+        status = f"{len(self.buffer.lines)} lines"
+        if self.buffer.dropped:
+            status += f" (oldest {self.buffer.dropped} dropped)"
+        if self.ended:
+            status += f" | {self.ended}"
+        self.query_one("#log_status", Label).update(status)
+
+    def on_unmount(self):
+        with self._stream_lock:
+            self.closed = True
+            stream = self.stream
+        if stream is not None:
+            stream.close() # Unblocks the worker
+
+    @on(Button.Pressed, "#log_close_btn")
+    def action_close(self):
+        self.dismiss()
+
+class MarkFilterModal(ModalScreen):
+    """Asks for the words that rows to mark must contain."""
+    BINDINGS = [("escape", "cancel", "Cancel")]
+    CSS = """
+    MarkFilterModal {
+        align: center middle;
+    }
+    #filter_dialog {
+        width: 60;
+        height: auto;
+        border: heavy $accent;
+        background: $surface;
+        padding: 1 2;
+    }
+    #filter_hint {
+        color: $text-muted;
+    }
+    """
+    def compose(self) -> ComposeResult:
+        with Vertical(id="filter_dialog"):
+            yield Label("Mark containers matching:")
+            yield Input(placeholder="e.g. running ubuntu", id="filter_input")
+            yield Label("Every word must appear in the row. Empty clears all marks.", id="filter_hint")
+
+    @on(Input.Submitted, "#filter_input")
+    def on_submit(self, event: Input.Submitted):
+        self.dismiss(event.value)
+
+    def action_cancel(self):
+        self.dismiss(None)
 
 class CreateContainerModal(ModalScreen):
     """Modal dialog to create a new container with a Wizard flow."""
@@ -132,6 +286,12 @@ class CreateContainerModal(ModalScreen):
         margin-bottom: 1;
         border: none;
     }
+    #batch_fields {
+        height: auto;
+    }
+    #batch_fields Input {
+        width: 1fr;
+    }
     #buttons {
         margin-top: 2;
         margin-bottom: 1;
@@ -150,6 +310,11 @@ class CreateContainerModal(ModalScreen):
     }
     """
 
+    def __init__(self, hosts=None):
+        """hosts: fleet host names to choose from; None with a single daemon."""
+        super().__init__()
+        self.hosts = hosts
+
     def compose(self) -> ComposeResult:
         with Vertical(id="dialog"):
             yield Label("Create Container - Step 1/3", id="wizard_title")
@@ -161,7 +326,17 @@ class CreateContainerModal(ModalScreen):
                 
                 yield Label("Port (Local)")
                 yield Input(placeholder="3001", id="port", type="integer")
+
+                yield Label("Count (batch: ports allocated from Port to Last Port)")
+                with Horizontal(id="batch_fields"):
+                    yield Input(placeholder="1", id="count", type="integer")
+                    yield Input(placeholder="Last Port e.g. 4999", id="port_end", type="integer")
                 
+                if self.hosts:
+                    yield Label("Host")
+                    yield Select([("Least loaded", "")] + [(h, h) for h in self.hosts],
+                                 value="", allow_blank=False, id="host_select")
+
                 yield Label("Mode")
                 with RadioSet(id="mode_select"):
                     yield RadioButton("Default", id="mode-default", value=True)
@@ -276,6 +451,16 @@ class CreateContainerModal(ModalScreen):
             if not name or not port:
                 self.notify("Name and Port are required!", severity="error")
                 return False
+
+            count = int(self.query_one("#count", Input).value or 1)
+            if count < 1:
+                self.notify("Count must be at least 1!", severity="error")
+                return False
+            if count > 1:
+                port_end = self.query_one("#port_end", Input).value
+                if not port_end or int(port_end) - int(port) + 1 < count:
+                    self.notify(f"Last Port must leave room for {count} desktops!", severity="error")
+                    return False
         
         elif self.current_step == 2:
             os_val = self.query_one("#os_select", Select).value
@@ -380,6 +565,13 @@ class CreateContainerModal(ModalScreen):
             "port": self.query_one("#port", Input).value,
             "type": self.mode
         }
+        if self.hosts and self.query_one("#host_select", Select).value:
+            config["host"] = self.query_one("#host_select", Select).value
+
+        count = int(self.query_one("#count", Input).value or 1)
+        if count > 1:
+            config["count"] = count
+            config["port_range"] = (int(config["port"]), int(self.query_one("#port_end", Input).value))
         
         if self.mode != "default":
             config["os"] = self.query_one("#os_select", Select).value
@@ -0,0 +1,56 @@
+import time
+from config import REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL, REFRESH_DURATION_FACTOR
+
+class RefreshScheduler:
+    """
+    Decides when the dashboard's next full reconcile is due. The interval
+    resets to min_interval after a change or user action and doubles after
+    each reconcile that changed nothing, up to max_interval. It is never
+    shorter than duration_factor x the last reconcile's duration, and a
+    reconcile is never due while one is running, so slow daemons and large
+    fleets cannot stack refreshes.
+    """
+    def __init__(self, min_interval=REFRESH_MIN_INTERVAL, max_interval=REFRESH_MAX_INTERVAL,
+                 duration_factor=REFRESH_DURATION_FACTOR, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.duration_factor = duration_factor
+        self.clock = clock
+        self.interval = min_interval
+        self.duration = 0.0 # How long the last reconcile took
+        self.next_at = clock() # First reconcile is due right away
+        self.running = False
+        self._run = 0 # Generation of the reconcile in flight; a superseded one's finish is ignored
+        self._started = 0.0
+
+    def _floor(self):
+        return max(self.min_interval, self.duration * self.duration_factor)
+
+    def due(self, paused=False):
+        """True when a scheduled reconcile should start now. Nothing is due while paused."""
+        return not paused and not self.running and self.clock() >= self.next_at
+
+    def start(self):
+        """Marks a reconcile (scheduled or not) as started. Returns its token for finish()."""
+        self._run += 1
+        self.running = True
+        self._started = self.clock()
+        return self._run
+
+    def finish(self, run, changed):
+        """Schedules the next reconcile from the outcome of the one started as `run`."""
+        if run != self._run:
+            return
+        now = self.clock()
+        self.running = False
+        self.duration = now - self._started
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.next_at = now + max(self.interval, self._floor())
+
+    def poke(self):
+        """A user action or container event: reconcile soon and restart the backoff."""
+        self.interval = self.min_interval
+        self.next_at = min(self.next_at, self.clock() + self._floor())
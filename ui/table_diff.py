@@ -0,0 +1,18 @@
+def diff_rows(old: dict, new: dict):
+    """
+    Compares two {row_key: tuple_of_cells} mappings.
+    Returns (added, removed, changed):
+      added   - row keys only in new (in new's order)
+      removed - row keys only in old
+      changed - {row_key: [(column_index, value), ...]} for cells that differ
+    """
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+
+    changed = {}
+    for key, cells in new.items():
+        previous = old.get(key)
+        if previous is None or previous == cells:
+            continue
+        changed[key] = [(i, value) for i, value in enumerate(cells) if i >= len(previous) or previous[i] != value]
+    return added, removed, changed
@@ -0,0 +1,335 @@
+"""
+Headless VaultOS commands. Does not import Textual; Docker modules are only
+imported by the command that needs them, so scripting stays fast.
+
+    python -m vaultos ls [--json]                 # list desktops
+    python -m vaultos create NAME [--port ...]    # create one (or --count N) desktops
+    python -m vaultos stop CONTAINER...           # also start|restart|rm; by ID, ID prefix or name
+    python -m vaultos prune                       # remove expired ephemeral desktops now
+    python -m vaultos reap        # remove ephemeral containers at their expiry, no TUI needed
+    python -m vaultos prefetch    # pull every OS x desktop image in the background
+    python -m vaultos pool        # top up the warm pool of ready ephemeral desktops
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def connect(listing_only=False):
+    """
+    DockerManager (FleetManager with config.DOCKER_HOSTS) with the registry
+    attached, so pool claims show their owner and expiry, and the store, so
+    creates and pulls made from the command line join the history.
+    listing_only: for a single unix:// daemon, a SocketDockerManager instead,
+    which lists without importing docker-py and can do nothing else.
+    """
+    from config import DOCKER_HOSTS
+    from registry import Registry
+
+    if listing_only and not DOCKER_HOSTS and os.environ.get('DOCKER_HOST', 'unix://').startswith('unix://'):
+        from docker_socket import SocketDockerManager
+        manager = SocketDockerManager()
+        manager.registry = Registry()
+        return manager
+
+    from store import Store
+    if DOCKER_HOSTS:
+        from fleet import FleetManager
+        manager = FleetManager()
+    else:
+        from docker_manager import DockerManager
+        manager = DockerManager()
+    manager.registry = Registry()
+    manager.store = Store()
+    return manager
+
+
+def emit(args, data, lines):
+    """Prints data as JSON with --json, otherwise the human-readable lines."""
+    if args.json:
+        print(json.dumps(data, indent=2))
+    else:
+        for line in lines:
+            print(line)
+
+
+def progress(msg):
+    # Progress goes to stderr so --json output on stdout stays parseable
+    print(msg, file=sys.stderr)
+
+
+def describe(manager, container):
+    os_name, desktop, port = manager.container_details(container)
+    row = {
+        'id': container.id,
+        'name': manager.display_name(container),
+        'status': container.status,
+        'os': os_name,
+        'desktop': desktop,
+        'port': port,
+        'mode': container.labels.get('vaultos.mode'),
+        'expires': manager.container_expiry(container),
+    }
+    if hasattr(manager, 'host_name'):
+        row['host'] = manager.host_name(container)
+    return row
+
+
+def cmd_ls(args):
+    manager = connect(listing_only=True)
+    rows = [describe(manager, c) for c in manager.list_containers()
+            if args.all or not manager.is_idle_pool_member(c)]
+    fleet = hasattr(manager, 'host_name')
+    lines = [f"{'ID':12}  {'NAME':30}  {'STATUS':8}  {'OS':8}  {'DESKTOP':8}  {'PORT':5}  "
+             + (f"{'EXPIRES':16}  HOST" if fleet else "EXPIRES")]
+    for r in rows:
+        expires = time.strftime('%Y-%m-%d %H:%M', time.localtime(r['expires'])) if r['expires'] else "-"
+        lines.append(f"{r['id'][:12]:12}  {r['name'][:30]:30}  {r['status']:8}  {r['os'] or '?':8}  "
+                     f"{r['desktop'] or '?':8}  {r['port']:5}  " + (f"{expires:16}  {r['host']}" if fleet else expires))
+    emit(args, rows, lines)
+    return 0
+
+
+def cmd_create(args):
+    from config import BATCH_PORT_RANGE, WARM_POOL
+
+    config = {'name': args.name, 'type': args.mode}
+    if args.host:
+        config['host'] = args.host
+    if args.mode != 'default':
+        config['os'] = args.os
+        config['desktop'] = args.desktop
+    if args.mode == 'ephemeral':
+        config['timer'] = args.timer
+    if args.mode == 'persistent':
+        config['volume'] = args.volume
+        if args.username or args.homedir:
+            config['advanced'] = True
+            config['username'] = args.username
+            config['homedir'] = args.homedir
+
+    manager = connect()
+    if args.count == 1:
+        # One desktop keeps its name and can be served from the warm pool; only a free port is picked
+        from docker_manager import allocate_ports
+        if WARM_POOL:
+            from pool import WarmPool
+            # This process exits right away; `vaultos pool` or the dashboard tops the pool up
+            manager.pool = WarmPool(manager, manager.registry, refill_on_claim=False)
+        config['port'] = args.port or allocate_ports(manager.bound_host_ports(), 1, BATCH_PORT_RANGE)[0]
+        cid = manager.create_container(config, progress_callback=progress)
+        # A pool desktop keeps the port it was started with
+        container = manager.get_container(cid)
+        port = manager.container_details(container)[2] if container else config['port']
+        emit(args, {'id': cid, 'port': port}, [cid])
+        return 0
+
+    # Several desktops: allocate free ports like the wizard's batch mode
+    port_range = (args.port, args.port + args.count - 1) if args.port else BATCH_PORT_RANGE
+    batch = manager.create_batch(config, args.count, port_range=port_range, progress_callback=progress)
+    results = batch['results']
+    lines = [f"{r['name']} port {r['port']}: {r.get('id') or r['error']}" for r in results]
+    emit(args, results, lines)
+    return 1 if any('error' in r for r in results) else 0
+
+
+def resolve_refs(manager, refs):
+    """
+    {ref: container} for refs naming exactly one listed VaultOS container by
+    full ID, ID prefix or name, and {ref: error} for the rest. The daemon's own
+    lookup would also match containers VaultOS does not manage.
+    """
+    containers = manager.list_containers()
+    resolved, errors = {}, {}
+    for ref in refs:
+        matches = [c for c in containers if c.id == ref]
+        matches = matches or [c for c in containers if c.id.startswith(ref) or c.name == ref]
+        if len(matches) == 1:
+            resolved[ref] = matches[0]
+        elif matches:
+            errors[ref] = f"ambiguous, matches {len(matches)} desktops"
+        else:
+            errors[ref] = "no such VaultOS desktop"
+    return resolved, errors
+
+
+def lifecycle(args, action):
+    """Runs action on every container given, in parallel (stops share one timeout window)."""
+    manager = connect()
+    resolved, errors = resolve_refs(manager, args.containers)
+    ids = list(dict.fromkeys(c.id for c in resolved.values()))
+    kwargs = {'stop_timeout': args.timeout} if getattr(args, 'timeout', None) is not None else {}
+    outcome = {}
+    if ids:
+        batch = manager.bulk_action(action, ids, names={c.id: manager.display_name(c) for c in resolved.values()},
+                                    progress_callback=progress if len(ids) > 1 else None, **kwargs)
+        outcome = {r['id']: r.get('error') for r in batch['results']}
+    results = []
+    for ref in args.containers:
+        error = errors[ref] if ref in errors else outcome[resolved[ref].id]
+        result = {'container': ref, 'id': resolved[ref].id if ref in resolved else None, 'ok': error is None}
+        if error is not None:
+            result['error'] = error
+        results.append(result)
+    emit(args, results, [f"{r['container']}: {'ok' if r['ok'] else r['error']}" for r in results])
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+def cmd_start(args):
+    return lifecycle(args, 'start')
+
+
+def cmd_stop(args):
+    return lifecycle(args, 'stop')
+
+
+def cmd_restart(args):
+    return lifecycle(args, 'restart')
+
+
+def cmd_rm(args):
+    return lifecycle(args, 'delete')
+
+
+def cmd_prune(args):
+    manager = connect()
+    containers = manager.list_containers()
+    now = time.time()
+    results = []
+    for c in containers:
+        expiry = manager.container_expiry(c)
+        if not expiry or expiry > now:
+            continue
+        result = {'id': c.id, 'name': manager.display_name(c), 'removed': False}
+        if not args.dry_run:
+            try:
+                manager.delete_container(c.id)
+                result['removed'] = True
+            except RuntimeError as e:
+                result['error'] = str(e)
+        results.append(result)
+    if containers and not args.dry_run:
+        manager.registry.prune(c.id for c in containers)
+    lines = [f"{'removed' if r['removed'] else 'expired'} {r['name']} {r.get('error', '')}".rstrip()
+             for r in results] or ["Nothing expired."]
+    emit(args, results, lines)
+    return 1 if any('error' in r for r in results) else 0
+
+
+def cmd_reap(args):
+    import threading
+    from reaper import ExpiryReaper
+
+    # Claimed pool desktops keep their deadline in the registry only; the resync picks up new claims
+    reaper = ExpiryReaper(connect(), workers=args.workers)
+    threading.Thread(target=reaper.follow_events, name="vaultos-reaper-events", daemon=True).start()
+    print(f"Reaper running (workers={args.workers}). Ctrl+C to stop.")
+    try:
+        reaper.run()
+    except KeyboardInterrupt:
+        reaper.stop()
+    return 0
+
+
+def cmd_prefetch(args):
+    from prefetch import ImagePrefetcher
+
+    max_bps = args.max_mbps * 1e6 / 8 if args.max_mbps else None
+    # With DOCKER_HOSTS, every host that lacks an image pulls it
+    prefetcher = ImagePrefetcher(connect(), parallel=args.parallel, max_bytes_per_sec=max_bps)
+    if not args.status:
+        try:
+            results = prefetcher.run(progress_callback=print)
+        except KeyboardInterrupt:
+            prefetcher.stop()
+            return 1
+        failed = [image for image, error in results.items() if error]
+        print(f"Pulled {len(results) - len(failed)} image(s), {len(failed)} failed.")
+
+    for (os_name, desktop), warm in sorted(prefetcher.warm_status().items()):
+        print(f"{'warm' if warm else 'cold':5} {os_name}/{desktop}")
+    return 0
+
+
+def cmd_pool(args):
+    from config import WARM_POOL
+    from pool import WarmPool
+
+    if not WARM_POOL:
+        print("No warm pool configured (config.WARM_POOL is empty).")
+        return 0
+    # With DOCKER_HOSTS, members are counted fleet-wide and created on the least-loaded host
+    manager = connect()
+    results = WarmPool(manager, manager.registry).refill(progress_callback=print)
+    failed = sum(1 for r in results if 'error' in r)
+    print(f"Pool refilled: {len(results) - failed} created, {failed} failed.")
+    return 1 if failed else 0
+
+
+def build_parser():
+    from config import REAPER_WORKERS, PREFETCH_PARALLEL, STOP_TIMEOUT
+
+    parser = argparse.ArgumentParser(prog="vaultos", description="VaultOS desktop container manager")
+    sub = parser.add_subparsers(dest="command", required=True)
+    # Shared by the scriptable commands
+    json_flag = argparse.ArgumentParser(add_help=False)
+    json_flag.add_argument("--json", action="store_true", help="Machine-readable output")
+
+    ls = sub.add_parser("ls", parents=[json_flag], help="List VaultOS desktops")
+    ls.add_argument("--all", action="store_true", help="Include idle warm-pool members")
+    ls.set_defaults(func=cmd_ls)
+
+    create = sub.add_parser("create", parents=[json_flag], help="Create desktop(s)")
+    create.add_argument("name")
+    create.add_argument("--port", type=int, help="Host port (first port with --count); free ports are picked if omitted")
+    create.add_argument("--count", type=int, default=1, help="Number of identical desktops")
+    create.add_argument("--mode", choices=["default", "ephemeral", "persistent"], default="default")
+    create.add_argument("--os", default="alpine")
+    create.add_argument("--desktop", default="xfce")
+    create.add_argument("--timer", default="1h", help="Ephemeral lifetime, e.g. 30s, 2h, 1d")
+    create.add_argument("--volume", help="Persistent: host path mounted at /config")
+    create.add_argument("--username", help="Persistent: custom user instead of abc")
+    create.add_argument("--homedir", help="Persistent: host path mounted as the user's home")
+    create.add_argument("--host", help="Fleet host (config.DOCKER_HOSTS); the least-loaded one if omitted")
+    create.set_defaults(func=cmd_create)
+
+    for name, func, verb in (("start", cmd_start, "Start"), ("stop", cmd_stop, "Stop"),
+                             ("restart", cmd_restart, "Restart"), ("rm", cmd_rm, "Remove")):
+        cmd = sub.add_parser(name, parents=[json_flag], help=f"{verb} desktops by ID, ID prefix or name")
+        cmd.add_argument("containers", nargs="+")
+        if name in ("stop", "restart"):
+            cmd.add_argument("--timeout", type=int, help=f"Seconds to wait for a graceful stop (default {STOP_TIMEOUT})")
+        cmd.set_defaults(func=func)
+
+    prune = sub.add_parser("prune", parents=[json_flag], help="Remove expired ephemeral desktops once")
+    prune.add_argument("--dry-run", action="store_true", help="Only list what would be removed")
+    prune.set_defaults(func=cmd_prune)
+
+    reap = sub.add_parser("reap", help="Remove expired ephemeral containers (runs until interrupted)")
+    reap.add_argument("--workers", type=int, default=REAPER_WORKERS, help="Parallel removals")
+    reap.set_defaults(func=cmd_reap)
+
+    prefetch = sub.add_parser("prefetch", help="Pull every OS x desktop image that is not local yet")
+    prefetch.add_argument("--status", action="store_true", help="Only report which combinations are warm")
+    prefetch.add_argument("--parallel", type=int, default=PREFETCH_PARALLEL, help="Concurrent pulls")
+    prefetch.add_argument("--max-mbps", type=float, default=None, help="Average bandwidth cap in Mbit/s")
+    prefetch.set_defaults(func=cmd_prefetch)
+
+    pool = sub.add_parser("pool", help="Top up the warm pool (config.WARM_POOL) of running ephemeral desktops")
+    pool.set_defaults(func=cmd_pool)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())